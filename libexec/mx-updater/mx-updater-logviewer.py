@@ -2,6 +2,7 @@
 
 import sys
 import os
+import argparse
 
 BUILD_VERSION='%%VERSION%%'
 MX_UPDATER_PATH = "/usr/libexec/mx-updater"
@@ -19,13 +20,14 @@ if MX_UPDATER_PATH not in sys.path:
 
 
 from updater_translator import Translator
+from updater_uu_logs import parse_first_run_mark, parse_offset_mark
 
 from PyQt6.QtWidgets import (
-    QApplication, QDialog, QTextEdit, QVBoxLayout, QHBoxLayout,
+    QApplication, QDialog, QPlainTextEdit, QVBoxLayout, QHBoxLayout,
     QPushButton, QDialogButtonBox, QMessageBox, QStyle
 )
-from PyQt6.QtGui import QIcon, QFont, QGuiApplication
-from PyQt6.QtCore import Qt, QRect, QTranslator, QLocale, QLibraryInfo
+from PyQt6.QtGui import QIcon, QFont, QGuiApplication, QTextCursor
+from PyQt6.QtCore import Qt, QRect, QTranslator, QLocale, QLibraryInfo, QTimer, QFileSystemWatcher, QProcess
 
 from PyQt6.QtCore import QSettings, QPoint, QSize
 from PyQt6.QtGui import QGuiApplication
@@ -50,10 +52,18 @@ _ = gettext.gettext
 
 '''
 
+# runs per page of the dpkg log view
+DPKG_LOG_PAGE_RUNS = 20
+
+# follow mode: lines kept in the text area, bytes shown from the end of the log
+FOLLOW_MAX_LINES = 10000
+FOLLOW_INITIAL_BYTES = 256 * 1024
+
+
 class LogViewer(QDialog):
     def __init__(self, file_path=None, view_cmd=None, icon_path=None,
                  window_class=None, window_title="Log Viewer",
-                 default_width=960, default_height=600):
+                 default_width=960, default_height=600, follow=False):
         """
         Initialize the LogViewer dialog with smart screen sizing.
         """
@@ -61,7 +71,9 @@ class LogViewer(QDialog):
 
         # Initialize settings
         self.qsettings  = QSettings('MX-Linux', 'mx-updater')
-        if "dpkg_log" in os.path.basename(os.path.abspath(__file__)):
+        if follow:
+            self.qsettings_section = "Geometry_Follow_LogViewer"
+        elif "dpkg_log" in os.path.basename(os.path.abspath(__file__)):
             self.qsettings_section = "Geometry_AutoUpdate_Dpkg_LogViewer"
         else:
             self.qsettings_section = "Geometry_AutoUpdate_LogViewer"
@@ -69,6 +81,10 @@ class LogViewer(QDialog):
         self.default_width  = default_width
         self.default_height = default_height
 
+        # paged view: start of the first run shown if older runs exist
+        self.view_cmd = view_cmd
+        self.older_start = None
+        self.loading_older = False
         
         self.setWindowTitle(window_title)
 
@@ -87,7 +103,7 @@ class LogViewer(QDialog):
         
         #--------------------------------------------------------------
         # text area
-        self.text_area = QTextEdit()
+        self.text_area = QPlainTextEdit()
         self.text_area.setReadOnly(True)
 
         #self.text_area.setFont(QFont('monospace', 10))
@@ -96,6 +112,9 @@ class LogViewer(QDialog):
         #self.text_area.setFont(QFont('Courier New', 11))
 
         layout.addWidget(self.text_area)
+
+        # load older runs when scrolled to the top
+        self.text_area.verticalScrollBar().valueChanged.connect(self.scrolled)
         
         #--------------------------------------------------------------
         # standard button box with Close
@@ -135,10 +154,14 @@ class LogViewer(QDialog):
         self.setLayout(layout)
         
         # load file if it exists
-        if file_path and view_cmd:
+        if file_path and follow:
+            self.start_follow(file_path)
+        elif file_path and view_cmd:
             self.load_file(file_path=file_path, view_cmd=view_cmd)
         elif  not file_path and view_cmd:
             self.load_file(view_cmd=view_cmd)
+        elif file_path:
+            self.load_file(file_path=file_path)
         else:
             # If no file is provided, show a default message
             self.text_area.setPlainText("No file specified. Please provide a file path.")
@@ -160,6 +183,9 @@ class LogViewer(QDialog):
         :param view_cmd: Command to view the file (optional)
         """
         content = None
+        # byte offset of the latest run, reported by the log view on stderr
+        latest_offset = None
+        older_start = None
         try:
             # check file exists
             if file_path and not os.path.exists(file_path):
@@ -173,8 +199,13 @@ class LogViewer(QDialog):
             elif not file_path and view_cmd:
                 import subprocess
                 #content = subprocess.check_output([view_cmd], 
-                content = subprocess.check_output(view_cmd, 
-                                                  universal_newlines=True)
+                result = subprocess.run(view_cmd, stdout=subprocess.PIPE,
+                                        stderr=subprocess.PIPE, check=True)
+                output = result.stdout
+                stderr = result.stderr.decode("utf-8", errors="replace")
+                latest_offset = parse_offset_mark(stderr)
+                older_start = parse_first_run_mark(stderr)
+                content = output.decode("utf-8", errors="replace")
             elif file_path and not view_cmd:
                 # try to read the file directly
                 with open(file_path, 'r') as f:
@@ -185,6 +216,10 @@ class LogViewer(QDialog):
                 content = _("Log file is empty.")
             
             self.text_area.setPlainText(content)
+            if latest_offset is not None and 0 < latest_offset < len(output):
+                self.scroll_to_position(len(output[:latest_offset].decode("utf-8", errors="replace")))
+            # set after scrolling to the latest run, only the user scrolls to older ones
+            self.older_start = older_start
         except Exception as e:
             # show error in text area
             error_msg = f"Error loading file: {str(e)}"
@@ -192,6 +227,167 @@ class LogViewer(QDialog):
             # message box for the error - not used
             #QMessageBox.warning(self, "File Load Error", error_msg)
     
+    def scroll_to_position(self, position):
+        """
+        Show the text from position on at the top of the text area
+        """
+        cursor = self.text_area.textCursor()
+        # from the end, so the position ends up at the top
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        self.text_area.setTextCursor(cursor)
+        self.text_area.ensureCursorVisible()
+        cursor.setPosition(position)
+        self.text_area.setTextCursor(cursor)
+        self.text_area.ensureCursorVisible()
+
+    def scrolled(self, value):
+        if self.older_start and not self.loading_older \
+                and value == self.text_area.verticalScrollBar().minimum():
+            QTimer.singleShot(0, self.load_older)
+
+    def load_older(self):
+        """
+        Read the previous page of runs in the background
+        """
+        before = self.older_start
+        if not before or self.loading_older:
+            return
+        self.loading_older = True
+        self.older_process = QProcess(self)
+        self.older_process.finished.connect(self.older_finished)
+        self.older_process.errorOccurred.connect(self.older_error)
+        self.older_process.start(self.view_cmd[0], self.view_cmd[1:] + ["--before", before])
+
+    def older_finished(self, exit_code, exit_status):
+        """
+        Prepend the previous page of runs, keeping the visible text in place
+        """
+        process = self.older_process
+        content = bytes(process.readAllStandardOutput()).decode("utf-8", errors="replace")
+        stderr = bytes(process.readAllStandardError()).decode("utf-8", errors="replace")
+        if exit_status != QProcess.ExitStatus.NormalExit or exit_code != 0:
+            self.older_failed(stderr.strip() or f"exit code {exit_code}")
+            return
+        self.older_start = parse_first_run_mark(stderr)
+        if content:
+            self.prepend_text(content)
+        self.loading_older = False
+        process.deleteLater()
+
+    def older_error(self, error):
+        if error == QProcess.ProcessError.FailedToStart:
+            self.older_failed(self.older_process.errorString())
+
+    def older_failed(self, message):
+        # no further pages, the error on top of the runs shown
+        self.older_start = None
+        self.prepend_text(f"Error loading file: {message}\n\n")
+        self.loading_older = False
+        self.older_process.deleteLater()
+
+    def prepend_text(self, text):
+        scrollbar = self.text_area.verticalScrollBar()
+        value, maximum = scrollbar.value(), scrollbar.maximum()
+        cursor = QTextCursor(self.text_area.document())
+        cursor.movePosition(QTextCursor.MoveOperation.Start)
+        cursor.insertText(text)
+        scrollbar.setValue(value + scrollbar.maximum() - maximum)
+
+    def start_follow(self, file_path):
+        """
+        Show the end of the log and append lines as they are written,
+        also across logrotate
+        """
+        self.follow_path = os.path.abspath(file_path)
+        self.follow_file = None
+        self.follow_id = None
+        # incomplete last line
+        self.follow_rest = b""
+        # bounded buffer, oldest lines are dropped
+        self.text_area.setMaximumBlockCount(FOLLOW_MAX_LINES)
+        self.text_area.clear()
+
+        # the directory is watched for the log being created or rotated
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.addPath(os.path.dirname(self.follow_path))
+        self.watcher.fileChanged.connect(self.follow_read)
+        self.watcher.directoryChanged.connect(self.follow_read)
+
+        if self.follow_open(initial=True):
+            self.follow_read()
+
+    def follow_open(self, initial=False):
+        """
+        (Re)open the followed log, initially at its last lines
+        """
+        try:
+            f = open(self.follow_path, "rb")
+        except OSError as e:
+            self.text_area.setPlaceholderText(f"{self.follow_path}: {e.strerror}")
+            return False
+        st = os.fstat(f.fileno())
+        if initial and st.st_size > FOLLOW_INITIAL_BYTES:
+            f.seek(st.st_size - FOLLOW_INITIAL_BYTES)
+            # skip the partial line
+            f.readline()
+        if self.follow_file is not None:
+            self.follow_file.close()
+        self.follow_file = f
+        self.follow_id = (st.st_dev, st.st_ino)
+        self.follow_rest = b""
+        if self.follow_path not in self.watcher.files():
+            self.watcher.addPath(self.follow_path)
+        return True
+
+    def follow_read(self, *args):
+        """
+        Append what was written since the last read
+        """
+        if self.follow_file is None:
+            if not self.follow_open():
+                return
+        data = self.follow_file.read()
+        try:
+            st = os.stat(self.follow_path)
+        except OSError:
+            # rotated away and not yet created again
+            st = None
+
+        if st is not None and (st.st_dev, st.st_ino) != self.follow_id:
+            # rotated: the rest of the old log was read above
+            self.follow_append(data, flush=True)
+            if not self.follow_open():
+                return
+            data = self.follow_file.read()
+        elif st is not None and st.st_size < self.follow_file.tell():
+            # truncated, e.g. by logrotate copytruncate
+            self.follow_file.seek(0)
+            self.follow_rest = b""
+            data = self.follow_file.read()
+        self.follow_append(data)
+
+        # the watcher drops a log replaced by rename
+        if st is not None and self.follow_path not in self.watcher.files():
+            self.watcher.addPath(self.follow_path)
+
+    def follow_append(self, data, flush=False):
+        """
+        Append complete lines, keeping the view at the end if it was there
+        """
+        data = self.follow_rest + data
+        end = len(data) if flush else data.rfind(b"\n") + 1
+        self.follow_rest = data[end:]
+        if not end:
+            return
+        text = data[:end].decode("utf-8", errors="replace")
+        if text.endswith("\n"):
+            text = text[:-1]
+        scrollbar = self.text_area.verticalScrollBar()
+        at_end = scrollbar.value() == scrollbar.maximum()
+        self.text_area.appendPlainText(text)
+        if at_end:
+            scrollbar.setValue(scrollbar.maximum())
+
     #def resize_and_center(self, default_width, default_height):
     def resize_and_center(self):
         """
@@ -265,6 +461,11 @@ class LogViewer(QDialog):
     def done(self, result):
         # Save geometry when dialog is closed
         self.save_dialog_geometry()
+        # stop following the log
+        if getattr(self, "follow_file", None) is not None:
+            self.watcher.removePaths(self.watcher.files() + self.watcher.directories())
+            self.follow_file.close()
+            self.follow_file = None
         super().done(result)
     
     def save_dialog_geometry(self):
@@ -358,8 +559,20 @@ def get_standard_button_text(button):
     return text
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="MX Updater Log Viewer")
+    parser.add_argument("file", nargs="?", default=None,
+                        help="log file to show instead of the auto-update logs")
+    parser.add_argument("-f", "--follow", action="store_true",
+                        help="append lines as they are written to the log file")
+    # leave Qt options to QApplication
+    args, _ = parser.parse_known_args()
+    return args
+
+
 def main():
 
+    args = parse_args()
     window_class='mx-updater'
 
     app = QApplication(sys.argv)
@@ -383,14 +596,26 @@ def main():
         pass
 
 
-    if "dpkg_log" in os.path.basename(os.path.abspath(__file__)):
+    file_path = None
+    if args.file:
+
+        # a readable log, e.g. /var/log/mx-updater-monitor.log
+        default_width  = 900
+        default_height = 600
+        window_title = os.path.basename(args.file)
+        file_path = args.file
+        view_cmd = None
+
+    elif "dpkg_log" in os.path.basename(os.path.abspath(__file__)):
 
         default_width  = 800
         default_height = 500
         window_title=_('Auto-update dpkg log(s)')
+        # latest runs first, older ones paged in on scrolling up
         view_cmd = [
             '/usr/bin/pkexec',
-            '/usr/libexec/mx-updater/updater_auto_upgrades_dpkg_log_view'
+            '/usr/libexec/mx-updater/updater_auto_upgrades_dpkg_log_view',
+            '--runs', str(DPKG_LOG_PAGE_RUNS)
             ]
 
     else:
@@ -406,7 +631,9 @@ def main():
     window_title= f"[ MX Updater ]  --  {window_title}"
     
     viewer = LogViewer(
+        file_path=file_path,
         view_cmd=view_cmd,
+        follow=args.follow and bool(file_path),
         icon_path='/usr/share/icons/hicolor/scalable/mx-updater.svg',
         window_class=window_class,
         window_title=window_title,
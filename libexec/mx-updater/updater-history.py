@@ -2,8 +2,7 @@
 
 import sys
 import os
-import subprocess
-import re
+import argparse
 import gettext
 
 
@@ -23,6 +22,8 @@ if MX_UPDATER_PATH not in sys.path:
 
 
 from updater_translator import Translator
+from updater_apt_history import HistoryQuery, iter_newest_first, load_history_transactions
+from updater_history_model import HistoryTableModel, TransactionTreeModel
 
 # localization
 translator = Translator(textdomain='mx-updater')
@@ -40,14 +41,15 @@ _ = gettext.gettext
 """
 
 from PyQt6.QtWidgets import (
-    QApplication, QDialog, QVBoxLayout, QPlainTextEdit, QPushButton, 
-    QHBoxLayout, QLineEdit, QStyle, QMessageBox
+    QApplication, QDialog, QVBoxLayout, QTableView, QPushButton, 
+    QHBoxLayout, QLineEdit, QStyle, QMessageBox, QAbstractItemView,
+    QHeaderView, QLabel, QTabWidget, QTreeView
 )
 from PyQt6.QtGui import QFont, QIcon, QPixmap, QKeyEvent, QGuiApplication, QPalette, QAction, QColor
 
 from PyQt6.QtCore import QTranslator, QLocale, QLibraryInfo, QSettings
 
-from PyQt6.QtCore import Qt, QPoint, QSize
+from PyQt6.QtCore import Qt, QPoint, QSize, QTimer
 from PyQt6.QtCore import QSettings
 
 
@@ -98,8 +100,12 @@ class FilterWithAction(QLineEdit):
         # adjust padding 
         self.setTextMargins(0, 0, 4, 0)
 
+# milliseconds after the last keystroke before filtering
+FILTER_DELAY_MS = 150
+
+
 class LogDialog(QDialog):
-    def __init__(self, log_text, default_width=960, default_height=600):
+    def __init__(self, records, message="", transactions=(), default_width=960, default_height=600):
         super().__init__()
 
         self.default_width  = default_width
@@ -124,33 +130,87 @@ class LogDialog(QDialog):
         self.move((x - self.width()) // 2, (y - self.height()) // 2)
         self.setMinimumSize(600, 400)  # Optional: Set minimum size
        
-        # original log text
-        self.original_log_text = log_text
-
         # layout
         layout = QVBoxLayout(self)
 
 
-        # QPlainTextEdit for displaying log text
-        self.log_text_edit = QPlainTextEdit(self)
-        self.log_text_edit.setPlainText(self.original_log_text) 
-        self.log_text_edit.setReadOnly(True)  # read-only
+        # history records with a precomputed filter index
+        headers = {
+            "date":    _("Date"),
+            "time":    _("Time"),
+            "action":  _("Action"),
+            "package": _("Package"),
+            "arch":    _("Architecture"),
+            "old":     _("Old Version"),
+            "new":     _("New Version"),
+        }
+        self.log_model = HistoryTableModel(records, headers, self)
+
+        # table view lays out the visible rows only
+        self.log_view = QTableView(self)
+        self.log_view.setModel(self.log_model)
+        self.log_view.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.log_view.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.log_view.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.log_view.setShowGrid(False)
+        self.log_view.setWordWrap(False)
 
         # monospace font
         log_text_font = "Courier New"
         #log_text_font = "Liberation Mono Regular"
         #log_text_font = "Monospace"
-        self.log_text_edit.setFont(QFont(log_text_font, 11))
-        # disable line wrapping
-        self.log_text_edit.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
-
-        # pixels for one space
-        space_width = self.log_text_edit.fontMetrics().horizontalAdvance(' ')
-        # for 4‐space tabs:
-        self.log_text_edit.setTabStopDistance(space_width * 4)
+        self.log_view.setFont(QFont(log_text_font, 11))
+
+        # fixed row height and column widths from the longest values,
+        # no measuring of every cell
+        metrics = self.log_view.fontMetrics()
+        vertical_header = self.log_view.verticalHeader()
+        vertical_header.setVisible(False)
+        vertical_header.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        vertical_header.setDefaultSectionSize(metrics.height() + 4)
+        horizontal_header = self.log_view.horizontalHeader()
+        horizontal_header.setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+        horizontal_header.setStretchLastSection(True)
+        char_width = metrics.horizontalAdvance("0")
+        for column, width in enumerate(self.log_model.column_widths()):
+            title = headers[HistoryTableModel.COLUMNS[column]]
+            width = max(width * char_width, metrics.horizontalAdvance(title))
+            self.log_view.setColumnWidth(column, width + 2 * char_width)
+
+        # apt transactions, dpkg records fetched on expanding a row
+        self.transaction_view = None
+        if transactions:
+            transaction_headers = {
+                "date":         _("Date"),
+                "command":      _("Command"),
+                "requested_by": _("Requested by"),
+                "changes":      _("Changes"),
+            }
+            self.transaction_model = TransactionTreeModel(transactions, transaction_headers, self)
+            self.transaction_view = QTreeView(self)
+            self.transaction_view.setModel(self.transaction_model)
+            self.transaction_view.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+            self.transaction_view.setUniformRowHeights(True)
+            self.transaction_view.setWordWrap(False)
+            self.transaction_view.setFont(QFont(log_text_font, 11))
+            self.transaction_view.setColumnWidth(0, 21 * char_width)
+            self.transaction_view.setColumnWidth(1, 48 * char_width)
+            self.transaction_view.setColumnWidth(2, 24 * char_width)
+
+            # "table view" and "tree view" as tabs
+            self.tabs = QTabWidget(self)
+            self.tabs.addTab(self.log_view, _("Packages"))
+            self.tabs.addTab(self.transaction_view, _("Transactions"))
+            self.tabs.currentChanged.connect(self.tab_changed)
+            layout.addWidget(self.tabs)
+        else:
+            # "table view" to the layout
+            layout.addWidget(self.log_view)
 
-        # "text edit" to the layout
-        layout.addWidget(self.log_text_edit)
+        # no records or an error
+        if message:
+            self.message_label = QLabel(message, self)
+            layout.addWidget(self.message_label)
 
         #--------------------------------------------------------------
         # horizontal layout for buttons and search field
@@ -167,8 +227,12 @@ class LogDialog(QDialog):
         self.search_field.setPlaceholderText(f"{placeholder_text}...")
         # fixed width for search field
         self.search_field.setFixedWidth(200)
-        # connect to filter function
-        self.search_field.textChanged.connect(self.filter_log_text) 
+        # filter once typing pauses
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(FILTER_DELAY_MS)
+        self.filter_timer.timeout.connect(self.filter_log_text)
+        self.search_field.textChanged.connect(self.filter_timer.start)
 
         """
         # clear button
@@ -237,27 +301,25 @@ class LogDialog(QDialog):
         self.move(x, y)
 
 
+    def tab_changed(self, index):
+        # filter and copy work on the package table only
+        packages = self.tabs.widget(index) is self.log_view
+        self.search_field.setEnabled(packages)
+        self.copy_button.setEnabled(packages)
+
     def filter_log_text(self):
-        search_text = self.search_field.text().lower()  # get search text
-
-        # filter log text based on original log text
-        if search_text:
-            filtered_lines = []
-            for line in self.original_log_text.splitlines():  # use original log text for filtering
-                if search_text in line.lower():  # case insensitive search
-                    filtered_lines.append(line)
-            self.log_text_edit.setPlainText("\n".join(filtered_lines))  # update text edit with filtered lines
-        else:
-            self.log_text_edit.setPlainText(self.original_log_text)  # reset to original text if search field is empty
+        # case insensitive search, narrowed from the previous result if possible
+        self.filter_timer.stop()
+        self.log_model.set_filter(self.search_field.text())
 
     def clear_search(self):
         self.search_field.clear()  # Clear the search field
-        self.log_text_edit.setPlainText(self.original_log_text)  # Reset to original text
+        self.filter_log_text()
 
     def copy_to_clipboard(self):
-        # copy text to the clipboard
+        # copy the filtered lines to the clipboard
         clipboard = QApplication.clipboard()
-        clipboard.setText(self.log_text_edit.toPlainText())
+        clipboard.setText(self.log_model.visible_text())
 
     def close_and_exit(self):
 
@@ -411,53 +473,33 @@ class LogDialog(QDialog):
 
 
 
-def get_apt_history():
+def get_apt_history(limit=None, since=None, package=None, until=None, actions=None):
+    """
+    History records newest first, apt transactions newest first
+    and a message if there are no records
+
+    Transactions are only loaded for the unfiltered history.
+    """
+    transactions = []
     try:
-        # Run apt-history command and capture the output
-        command = [ "/usr/bin/apt-history" ]
-        result = subprocess.run(
-            command, 
-            shell=False,  # Use shell=True to execute the command as a single string
-            stdout=subprocess.PIPE, 
-            stderr=subprocess.PIPE, 
-            text=True
-        )
+        if package or until or actions:
+            # indexed query, newest first
+            records = list(HistoryQuery.load().select(
+                package=package, actions=actions, since=since, until=until, limit=limit))
+        elif limit or since:
+            # streamed newest first, stops at limit or since
+            records = list(iter_newest_first(since=since, limit=limit))
+        else:
+            # dpkg.log records and apt transactions from the history index
+            records, transactions = load_history_transactions()
+            records = records[::-1]
 
-        # Process the output using Python
-        if result.stdout.strip():
-            # Replace the sed command with Python code
-            processed_lines = []
-            for line in result.stdout.splitlines():
-                # Use regex to replace ":<lowercase letter>" with " <lowercase letter>"
-                processed_line = re.sub(r':([a-z])', r' \1', line)
-                processed_lines.append(processed_line)
-
-            # Create a list of lists for column data
-            column_data = [line.split() for line in processed_lines]
-
-            # Calculate maximum width for each column
-            max_widths = []
-            for row in column_data:
-                for i, item in enumerate(row):
-                    if i >= len(max_widths):
-                        max_widths.append(len(item))
-                    else:
-                        max_widths[i] = max(max_widths[i], len(item))
-
-            # format output into columns
-            formatted_lines = []
-            for row in column_data:
-                formatted_line = ""
-                for i, item in enumerate(row):
-                    formatted_line += f"{item:<{max_widths[i]}}  "  # Align left with padding
-                formatted_lines.append(formatted_line.rstrip())
-
-            # Join formatted lines into a single string with newlines
-            return "\n".join(formatted_lines)
+        if records:
+            return records, transactions, ""
         else:
-            return "No apt-history data found!"
+            return [], transactions, "No apt-history data found!"
     except Exception as e:
-        return f"Error retrieving apt-history: {str(e)}"
+        return [], [], f"Error retrieving apt-history: {str(e)}"
 
 def get_standard_button_text(button):
     # temporary message box to access the button text
@@ -467,7 +509,26 @@ def get_standard_button_text(button):
     return text
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="MX Updater History")
+    parser.add_argument("-n", "--limit", type=int, default=None,
+                        help="show the latest LIMIT entries only")
+    parser.add_argument("-s", "--since", default=None,
+                        help="show entries since 'YYYY-MM-DD[ HH:MM:SS]' only")
+    parser.add_argument("-u", "--until", default=None,
+                        help="show entries until 'YYYY-MM-DD[ HH:MM:SS]' only")
+    parser.add_argument("-p", "--package", default=None,
+                        help="show packages matching this glob only")
+    parser.add_argument("-a", "--action", action="append", default=None,
+                        choices=("install", "upgrade", "remove", "purge"),
+                        help="show this action only, may be repeated")
+    # leave Qt options to QApplication
+    args, _ = parser.parse_known_args()
+    return args
+
+
 if __name__ == '__main__':
+    args = parse_args()
     app = QApplication(sys.argv)
     app.setApplicationName("mx-updater")
 
@@ -491,13 +552,14 @@ if __name__ == '__main__':
     CLOSE_TEXT = "&Close"
     CLOSE_TEXT = get_standard_button_text(QMessageBox.StandardButton.Close)
 
-    # get apt-history log text
-    log_text = get_apt_history()
+    # get apt-history records
+    records, transactions, message = get_apt_history(limit=args.limit, since=args.since, package=args.package,
+                               until=args.until, actions=args.action)
 
     default_width  = 900
     default_height = 600
 
-    dialog = LogDialog(log_text,
+    dialog = LogDialog(records, message, transactions,
             default_width=default_width,
             default_height=default_height
             )
@@ -5,7 +5,6 @@ import os
 import sys
 import time
 import subprocess
-from PyQt6.QtCore import QSettings
 import logging
 import argparse
 
@@ -46,6 +45,14 @@ parser.add_argument("-q", "--quit",
                     help="Quit MX Updater systray icon.",
                     action="store_true")
 
+parser.add_argument("--watch",
+                    help="Wait without systray icon and start it when upgrades are available.",
+                    action="store_true")
+
+parser.add_argument("--handoff",
+                    help=argparse.SUPPRESS,
+                    action="store_true")
+
 parser.add_argument("-w", "--wait", type=int,
                     help='Startup delay in seconds when using --autostart (default: 5)')
 
@@ -119,11 +126,17 @@ dbus_quit_cmd = ['dbus-send',
                 'org.mxlinux.UpdaterSystemTrayIcon.Quit'
                 ]
 
+# same Quit signal to a waiting watcher
+dbus_quit_watcher_cmd = [arg.replace('--dest=org.mxlinux.UpdaterSystemTrayIcon',
+                                     '--dest=org.mxlinux.UpdaterWatcher')
+                         for arg in dbus_quit_cmd]
+
 ret=0
 if args.quit:
     logger.info("Try to quit MX Updater systray icon:")
     logger.info(" ".join(dbus_quit_cmd[-2:]))
     ret = subprocess.run(dbus_quit_cmd).returncode
+    subprocess.run(dbus_quit_watcher_cmd, stderr=subprocess.DEVNULL)
     logger.info("Dbus signal send to quit MX Updater systray icon" )
     sys.exit(ret)
 
@@ -131,14 +144,35 @@ if args.restart:
     logger.info("Try to restart MX Updater systray icon:")
     logger.info(" ".join(dbus_quit_cmd[-2:]))
     ret = subprocess.run(dbus_quit_cmd).returncode
+    subprocess.run(dbus_quit_watcher_cmd, stderr=subprocess.DEVNULL)
     logger.info("Dbus signal send to quit MX Updater systray icon" )
 
+#----------
+# Watcher
+#----------
+
+# started systray icon keeps the hidden state, '--autostart' would
+# exit at once with 'start at login' disabled
+watch_launch_args = launch_args + ['--keep-hidden']
+if args.debug:
+    watch_launch_args += ['--debug']
+
+if args.watch:
+    # no Qt in the watcher process
+    from updater_watcher import run_watcher
+    watcher_logger = logging.getLogger("updater_watcher")
+    watcher_logger.setLevel(logger.level)
+    watcher_logger.addHandler(log_handler)
+    logger.info("MX Updater watcher start:")
+    sys.exit(run_watcher(watch_launch_args, handoff=args.handoff))
+
 
 #----------
 # Check autostart is enabled
 #----------
 
 # retrieve startup delay and validate
+from PyQt6.QtCore import QSettings
 settings = QSettings('MX-Linux', 'mx-updater')
 try:
     saved_delay = settings.value('Settings/start_at_login_delay', type=int)
@@ -179,6 +213,12 @@ if args.autostart:
         logger.info(f"MX Updater autostart is waiting {delay} seconds before starting")
         time.sleep(delay)
 
+    # hidden systray icon set to exit while hidden: start the watcher instead
+    from updater_watcher import watcher_enabled
+    if watcher_enabled():
+        logger.info("MX Updater systray icon is hidden, start watcher")
+        launch_args = ["/usr/bin/python3", os.path.abspath(__file__), "--watch"]
+
 
 #----------
 # startup
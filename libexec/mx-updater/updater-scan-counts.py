@@ -0,0 +1,146 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Print the upgrade counts of the system monitor's post-update scan
+
+Used by updater_count --since=EPOCH after 'apt update' of a reload:
+the APT hook has already asked the system monitor to scan, so wait
+for that scan instead of resolving the upgrade once more. A scan is
+requested with Refresh if none has started since EPOCH.
+
+Prints the apt summary line, e.g.
+  3 upgraded, 1 newly installed, 0 to remove and 0 not upgraded.
+and exits 1 without output if no fresh result arrives in time.
+"""
+
+import sys
+import os
+
+# remove the directory of the current script
+if '' in sys.path:
+    sys.path.remove('')
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+if script_dir in sys.path:
+    sys.path.remove(script_dir)
+
+MX_UPDATER_PATH = "/usr/libexec/mx-updater"
+
+if MX_UPDATER_PATH not in sys.path:
+    sys.path.insert(0, MX_UPDATER_PATH)
+
+import argparse
+import gettext
+import logging
+import time
+
+from updater_list_cache import load_scan_result, releases_checksum
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_SERVICE_NAME = "org.mxlinux.UpdaterSystemMonitor"
+SYSTEM_OBJECT_PATH  = "/org/mxlinux/UpdaterSystemMonitor"
+SYSTEM_INTERFACE    = "org.mxlinux.UpdaterSystemMonitor"
+
+# seconds to wait for the scan, it may wait for apt locks itself
+DEFAULT_TIMEOUT = 60
+POLL_INTERVAL = 0.25
+# seconds between Refresh requests while no fresh scan has started
+REFRESH_INTERVAL = 5
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="MX Updater scan counts")
+    p.add_argument("upgrade_type", nargs="?", default="full-upgrade",
+                   choices=("full-upgrade", "dist-upgrade", "upgrade"),
+                   help="upgrade type of the counts")
+    p.add_argument("--since", type=float, required=True,
+                   help="only accept a scan started at or after this epoch time")
+    p.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT,
+                   help="seconds to wait for the scan")
+    p.add_argument("--debug", action="store_true",
+                   help="enable DEBUG logging")
+    return p.parse_args()
+
+
+def request_scan() -> bool:
+    """
+    Ask the system monitor to scan, ignored by the monitor
+    if a scan is already running
+    """
+    try:
+        import dbus
+        bus = dbus.SystemBus()
+        proxy = bus.get_object(SYSTEM_SERVICE_NAME, SYSTEM_OBJECT_PATH)
+        dbus.Interface(proxy, SYSTEM_INTERFACE).Refresh(timeout=10)
+        return True
+    except Exception as e:
+        logger.debug("[request_scan] Refresh failed: %r", e)
+        return False
+
+
+def fresh_counts(since: float, upgrade_type: str, checksum: str):
+    """
+    Counts of a finished scan started after 'since' on the current
+    package lists, None if there is none yet
+    """
+    data = load_scan_result()
+    if not data:
+        return None
+    started = data.get("scan-started") or 0
+    if started < since or data.get("checksum-of-releases") != checksum:
+        return None
+    counts = data.get("upgrades-available", {}).get(upgrade_type)
+    if not isinstance(counts, list) or len(counts) != 4 \
+            or not all(isinstance(x, int) for x in counts):
+        return None
+    return counts
+
+
+def summary_line(counts) -> str:
+    """
+    apt's summary line, translated with the apt text domain
+    """
+    upgraded, newly_installed, to_remove, not_upgraded = counts
+    try:
+        return (gettext.dgettext("apt", "%lu upgraded, %lu newly installed, ")
+                % (upgraded, newly_installed)
+                + gettext.dgettext("apt", "%lu to remove and %lu not upgraded.\n")
+                % (to_remove, not_upgraded)).strip()
+    except (TypeError, ValueError):
+        return (f"{upgraded} upgraded, {newly_installed} newly installed, "
+                f"{to_remove} to remove and {not_upgraded} not upgraded.")
+
+
+def main() -> int:
+    args = parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.debug else logging.WARNING,
+                        format="%(levelname)s %(message)s")
+    me = "main"
+    upgrade_type = "basic-upgrade" if args.upgrade_type == "upgrade" else "full-upgrade"
+
+    checksum = releases_checksum()
+    deadline = time.monotonic() + args.timeout
+    # the scan requested by the APT hook is usually running already
+    next_refresh = time.monotonic() + POLL_INTERVAL * 4
+    while True:
+        counts = fresh_counts(args.since, upgrade_type, checksum)
+        if counts is not None:
+            logger.debug("[%s] %s counts of the monitor scan: %s", me, upgrade_type, counts)
+            print(summary_line(counts))
+            return 0
+
+        now = time.monotonic()
+        if now >= deadline:
+            logger.debug("[%s] no fresh scan within %s seconds", me, args.timeout)
+            return 1
+        if now >= next_refresh:
+            if not request_scan():
+                # monitor not available, no point in waiting
+                return 1
+            next_refresh = now + REFRESH_INTERVAL
+        time.sleep(POLL_INTERVAL)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,7 +5,6 @@ import re
 import subprocess
 import sys
 from pprint import pprint
-import dbus
 from PyQt6.QtCore import QObject, pyqtSignal
 import logging
 
@@ -44,6 +43,8 @@ if MX_UPDATER_PATH not in sys.path:
 import updater_config
 from updater_config import UpdaterSettingsManager
 from updater_translator import Translator
+from updater_desktop import is_plasma
+from updater_dbus import session_client, TRAYICON, VIEW_AND_UPGRADE
 
 # suppress some warnings
 os.environ["QT_LOGGING_RULES"] = "*.debug=false;*.warning=false"
@@ -64,7 +65,7 @@ from PyQt6.QtWidgets import (
     QMessageBox, QSpinBox, QToolTip
 )
 from PyQt6.QtGui import QPixmap, QIcon, QKeyEvent, QGuiApplication, QFont, QPalette
-from PyQt6.QtCore import Qt, QSettings
+from PyQt6.QtCore import Qt, QSettings, QTimer
 from PyQt6.QtCore import QTranslator, QLocale, QLibraryInfo
 
 from PyQt6.QtGui import (
@@ -172,13 +173,20 @@ class SettingsEditorDialog(QDialog):
         self.bus.publish(SETTINGS_OBJECT_NAME, self.service)
         self.dbus_call_back = True
 
+        # changes made within one event loop run are sent with one SetValues
+        self._pending_dbus_values = {}
+        self._dbus_flush_timer = QTimer(self)
+        self._dbus_flush_timer.setSingleShot(True)
+        self._dbus_flush_timer.setInterval(0)
+        self._dbus_flush_timer.timeout.connect(self._flush_dbus_values)
+
         self._init_done = False
 
         self._auto_upgrade_state_is_updating = False
 
-        self.is_detect_plasma = self.detect_plasma()
+        self.is_detect_plasma = is_plasma()
         self.disable_hide_until = (self.is_detect_plasma,)
-        #self.is_detect_fluxbox = self.detect_fluxbox()
+        #self.is_detect_fluxbox = is_fluxbox()
         #self.disable_hide_until = (self.is_detect_fluxbox, self.is_detect_plasma)
 
         # Connect to the service's Qt signal (avoids DBus loopback)
@@ -244,6 +252,7 @@ class SettingsEditorDialog(QDialog):
 
         bool_keys = (
             'auto_close',
+            'exit_while_hidden',
             'hide_until_upgrades_available',
             'start_at_login',
             'use_dbus_notifications',
@@ -295,6 +304,10 @@ class SettingsEditorDialog(QDialog):
                 self.settings['hide_until_upgrades_available'] = new_value
                 self.hide_until_upgrades_available_checkbox.setChecked(new_value)
 
+            case 'exit_while_hidden':
+                self.settings[key] = new_value
+                self.exit_while_hidden_checkbox.setChecked(new_value)
+
             case 'use_dbus_notifications':
                 self.settings[key] = new_value
                 self.use_dbus_notifications_checkbox.setChecked(new_value)
@@ -853,6 +866,25 @@ Untick this box or run "MX Updater" from the menu to make the icon visible again
         if self.settings.get("hide_until_upgrades_available"):
             self.hide_until_upgrades_available_checkbox.setChecked(True)
 
+        #---------------------------------------------------------------
+        # exit_while_hidden_checkbox
+        self.exit_while_hidden_checkbox = QCheckBox(_("exit while hidden"))
+        self.exit_while_hidden_checkbox.setToolTip(
+        _("""Close the hidden system update icon while no updates are available.
+A small watcher starts the icon again as soon as updates are available."""))
+
+        # set inital state, only used with the icon hidden until updates are available
+        self.exit_while_hidden_checkbox.setChecked(bool(self.settings.get("exit_while_hidden")))
+        self.exit_while_hidden_checkbox.setEnabled(
+            self.hide_until_upgrades_available_checkbox.isChecked())
+
+        # set connection
+        self.exit_while_hidden_checkbox.toggled.connect(
+            lambda checked:
+            self.on_exit_while_hidden_checkbox_toggled(checked))
+        self.hide_until_upgrades_available_checkbox.toggled.connect(
+            self.exit_while_hidden_checkbox.setEnabled)
+
         #---------------------------------------------------------------
         other_options_layout.addWidget(self.upgrade_assume_yes_checkbox)
         #other_options_layout.addWidget(self.auto_close_checkbox)
@@ -861,6 +893,7 @@ Untick this box or run "MX Updater" from the menu to make the icon visible again
         other_options_layout.addLayout(start_8_login_layout)
         if not any(self.disable_hide_until):
             other_options_layout.addWidget(self.hide_until_upgrades_available_checkbox)
+            other_options_layout.addWidget(self.exit_while_hidden_checkbox)
 
         other_options_frame.setLayout(other_options_layout)
         layout.addWidget(other_options_frame)
@@ -996,29 +1029,22 @@ Untick this box or run "MX Updater" from the menu to make the icon visible again
             return
 
         logger.debug("[%s] Try to update systray icon via dbus with: %s=%s", me, key, value)
-        try:
-            # Connect to the session bus
-            bus = dbus.SessionBus()
-
-            try:
-                # dbus proxy object
-                proxy = bus.get_object(TRAYICON_OBJECT_NAME, TRAYICON_OBJECT_PATH)
 
-                # dbus interface
-                interface = dbus.Interface(proxy, TRAYICON_OBJECT_IFACE)
+        # method call to update systray icon settings with  key/value
+        self._queue_dbus_value(TRAYICON, key, value)
 
-                # method call to update systray icon settings with  key/value
-                interface.SetValue(str(key), str(value))
+    def _queue_dbus_value(self, service, key, value):
+        self._pending_dbus_values.setdefault(service, {})[str(key)] = str(value)
+        self._dbus_flush_timer.start()
 
-            except dbus.exceptions.DBusException as e:
-                # handle systray icon is not running
-                #print(f"Systray icon not running: {e}")
-                logger.debug("[%s] Systray icon not running or dbus error.", me)
-                pass
-
-        except Exception as e:
-            #print(f"Unexpected D-Bus error: {e}")
-            logger.debug("[%s] Unexpected D-Bus error: %s", me. e)
+    def _flush_dbus_values(self):
+        me = "_flush_dbus_values"
+        pending = self._pending_dbus_values
+        self._pending_dbus_values = {}
+        for service, values in pending.items():
+            logger.debug("[%s] SetValues on %s: %s", me, service[0], values)
+            if not session_client().set_values(service, values):
+                logger.debug("[%s] %s not running or dbus error.", me, service[0])
 
 
     #---------------------------------------------------------------
@@ -1078,30 +1104,8 @@ Untick this box or run "MX Updater" from the menu to make the icon visible again
                     value,
                     )
 
-        try:
-            # Connect to the session bus
-            bus = dbus.SessionBus()
-
-            try:
-                # dbus proxy object
-                proxy = bus.get_object(
-                        VIEW_AND_UPGRADE_OBJECT_NAME,
-                        VIEW_AND_UPGRADE_OBJECT_PATH
-                    )
-
-                # dbus interface
-                interface = dbus.Interface(proxy, VIEW_AND_UPGRADE_OBJECT_IFACE)
-
-                # method call to update settings with key/value
-                interface.SetValue(str(key), str(value))
-
-            except dbus.exceptions.DBusException as service_error:
-                logger.debug("[%s] view_and_upgrade dialog does not appear to be active.", me)
-                pass
-
-        except Exception as e:
-            logger.error("[%s] Unexpected D-Bus error: %r", me, e)
-            pass
+        # method call to update settings with key/value
+        self._queue_dbus_value(VIEW_AND_UPGRADE, key, value)
 
     #---------------------------------------------------------------
     def on_use_nala_checkbox_toggled(self, checked):
@@ -1313,6 +1317,14 @@ Untick this box or run "MX Updater" from the menu to make the icon visible again
         print(f"toggled hide_until_upgrades_available: {checked}")
         self.update_systray_icon("hide_until_upgrades_available", checked)
 
+    def on_exit_while_hidden_checkbox_toggled(self, checked):
+        # save exit_while_hidden selection into settings dict
+        self.settings["exit_while_hidden"] = checked
+        self.qsettings.setValue("Settings/exit_while_hidden", checked)
+        self.qsettings.sync()
+        logger.debug("toggled exit_while_hidden: %s", checked)
+        self.update_systray_icon("exit_while_hidden", checked)
+
     def save_auto_close_timeout(self, value):
         # save auto_close_timeout value to settings
         self.settings["auto_close_timeout"] = value
@@ -1448,72 +1460,6 @@ Untick this box or run "MX Updater" from the menu to make the icon visible again
         print(f"Current SettingsEditorDialog Title: {title}")
 
 
-    def detect_plasma(self):
-        # kde/plasma detection
-        plasma_indicators = [
-            os.environ.get('DESKTOP_SESSION', '').lower() == 'plasma',
-            os.environ.get('XDG_CURRENT_DESKTOP', '').lower() == 'kde',
-            os.environ.get('KDE_FULL_SESSION', '').lower() == 'true'
-        ]
-
-        if any(plasma_indicators):
-            return any(plasma_indicators)
-
-        # additional with process check
-        try:
-            plasma_shell_process = subprocess.run(
-                ['pgrep', '-x', 'plasmashell'],
-                capture_output=True,
-                text=True
-            )
-            plasma_indicators.append(plasma_shell_process.returncode == 0)
-        except Exception:
-            try:
-                plasma_shell_process = subprocess.run(
-                    ['pidof', '-q', 'plasmashell'],
-                    capture_output=True,
-                    text=True
-                )
-                plasma_indicators.append(plasma_shell_process.returncode == 0)
-            except Exception:
-                pass
-
-        return any(plasma_indicators)
-
-
-    def detect_fluxbox(self):
-        # fluxbox detection
-        fluxbox_indicators = [
-            os.environ.get('DESKTOP_SESSION', '').lower() == 'fluxbox',
-            os.environ.get('XDG_SESSION_DESKTOP', '').lower() == 'fluxbox',
-            os.environ.get('GDMSESSION', '').lower() == 'fluxbox'
-        ]
-
-        if any(fluxbox_indicators):
-            return any(fluxbox_indicators)
-
-        # additional with process check
-        try:
-            fluxbox_process = subprocess.run(
-                ['pgrep', '-x', 'fluxbox'],
-                capture_output=True,
-                text=True
-            )
-            fluxbox_indicators.append(fluxbox_process.returncode == 0)
-        except Exception:
-            try:
-                fluxbox_process = subprocess.run(
-                    ['pidof', '-q', 'fluxbox'],
-                    capture_output=True,
-                    text=True
-                )
-                fluxbox_indicators.append(fluxbox_process.returncode == 0)
-            except Exception:
-                pass
-
-        return any(fluxbox_indicators)
-
-
 def is_dark_theme():
     return QApplication.palette().color(QPalette.ColorRole.Window).lightness() < 128
 
@@ -13,8 +13,6 @@ import contextlib
 import re
 import psutil
 import json
-import glob
-import hashlib
 import signal
 
 import threading
@@ -29,6 +27,9 @@ import logging
 from pathlib import Path
 from typing import Any, Dict, List, Set, Tuple, Optional
 from colorama import Fore, Style
+from updater_list_cache import releases_checksum, save_upgrade_lists
+from updater_prefetch import Prefetch, read_prefetch_config
+from updater_uu_logs import update_uu_runs
 from colorama import init as color_init
 color_init(autoreset=True)
 
@@ -92,6 +93,8 @@ def parse_args():
                    help="disable releases checksum validation ")
     p.add_argument("--no-color",   action="store_true",
                    help="disable ANSI-color logging")
+    p.add_argument("--prefetch-now",   action="store_true",
+                   help="download pending upgrades once and exit")
     return p.parse_args()
 
 def ensure_root():
@@ -202,7 +205,7 @@ class LockerChecker:
         return result
 
 
-    def which_running(self, exec_paths: List[str]) -> Tuple[bool, Set[str]]:
+    def which_running(self, exec_paths: List[str], ignore_pids: Set[int] = frozenset()) -> Tuple[bool, Set[str]]:
         """
         Scan /proc for running processes whose executable matches
         any in exec_paths.
@@ -210,14 +213,15 @@ class LockerChecker:
         Returns:
           (found_any: bool, running: set_of_matched_paths)
         
-        exec_paths should be absolute paths to the binaries.
+        exec_paths should be absolute paths to the binaries,
+        processes in ignore_pids are skipped.
         """
         # normalize to real (canonical) paths
         wanted: Set[str] = {os.path.realpath(p) for p in exec_paths}
         running: Set[str] = set()
     
         for entry in os.listdir('/proc'):
-            if not entry.isdigit():
+            if not entry.isdigit() or int(entry) in ignore_pids:
                 continue
             pid = entry
             exe_link = os.path.join('/proc', pid, 'exe')
@@ -240,17 +244,25 @@ class UpdaterSystemMonitor(dbus.service.Object):
     D-Bus service that provides a simple interface to get number of available updates.
     """
     def __init__(self, bus):
+        self._lock = threading.Lock()
+        self._prefetch = None
+        if bus is None:
+            # not exported, used by --prefetch-now only
+            super().__init__()
+            return
+
         bus_name = dbus.service.BusName(SYSTEM_SERVICE_NAME, bus=bus)
         super().__init__(bus_name, SYSTEM_OBJECT_PATH)
 
         self.loop = GLib.MainLoop()
-        self._lock = threading.Lock()
 
         self._full_upgrades_available = (0, 0, 0, 0)
         self._basic_upgrades_available = (0, 0, 0, 0)
         self._upgrades_available = { "full-upgrade": self._full_upgrades_available,
                                      "basic-upgrade": self._basic_upgrades_available,
                                     }
+        # 'apt-get -V' output per upgrade type of the last scan
+        self._upgrade_lists = {}
         """
         with self._lock:
 
@@ -266,6 +278,7 @@ class UpdaterSystemMonitor(dbus.service.Object):
         """
         
         self._check_in_progress = False
+        self._prefetch_in_progress = False
         self._idle_timeout = IDLE_TIMEOUT
         self.timer = None
         self.refresh_signal = None
@@ -333,7 +346,7 @@ class UpdaterSystemMonitor(dbus.service.Object):
 
     def reset_timer(self):
         with self._lock:
-            if self._check_in_progress:
+            if self._check_in_progress or self._prefetch_in_progress:
                 if self.timer:
                     logging.debug("Resetting the idle timer")
                     self.timer.cancel()
@@ -423,6 +436,26 @@ class UpdaterSystemMonitor(dbus.service.Object):
         # Launch the background thread
         self._spawn_scan()
 
+    @dbus.service.method(SYSTEM_INTERFACE, in_signature="", out_signature="b",
+                         async_callbacks=("reply_handler", "error_handler"))
+    def CancelPrefetch(self, reply_handler, error_handler):
+        """
+        Public D-Bus method.  Stops a running prefetch download and replies
+        when apt has released its locks. Replies True if one was stopped.
+        The wait runs in a thread, the main loop keeps serving D-Bus calls.
+        """
+        logging.info("Recieved a CancelPrefetch d-bus call")
+
+        def cancel():
+            try:
+                stopped = self.cancel_prefetch()
+            except Exception as e:
+                GLib.idle_add(error_handler, e)
+            else:
+                GLib.idle_add(reply_handler, stopped)
+
+        threading.Thread(target=cancel, daemon=True).start()
+
     @dbus.service.signal(SYSTEM_INTERFACE, signature="a{sau}")
     def UpgradesChanged(self, upgrades_available):
         logging.debug(f"Emit signal UpgradesChanged: {upgrades_available}")
@@ -449,17 +482,21 @@ class UpdaterSystemMonitor(dbus.service.Object):
         t.start()
 
 
-    def _run_check_for_updades(self):
+    def cancel_prefetch(self):
         """
-        Run Check for Updates. When done, clear the flag and
-        possibly emit UpgradesChanged.
+        Stop a running prefetch and wait until apt-get has exited.
+        Returns True if one was stopped.
         """
+        with self._lock:
+            prefetch = self._prefetch
+        if prefetch is None:
+            return False
+        return prefetch.cancel()
 
-        # stop idle timeout
-        self.cancel_timer()
-
-        locker = LockerChecker()
-
+    def wait_for_apt(self, locker):
+        """
+        Wait until apt is no longer locked and no blocking apps are running.
+        """
         apt_is_locked = locker.is_apt_locked()
         found_blocker, running_blocker = locker.which_running(RUNNING_BLOCKING_APPS)
         log_lock = True
@@ -487,8 +524,27 @@ class UpdaterSystemMonitor(dbus.service.Object):
 
 
         logging.debug("Apt is not locked. Blocking apps not running.")
+
+    def _run_check_for_updades(self):
+        """
+        Run Check for Updates. When done, clear the flag and
+        possibly emit UpgradesChanged.
+        """
+
+        # stop idle timeout
+        self.cancel_timer()
+
+        # a running prefetch holds the apt locks, the scan goes first
+        # and starts a new prefetch when done
+        if self.cancel_prefetch():
+            logging.info("Prefetch stopped for Check for Updates")
+
+        locker = LockerChecker()
+        self.wait_for_apt(locker)
+
         try:
             logging.debug("Starting Check for Updates")
+            scan_started = time.time()
             time.sleep(1)
             #-----------------
             # get upgrades available
@@ -583,6 +639,17 @@ class UpdaterSystemMonitor(dbus.service.Object):
             }
             if not new_checksum == old_checksum:
                 self.save_state(new_state)
+
+            # package lists of this scan for the View and Upgrade dialog
+            save_upgrade_lists(new_checksum, self._upgrade_lists,
+                               upgrades=new, started=scan_started)
+
+            # unattended-upgrades run records for the tray, the logs
+            # are only read from the last indexed offset on
+            try:
+                update_uu_runs()
+            except Exception as e:
+                logging.warning(f"Could not update the unattended-upgrades run index: {e}")
             
             # only update & signal if changed or refresh_signal received
             if new != old:
@@ -594,7 +661,10 @@ class UpdaterSystemMonitor(dbus.service.Object):
             else:
                 if self.refresh_signal:
                     self.UpgradesChanged(new)
-            
+
+            # opt-in download of the pending full-upgrade
+            if sum(full_new[0:2]) > 0:
+                self._spawn_prefetch()
  
         except Exception as e:
             logging.error(f"Somthing went wrong: {e}")
@@ -605,6 +675,51 @@ class UpdaterSystemMonitor(dbus.service.Object):
                 self.refresh_signal = False
             self.reset_timer()
 
+    def _spawn_prefetch(self):
+        """Helper: start the background thread for run_prefetch."""
+        with self._lock:
+            if self._prefetch_in_progress:
+                return
+            self._prefetch_in_progress = True
+        t = threading.Thread(target=self._run_prefetch, daemon=True)
+        t.start()
+
+    def _run_prefetch(self):
+        try:
+            self.run_prefetch()
+        except Exception as e:
+            logging.error(f"Prefetch went wrong: {e}")
+        finally:
+            with self._lock:
+                self._prefetch_in_progress = False
+                self._prefetch = None
+            self.reset_timer()
+
+    def run_prefetch(self, force=False):
+        """
+        Download the pending full-upgrade into the apt archive cache,
+        if enabled with MX-Updater::Prefetch (see updater_prefetch).
+        """
+        config = read_prefetch_config()
+        logging.debug(f"Prefetch config: {config!r}")
+        if not (config.enabled or force):
+            return None
+
+        locker = LockerChecker()
+        self.wait_for_apt(locker)
+
+        with self.apt_preferences() as prefs:
+            options = ['-o', f'Dir::Etc::preferences={prefs}'] if prefs else []
+            prefetch = Prefetch(config, options)
+            with self._lock:
+                self._prefetch = prefetch
+            logging.info("Starting prefetch of pending upgrades")
+            # stop as soon as a package manager other than our apt-get shows up
+            result = prefetch.run(
+                should_stop=lambda pid: locker.which_running(RUNNING_BLOCKING_APPS, {pid})[0])
+        logging.info(f"Prefetch result: {result}")
+        return result
+
     def _emit_signals(self):
         # Emit D-Bus signals
         self.FullUpgradesChanged(self._full_upgrades_available)
@@ -765,9 +880,10 @@ class UpdaterSystemMonitor(dbus.service.Object):
             '-o', 'quiet::NoStatistics=true',
             '-o', 'quiet::NoProgress=true',
             '-o', 'Debug::NoLocking=true',
-            '-o', 'Apt::Get::Show-Upgraded=false',
+            # package lists with versions, kept for the View and Upgrade dialog
+            '-o', 'Apt::Get::Show-Upgraded=true',
             '-o', 'APT::Get::Show-User-Simulation-Note=false',
-            '-o', 'APT::Get::Show-Versions=false',
+            '-o', 'APT::Get::Show-Versions=true',
             '-o', 'Apt::Get::Trivial-Only=true',
         ]
 
@@ -783,6 +899,7 @@ class UpdaterSystemMonitor(dbus.service.Object):
         command.append(upgrade_type)
         logging.debug(f"Command: {' '.join(command)}")
         result = subprocess.run(command, env={'LC_ALL': 'C'}, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True).stdout
+        self._upgrade_lists["basic-upgrade" if upgrade_type == "upgrade" else "full-upgrade"] = result or ""
     
         (upgraded, newly_installed, to_remove, not_upgraded) =  ("", "", "", "")
         nums = (upgraded, newly_installed, to_remove, not_upgraded)
@@ -910,52 +1027,12 @@ class UpdaterSystemMonitor(dbus.service.Object):
     # -- checksum 
     def generate_apt_releases_checksum(self):
         """
-        Replicates somthing like the shell one-liner:
-          sha256sum /dev/null /var/lib/apt/lists/*Release \
-          2>/dev/null \
-          | cut -d ' ' -f1 \
-          | sort -u \
-          | sha256sum - \
-          | cut -d ' ' -f1
-    
-        Returns:
-          A SHA256 hex-digest string of the sorted, unique list of per-file hashes.
+        SHA256 over the apt release, status and preference files,
+        shared with the cached upgrade lists.
         """
         logger.debug(" ... generate apt releases checksum")
-    
-        files = [
-            "/dev/null", 
-            "/etc/apt/preferences",
-            "/var/lib/dpkg/status",
-            "/var/lib/synaptic/preferences", 
-            *glob.glob("/var/lib/apt/lists/*Release"),   # '*' unpacks the glob list
-            *glob.glob("/etc/apt/preferences.d/*"),      # 
-            *glob.glob("/var/lib/synaptic/preferences")  # 
-        ]
-    
-        # generate sha256 hex digests for each file
-        digests = set()
-        for path in files:
-            try:
-                h = hashlib.sha256()
-                with open(path, "rb") as f:
-                    # read 8K chunks
-                    for chunk in iter(lambda: f.read(8192), b""):
-                        h.update(chunk)
-                digests.add(h.hexdigest())
-            except (OSError, IOError):
-                # ignore file vanished, permissions, etc. -- just skip it
-                continue
-    
-        # sort digests and join with '\n'
-        sorted_digests = sorted(digests)
-        joined = "\n".join(sorted_digests) + "\n"
-        joined_bytes = joined.encode("utf-8")
-    
-        # generate final sha256 hash
-        final_hash = hashlib.sha256(joined_bytes).hexdigest()
-        return final_hash
-    
+        return releases_checksum()
+
 
 
 def any_updater_systray_icons_running() -> bool:
@@ -1082,6 +1159,11 @@ if __name__ == "__main__":
     else:
         logger.debug("Initial state with releases checksum valdiation")
 
+    if args.prefetch_now:
+        # download once in the foreground, e.g. with APT_CONFIG of a test repository
+        result = UpdaterSystemMonitor(None).run_prefetch(force=True)
+        sys.exit(0 if result in (Prefetch.DONE, Prefetch.NOTHING) else 1)
+
     logger.info('>>> {0} Starting "{1}" {2} <<<'.format( '-' * 10, SYSTEM_SERVICE_NAME, '-' * 20,))
 
     #signal.signal(signal.SIGTERM, signal_handler)
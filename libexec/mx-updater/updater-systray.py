@@ -3,10 +3,13 @@
 
 import os
 import sys
+import time
 import glob
-import stat
 from pathlib import Path
 
+# start of startup profiling
+_STARTUP_T0 = time.perf_counter()
+
 BUILD_VERSION='@VERSION@'
 
 
@@ -39,8 +42,54 @@ parser.add_argument("-a", "--autostart",
                     help="Exit if MX Updater preference 'autostart' is disabled.",
                     action="store_true")
 
+parser.add_argument("--keep-hidden",
+                    help="Keep the 'hide until upgrades available' setting, used by the watcher.",
+                    action="store_true")
+
+parser.add_argument("--startup-profile",
+                    help="Print a time-to-icon breakdown of the startup.",
+                    action="store_true")
+
+parser.add_argument("--tracemalloc",
+                    help="Trace Python allocations for the D-Bus debug statistics.",
+                    action="store_true")
+
 args = parser.parse_args()
 
+if args.tracemalloc:
+    # start early to include the startup allocations
+    import tracemalloc
+    tracemalloc.start(25)
+
+
+class StartupProfile():
+    """
+    Collect startup milestones and print a time-to-icon breakdown.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._marks = []
+        self._reported = False
+
+    def mark(self, label):
+        if self.enabled:
+            self._marks.append((label, time.perf_counter()))
+
+    def report(self):
+        if not self.enabled or self._reported:
+            return
+        self._reported = True
+        lines = ["Startup profile [ms]:        step     total"]
+        prev = _STARTUP_T0
+        for label, t in self._marks:
+            lines.append(f"  {label:<24} {(t - prev) * 1000:8.1f}  {(t - _STARTUP_T0) * 1000:8.1f}")
+            prev = t
+        print("\n".join(lines), file=sys.stderr, flush=True)
+
+
+startup_profile = StartupProfile(args.startup_profile)
+
 #----------
 # Logger
 #----------
@@ -100,6 +149,13 @@ except KeyError:
 sys.path.insert(0, MX_UPDATER_PATH)
 
 from version.version import VersionMonitor
+from updater_config import UpdaterSettingsStore
+from updater_desktop import is_plasma, is_fluxbox
+from updater_dbus import session_client, SETTINGS, TRAYICON
+from updater_lock import acquire_runtime_lock, release_runtime_lock
+import updater_debug
+from updater_notify import NotificationManager
+from updater_uu_logs import format_uu_run, load_uu_runs
 
 
 #----------
@@ -112,20 +168,18 @@ import json
 import dbus
 import dbus.service
 import dbus.mainloop.glib
-from gi.repository import GLib
-import notify2
 from pathlib import Path
 import signal
 
 from PyQt6.QtWidgets import QApplication, QSystemTrayIcon, QMenu
 from PyQt6.QtGui import QIcon, QAction,  QCursor
-from PyQt6.QtCore import QObject, pyqtSignal
+from PyQt6.QtCore import QObject, pyqtSignal, QTimer
 from PyQt6.QtCore import QSettings
-from xdg.DesktopEntry import DesktopEntry
 
-from pprint import pprint
 from typing import Any, Dict, List, Set, Tuple, Optional
 
+startup_profile.mark("imports")
+
 #----------
 # Check autostart is enabled
 #----------
@@ -160,6 +214,13 @@ UPDATER_ACTION_RUN = "/usr/libexec/mx-updater/updater_action_run"
 STATE_DIR  = Path("/var/lib/mx-updater-monitor")
 STATE_FILE = STATE_DIR / "state.json"
 
+# delay in ms to coalesce bursts of upgrade signals and setting changes
+# into a single icon, tooltip, menu and notification update
+RENDER_DELAY_MS = 150
+
+# hidden without upgrades for this long before handing over to the watcher
+HANDOFF_DELAY_MS = 3000
+
 
 class L10N():
     """
@@ -194,13 +255,21 @@ class SystemTrayService(dbus.service.Object):
         # QObject wrapper for emitting Qt signals
         class _Emitter(QObject):
             value_changed_qt = pyqtSignal(str, str)
+            values_changed_qt = pyqtSignal(dict)
         self._emitter = _Emitter()
+        # object with debug_stats(), set to the systray icon
+        self.debug_provider = None
+        self._debug_snapshots = updater_debug.DebugSnapshots()
 
     # Expose the Qt signal for others to connect to
     @property
     def value_changed_qt(self):
         return self._emitter.value_changed_qt
 
+    @property
+    def values_changed_qt(self):
+        return self._emitter.values_changed_qt
+
     @dbus.service.method(TRAYICON_OBJECT_IFACE, in_signature='s', out_signature='s')
     def GetValue(self, key):
         # Read from QSettings; optional sync to pick up external changes
@@ -220,11 +289,58 @@ class SystemTrayService(dbus.service.Object):
         # emit dbus signal for external clients
         # self.ValueChanged(key, value)
 
+    @dbus.service.method(TRAYICON_OBJECT_IFACE, in_signature='a{ss}', out_signature='')
+    def SetValues(self, values):
+        """
+        Apply a set of key/value changes at once,
+        with a single re-render of the systray icon.
+        """
+        values = {str(key): str(value) for key, value in values.items() if key.strip()}
+        if not values:
+            return
+        # emit PyQt signal
+        self._emitter.values_changed_qt.emit(values)
+        # emit dbus signal for external clients
+        self.ValuesChanged(values)
+
+    def _debug_stats(self):
+        if self.debug_provider is not None:
+            return self.debug_provider.debug_stats()
+        return {"process": updater_debug.process_stats()}
+
+    @dbus.service.method(TRAYICON_OBJECT_IFACE, in_signature='', out_signature='s')
+    def GetDebugStats(self):
+        """
+        Memory, CPU, QObject, notification and signal handler statistics as JSON
+        """
+        return json.dumps(self._debug_stats(), indent=2)
+
+    @dbus.service.method(TRAYICON_OBJECT_IFACE, in_signature='s', out_signature='s')
+    def TakeDebugSnapshot(self, name):
+        """
+        Keep the current statistics under a name for DiffDebugSnapshots
+        """
+        name = str(name).strip() or time.strftime("%H:%M:%S")
+        result = self._debug_snapshots.take(name, self._debug_stats())
+        return json.dumps(result, indent=2)
+
+    @dbus.service.method(TRAYICON_OBJECT_IFACE, in_signature='ss', out_signature='s')
+    def DiffDebugSnapshots(self, old, new):
+        """
+        Changes between two named snapshots as JSON
+        """
+        return json.dumps(self._debug_snapshots.diff(str(old), str(new)), indent=2)
+
     @dbus.service.signal(TRAYICON_OBJECT_IFACE, signature="ss")
     def ValueChanged(self, key, value):
         """Signal emitted when the value changes."""
         pass
 
+    @dbus.service.signal(TRAYICON_OBJECT_IFACE, signature="a{ss}")
+    def ValuesChanged(self, values):
+        """Signal emitted when a set of values has changed."""
+        pass
+
     @dbus.service.signal(TRAYICON_OBJECT_IFACE, signature="sb")
     def ActionStatusChanged(self, tag, enabled):
         """
@@ -251,7 +367,9 @@ class SystemTrayIcon(QSystemTrayIcon):
     # PyQt signals
     basic_upgrades_changed_signal = pyqtSignal(object)
     full_upgrades_changed_signal = pyqtSignal(object)
+    upgrades_changed_signal = pyqtSignal(object)
     value_changed_signal = pyqtSignal(str, str)
+    values_changed_signal = pyqtSignal(dict)
     action_status_changed_signal = pyqtSignal(str, bool)
 
     entry_enabled_changed_signal = pyqtSignal(str, bool)
@@ -266,21 +384,18 @@ class SystemTrayIcon(QSystemTrayIcon):
         self.bus = session_bus
         self.system_bus = system_bus
         self.service = service
+        # cached proxies for the other updater components
+        self.dbus_client = session_client(session_bus)
 
         me = "__init__"
-        self.version_monitor = VersionMonitor('mx-updater')
-
-        self.running_version = self.version_monitor.running_version
-        self.initial_installed_version  = self.version_monitor.initial_installed_version
-
-        logger.info(f"[%s] Running version: %s", me, self.running_version)
-        logger.info(f"[%s] Initial installed version: %s", me, self.initial_installed_version )
+        # created in _deferred_init, runs dpkg-query
+        self.version_monitor = None
 
         self.initialized = False
         self._lock = threading.Lock()
 
-        self.is_detect_plasma = self.detect_plasma()
-        self.is_detect_fluxbox = self.detect_fluxbox()
+        self.is_detect_plasma = is_plasma()
+        self.is_detect_fluxbox = is_fluxbox()
         self.disable_hide_until = (self.is_detect_fluxbox, self.is_detect_plasma)
 
         # on startup, try to acquire a lock
@@ -301,6 +416,8 @@ class SystemTrayIcon(QSystemTrayIcon):
         # self.service.value_changed_qt.connect(self.on_value_changed)
 
         self.qsettings = QSettings("MX-Linux", "mx-updater")
+        # settings are read once, hot paths only use the in-memory store
+        self.settings_store = UpdaterSettingsStore()
 
         # initialize state and settings
         self._state = {
@@ -317,15 +434,35 @@ class SystemTrayIcon(QSystemTrayIcon):
 
         self._notified_upgrades = (0, 0, 0, 0)
 
+        # render scheduler: upgrade signals and setting changes only mark
+        # the state dirty, the render timer does one coalesced update
+        self._render_pending = False
+        self._pending_upgrades = {}
+        self._render_timer = QTimer(self)
+        self._render_timer.setSingleShot(True)
+        self._render_timer.setInterval(RENDER_DELAY_MS)
+        self._render_timer.timeout.connect(self._render)
+
+        # exit_while_hidden: handover to updater_watcher pending
+        self._handoff_pending = False
+
+        # memoized render: inputs key of the last render, applied outputs
+        self._render_key_last = None
+        self._shown_icon = None
+        self._shown_tooltip = None
+        self._icons = {}
+        # (apt config key, unattended upgrade enabled)
+        self._unattended_cache = None
+
         self.get_defaults()
         self.load_settings()
 
         self._settings = self.selected_settings
 
-        self._settings["upgrade_type"] =  self.qsettings.value("Settings/upgrade_type", "full-upgrade")
-        self._settings["icon_look"] =  self.qsettings.value("Settings/icon_look", "wireframe-dark")
-        self._settings["wireframe_transparent"] =  self.qsettings.value("Settings/wireframe_transparent", True)
-        self._settings["hide_until_upgrades_available"] =  self.qsettings.value("Settings/hide_until_upgrades_available", False)
+        self._settings["upgrade_type"] =  self.settings_store.get("upgrade_type", "full-upgrade")
+        self._settings["icon_look"] =  self.settings_store.get("icon_look", "wireframe-dark")
+        self._settings["wireframe_transparent"] =  self.settings_store.get("wireframe_transparent", True)
+        self._settings["hide_until_upgrades_available"] =  self.settings_store.get("hide_until_upgrades_available", False)
 
 
 
@@ -344,49 +481,27 @@ class SystemTrayIcon(QSystemTrayIcon):
 
         # Connect directly to the service's Qt signal (avoids DBus loopback)
         self.service.value_changed_qt.connect(self.on_value_changed)
+        self.service.values_changed_qt.connect(self.on_values_changed)
 
-
-        # try update state with retrieved available upgrades via D-Bus
-        logger.info("[%s] get_upgrades_available", me)
-        upgrades = self.get_upgrades_available()
-        logger.debug("D-Bus GetUpgradesAvailable: %s", upgrades)
-        logger.info("[%s]D-Bus GetUpgradesAvailable: %s",me, upgrades)
-
+        startup_profile.mark("cached state loaded")
 
         #---------------------------------------------------------------
-        # notification stuff
-        self.notification = None
+        # notification stuff, NotificationManager once notify2 is initialized
+        self.notifications = None
 
-        # init notify2 and capabilities
+        # notify2 is imported and initialized on first notification
         self._notify_init = None
         self._notify_caps = set()
-        try:
-            notify2.init(_("MX Updater"))
-            self._notify_init = True
-            self._notify_caps = notify2.get_server_caps() or set()
-        except Exception as e:
-            logger.info("Notification daemon not avialable: %r", e)
-
-        if self._notify_init:
-            self._notify_caps = notify2.get_server_caps() or set()
-            if "actions" not in self._notify_caps:
-                logger.info("Notification with 'actions' not avialable!")
         #---------------------------------------------------------------
 
         # Connections: PyQt signal to update_tray_icon method
-        #self.full_upgrades_changed_signal.connect(self.update_apt_icon_full)
+        self.full_upgrades_changed_signal.connect(self.update_apt_icon_full)
         self.basic_upgrades_changed_signal.connect(self.update_apt_icon_basic)
-
-        # register to upgrades_changes signal on system bus
-        self.register_signal_receiver()
-
-        # request refresh
-        # self.request_refresh()
-        logger.info("[%s] self.request_refresh()", me)
-        self.request_refresh()
+        self.upgrades_changed_signal.connect(self.update_apt_icon_all)
 
         # Connect the PyQt signal to the update_tray_icon method
         self.value_changed_signal.connect(self.update_tray_icon)
+        self.values_changed_signal.connect(self.update_tray_icon_values)
 
 
         # Subscribe to the D-bus signal (if you opted to emit one):
@@ -457,14 +572,16 @@ class SystemTrayIcon(QSystemTrayIcon):
         #self.set_icon_look()
         #hide_until_upgrades_available = self._settings.get("hide_until_upgrades_available", False)
         #self.setVisible(not hide_until_upgrades_available)
-        logger.info("[%s] Init UI self.initUI()", me)
-        self.initUI()
+        # show the icon from cached state first, the menu, the monitor
+        # queries and the version monitor follow with _deferred_init
         logger.info("[%s] self.set_icon_look()", me)
         self.set_icon_look()
 
         logger.info("[%s] set_tooltip() with _state:\n%s", me, self._state)
         self.set_tooltip()
 
+        QTimer.singleShot(0, self._deferred_init)
+
         #hide_until_upgrades_available = self._settings.get('hide_until_upgrades_available', False)
         #hide_until_upgrades_available = str(hide_until_upgrades_available).lower() in ('true')
         #logger.debug("[%s] hide_until_upgrades_available is %s", me, hide_until_upgrades_available)
@@ -481,10 +598,56 @@ class SystemTrayIcon(QSystemTrayIcon):
         ####  END of __init__ ##########
 
 
+    def _deferred_init(self):
+        """
+        Second startup stage, run from the event loop after the icon
+        is shown: version monitor, monitor queries and context menu.
+        """
+        me = "_deferred_init"
+        startup_profile.mark("event loop running")
+
+        self.version_monitor = VersionMonitor('mx-updater')
+        self.running_version = self.version_monitor.running_version
+        self.initial_installed_version  = self.version_monitor.initial_installed_version
+
+        logger.info(f"[%s] Running version: %s", me, self.running_version)
+        logger.info(f"[%s] Initial installed version: %s", me, self.initial_installed_version )
+
+        # register to upgrades_changes signal on system bus
+        self.register_signal_receiver()
+
+        # try update state with retrieved available upgrades via D-Bus
+        logger.info("[%s] get_upgrades_available", me)
+        self.get_upgrades_available_async()
+
+        # request refresh
+        logger.info("[%s] self.request_refresh()", me)
+        self.request_refresh()
+        startup_profile.mark("monitor queried")
+
+        logger.info("[%s] Init UI self.initUI()", me)
+        self.initUI()
+        startup_profile.mark("menu built")
+
+        # apply menu entry visibility
+        self.initialized = True
+        self._render()
+
+        # the render may be skipped as unchanged, so an icon hidden
+        # since startup is handed off here
+        if not self.isVisible() and not self._total_updates:
+            self._schedule_handoff()
+        startup_profile.mark("deferred init done")
+        startup_profile.report()
+
     def on_value_changed(self, key, value):
         # Called when SetValue writes QSettings and emits the Qt signal
         self.value_changed_signal.emit(key, value)
 
+    def on_values_changed(self, values):
+        # Called when SetValues emits the Qt signal
+        self.values_changed_signal.emit(values)
+
     def _on_external_dbus_value_changed(self, key, value):
         # External DBus signal -> update QSettings (avoid overwriting if you trust local) and emit Qt signal
         self.service._settings.setValue(key, str(value))
@@ -538,6 +701,37 @@ class SystemTrayIcon(QSystemTrayIcon):
             return self._state["upgrades-available"]
 
 
+    def get_upgrades_available_async(self):
+        """
+        Retrieve available upgrades via D-Bus without blocking the
+        event loop while the system monitor gets activated.
+        """
+        me = "get_upgrades_available_async"
+
+        def on_reply(upgrades):
+            processed_upgrades = {
+                str(upgrade_type): tuple(int(value) for value in upgrade_info)
+                for upgrade_type, upgrade_info in upgrades.items()
+            }
+            logger.info("[%s] D-Bus GetUpgradesAvailable: %s", me, processed_upgrades)
+            self._state["upgrades-available"] = processed_upgrades
+            self.schedule_render()
+
+        def on_error(e):
+            logger.debug("[%s] D-Bus service not available: %r", me, e)
+
+        try:
+            proxy = self.system_bus.get_object(
+                SYSTEM_SERVICE_NAME,
+                SYSTEM_OBJECT_PATH,
+                introspect=False
+            )
+            interface = dbus.Interface(proxy, SYSTEM_INTERFACE)
+            interface.GetUpgradesAvailable(reply_handler=on_reply, error_handler=on_error)
+
+        except dbus.exceptions.DBusException as e:
+            logger.debug("[%s] D-Bus service not available: %r", me, e)
+
     def get_defaults(self):
         self.defaults = {
             'Settings' : {
@@ -560,6 +754,7 @@ class SystemTrayIcon(QSystemTrayIcon):
                 'use_nala_default' : False,
                 'use_nala' : False,
                 'hide_until_upgrades_available' : False,
+                'exit_while_hidden' : False,
                 #'''
                 #IconLook=wireframe-dark
                 #LeftClick=ViewAndUpgrade
@@ -680,41 +875,29 @@ class SystemTrayIcon(QSystemTrayIcon):
 
 
     def load_settings(self):
+        """
+        Fill selected_settings from the in-memory settings store
+        """
+        store = self.settings_store
+        defaults = self.defaults.get('Settings',{})
 
         #--- upgrade_type --------------------------------------------
-        upgrade_type_default = self.defaults.get('Settings',{}).get("upgrade_type_default")
-        print(f"load_settings upgrade_type = {upgrade_type_default}")
-        upgrade_type = self.qsettings.value("Settings/upgrade_type", upgrade_type_default)
-        if upgrade_type not in self.defaults.get('Settings',{}).get("upgrade_type_allowed"):
+        upgrade_type = store.get("upgrade_type", defaults.get("upgrade_type_default"))
+        if upgrade_type not in defaults.get("upgrade_type_allowed"):
             upgrade_type = "full-upgrade"
-        ##  print(f"Loaded preference UpgradeType: {upgrade_type}")  # Debug output
         self.selected_settings["upgrade_type"] = upgrade_type
 
-        #--------------------------------------------------------------
         #--- use_nala -------------------------------------------------
-        use_nala_default = self.defaults.get('Settings',{}).get("use_nala_default")
-        print(f"load_settings use_nala_default = {use_nala_default}")
-        try:
-            use_nala = self.qsettings.value("Settings/use_nala", use_nala_default, type=bool)
-            print(f"loaded Qsettings use_nala = {use_nala}")
-        except:
-            use_nala = False
-        self.selected_settings["use_nala"] = use_nala
+        self.selected_settings["use_nala"] = store.get("use_nala", defaults.get("use_nala_default"))
 
-        #--------------------------------------------------------------
         #--- left_click ------------------------------------
-        left_click_default = self.defaults.get('Settings',{}).get("left_click")
-        try:
-            left_click = self.qsettings.value("Settings/left_click", left_click_default)
-        except:
-            left_click = left_click_default
-        ##  print(f"Loaded preference LeftClick: {left_click}")  # debug
+        left_click_default = defaults.get("left_click")
+        left_click = store.get("left_click", left_click_default)
 
         # check it is in the allowed values
-        if left_click not in self.defaults.get('Settings',{}).get("left_click_allowed"):
+        if left_click not in defaults.get("left_click_allowed"):
             print(f"Invalid left_click '{left_click}' found. Reverting to default '{left_click_default}'.")
             left_click = left_click_default
-        #print(f"Set selected  settings left_click: {left_click}")
 
         if left_click.lower().replace('-', '_') in ( 'view_and_upgrade', 'viewandupgrade'):
             left_click = 'view_and_upgrade'
@@ -726,80 +909,28 @@ class SystemTrayIcon(QSystemTrayIcon):
         self.selected_settings["left_click"] = left_click
         self._settings["left_click"] = left_click
 
-
-        #--------------------------------------------------------------
         #--- icon_look ------------------------------------------------
-        icon_look_default = self.defaults.get('Settings',{}).get("icon_look_default")
-        icon_look = self.qsettings.value("Settings/icon_look", icon_look_default)
-        ##  print(f"Loaded settings IconLook: {icon_look}")  # Debug output
-        # Check if the value is in the allowed values
-        if icon_look not in self.defaults.get('Settings',{}).get("icon_look_allowed"):
-            #print(f"Invalid icon_look '{icon_look}' found. Reverting to default '{icon_look_default}'.")
+        icon_look_default = defaults.get("icon_look_default")
+        icon_look = store.get("icon_look", icon_look_default)
+        if icon_look not in defaults.get("icon_look_allowed"):
             icon_look = icon_look_default
-        #print(f"Set selected  settings IconLook: {icon_look}")  # Debug output
         self.selected_settings["icon_look"] = icon_look
 
-        #--------------------------------------------------------------
         #--- wireframe_transparent ------------------------------------
-        wireframe_transparent = self.defaults.get('Settings',{}).get("wireframe_transparent")
-        ##  print(f"Loaded preference WireframeTransparent: {wireframe_transparent}")  # Debug output
-        try:
-            wireframe_transparent = self.qsettings.value("Settings/wireframe_transparent", wireframe_transparent, type=bool)
-            #print(f"loaded Qsettings wireframe_transparent = {wireframe_transparent}")
-        except:
-            wireframe_transparent = True
-        #print(f"Set selected  settings wireframe_transparent: {wireframe_transparent}")  # Debug output
-        self.selected_settings["wireframe_transparent"] = wireframe_transparent
-
-        #--------------------------------------------------------------
-        #--- upgrade_assume_yes ---------------------------------------
-        upgrade_assume_yes_default = self.defaults.get('Settings',{}).get("upgrade_assume_yes")
-        #print("#--------------------------------------------------------------")
-        ##  print(f"Loaded preference upgrade_assume_yes_default: {upgrade_assume_yes_default}")  # Debug output
-        try:
-            upgrade_assume_yes = self.qsettings.value("Settings/upgrade_assume_yes", upgrade_assume_yes_default)
-            ##  print(f"Loaded Qsettings upgrade_assume_yes: {upgrade_assume_yes}")  # Debug
-        except:
-            upgrade_assume_yes = upgrade_assume_yes_default
-            print(f"Qsettings upgrade_assume_yes: {upgrade_assume_yes}")  # Debug
+        self.selected_settings["wireframe_transparent"] = store.get(
+            "wireframe_transparent", defaults.get("wireframe_transparent"))
 
-        ##  print(f"Loaded preference upgrade_assume_yes: {upgrade_assume_yes}")  # Debug output
-
-        if isinstance(upgrade_assume_yes, str) and upgrade_assume_yes.lower() in ("true", "yes", "1"):
-            upgrade_assume_yes = True
-        else:
-            upgrade_assume_yes = False
-
-        self.selected_settings["upgrade_assume_yes"] = upgrade_assume_yes
+        #--- upgrade_assume_yes ---------------------------------------
+        self.selected_settings["upgrade_assume_yes"] = store.get(
+            "upgrade_assume_yes", defaults.get("upgrade_assume_yes"))
 
         #--- auto_close ----------------------------------------
-        auto_close_default = self.defaults.get('Settings',{}).get("auto_close")
-        if auto_close_default is None:
-            auto_close_default = False
-
-        try:
-            auto_close = self.qsettings.value("Settings/auto_close", auto_close_default, type=bool)
-            ##  print(f"Loaded Qsettings auto_close: {auto_close}")  # Debug
-        except:
-            auto_close = auto_close_default
-            print(f"Fallback Qsettings auto_close: {auto_close}")  # Debug
-
-        ##  print(f"Loaded preference auto_close: {auto_close}")  # Debug output
-
-        self.selected_settings["auto_close"] = auto_close
+        self.selected_settings["auto_close"] = store.get(
+            "auto_close", defaults.get("auto_close", False))
 
         #--- auto_close timeout---------------------------------
-        auto_close_timeout_default = self.defaults.get('Settings',{}).get("auto_close_timeout")
-        if auto_close_timeout_default is None:
-            auto_close_timeout_default = 10
-        try:
-            auto_close_timeout = self.qsettings.value("Settings/auto_close_timeout", auto_close_timeout_default, type=int)
-            ##  print(f"Loaded Qsettings auto_close_timeout: {auto_close_timeout}")  # Debug
-        except:
-            auto_close_timeout = auto_close_timeout_default
-            print(f"Fallback Qsettings auto_close_timeout: {auto_close_timeout}")  # Debug
-
-        ##  print(f"Loaded preference auto_close_timeout: {auto_close_timeout}")  # Debug output
+        auto_close_timeout_default = defaults.get("auto_close_timeout", 10)
+        auto_close_timeout = store.get("auto_close_timeout", auto_close_timeout_default)
 
         # check auto_close_timeout is within valid range 1..60
         if auto_close_timeout < 1 or auto_close_timeout > 60 :
@@ -808,38 +939,16 @@ class SystemTrayIcon(QSystemTrayIcon):
         self.selected_settings["auto_close_timeout"] = auto_close_timeout
 
         #--- use_dbus_notifications -----------------------------------
-        use_dbus_notifications_default = self.defaults.get('Settings',{}).get("use_dbus_notifications")
-        if use_dbus_notifications_default is None:
-            use_dbus_notifications_default = True
-
-        try:
-            use_dbus_notifications = self.qsettings.value("Settings/use_dbus_notifications", use_dbus_notifications_default, type=bool)
-            ##  print(f"Loaded Qsettings use_dbus_notifications: {use_dbus_notifications}")  # Debug
-        except:
-            use_dbus_notifications = use_dbus_notifications_default
-            print(f"Fallback Qsettings use_dbus_notifications: {use_dbus_notifications}")  # Debug
-
-        ##  print(f"Loaded preference use_dbus_notifications: {use_dbus_notifications}")  # Debug output
-
-
-        self.selected_settings["use_dbus_notifications"] = use_dbus_notifications
+        self.selected_settings["use_dbus_notifications"] = store.get(
+            "use_dbus_notifications", defaults.get("use_dbus_notifications", True))
 
         #--- hide_until_upgrades_available -----------------------------------
-        hide_until_upgrades_available_default = self.defaults.get('Settings',{}).get("hide_until_upgrades_available")
-        if hide_until_upgrades_available_default is None:
-            hide_until_upgrades_available_default = False
-
-        try:
-            hide_until_upgrades_available = self.qsettings.value("Settings/hide_until_upgrades_available", hide_until_upgrades_available_default, type=bool)
-            ##  print(f"Loaded Qsettings hide_until_upgrades_available: {hide_until_upgrades_available}")  # Debug
-        except:
-            hide_until_upgrades_available = hide_until_upgrades_available_default
-            print(f"Fallback Qsettings hide_until_upgrades_available: {hide_until_upgrades_available}")  # Debug
-
-        ##  print(f"Loaded preference hide_until_upgrades_available: {hide_until_upgrades_available}")  # Debug output
-
+        self.selected_settings["hide_until_upgrades_available"] = store.get(
+            "hide_until_upgrades_available", defaults.get("hide_until_upgrades_available", False))
 
-        self.selected_settings["hide_until_upgrades_available"] = hide_until_upgrades_available
+        #--- exit_while_hidden -----------------------------------------------
+        self.selected_settings["exit_while_hidden"] = store.get(
+            "exit_while_hidden", defaults.get("exit_while_hidden", False))
 
 
     def _on_dbus_quit(self):
@@ -885,53 +994,54 @@ class SystemTrayIcon(QSystemTrayIcon):
         logger.debug("DBus: [_on_dbus_tray_visible] systrayicon -> %s", 'visible' if visible else 'hidden')
         self.tray_visibility_changed_signal.emit(visible)
 
+    def _ensure_notify(self) -> bool:
+        """
+        Import and initialize notify2 and query the server
+        capabilities on first use.
+        """
+        if self._notify_init is not None:
+            return self._notify_init
+
+        self._notify_init = False
+        try:
+            notify2 = load_notify2()
+            notify2.init(_("MX Updater"))
+            self._notify_init = True
+            self._notify_caps = notify2.get_server_caps() or set()
+            self.notifications = NotificationManager(
+                notify2, "/usr/share/icons/hicolor/scalable/mx-updater.svg")
+        except Exception as e:
+            logger.info("Notification daemon not avialable: %r", e)
+
+        if self._notify_init and "actions" not in self._notify_caps:
+            logger.info("Notification with 'actions' not avialable!")
+
+        return self._notify_init
+
     def _notify_with_action(self, title: str, message: str, action_tag: str):
         """
-        Create a notify2 notification with an action button.
+        Show a notification with an action button, an already shown one
+        for the same action_tag is updated in place.
         Clicking it calls the launcher for the given action_tag.
         """
 
-        if not self._notify_init:
+        if not self._ensure_notify():
             return
 
         if "actions" not in self._notify_caps:
             return
 
-        if self.notification:
-            self.notification.close()
-
         # label from registry
         #label, enabled, exe = self.registry[action_tag]
         label = _("View and Upgrade")
 
-        # create notification
-        #n = notify2.Notification(title, message, "mx-updater")
-        #n = notify2.Notification(title, message, "apt-notifier")
-        #n = notify2.Notification(title, message, "/usr/share/icons/mx-updater.png")
-        n = notify2.Notification(title, message, "/usr/share/icons/hicolor/scalable/mx-updater.svg")
-        n.set_urgency(notify2.URGENCY_NORMAL)
-        n.set_timeout(10000)  # 10 seconds
-
-        # action callback if avialable
-        if "actions" in self._notify_caps:
-            def on_notify_action(n_obj, action_key):
-                # action_key will be equal to action_tag by our choice below
-                launcher = self.make_launcher(action_key)
-                launcher()  # run the subprocess
-                # optionally close the notification right away
-                n_obj.close()
-
-            # notify2 requires you pass an “action key” string, a label, and a callback
-            n.add_action(
-                action_tag,      # action_key
-                label,           # button text
-                on_notify_action # callback
-            )
-
-        n.show()
+        def on_notify_action(action_key):
+            # action_key will be equal to action_tag by our choice below
+            launcher = self.make_launcher(action_key)
+            launcher()  # run the subprocess
 
-        if not self.notification:
-            self.notification = n
+        self.notifications.notify(action_tag, title, message,
+                                  ((action_tag, label, on_notify_action),))
 
     def on_entry_enabled(self, tag: str, enable: bool):
         action = self.actions[tag]
@@ -958,45 +1068,45 @@ class SystemTrayIcon(QSystemTrayIcon):
         self.action_status_changed_signal.emit(tag, enabled)
 
     def register_signal_receiver(self):
-
         """
-        try:
-            # Connect to the system D-Bus signal
-            self.system_bus.add_signal_receiver(
-                self.on_full_upgrades_changed,
-                signal_name='FullUpgradesChanged',
-                bus_name=SYSTEM_SERVICE_NAME,
-                path=SYSTEM_OBJECT_PATH,
-                dbus_interface=SYSTEM_INTERFACE
-            )
-        except dbus.exceptions.DBusException as e:
-            logger.debug(f"Error: {e}")
-            logging.debug("ERROR: %r", e)
+        Subscribe to all upgrade signals of the system monitor.
+        A single scan may emit all three back to back, the render
+        scheduler coalesces them into one update.
         """
-
-        try:
-            # Connect to the system D-Bus signal
-            self.system_bus.add_signal_receiver(
-                self.on_basic_upgrades_changed,
-                signal_name='BasicUpgradesChanged',
-                bus_name=SYSTEM_SERVICE_NAME,
-                path=SYSTEM_OBJECT_PATH,
-                dbus_interface=SYSTEM_INTERFACE
-            )
-        except dbus.exceptions.DBusException as e:
-            logger.debug(f"Error: {e}")
-            logging.debug("ERROR: %r", e)
+        receivers = (
+            (self.on_full_upgrades_changed, 'FullUpgradesChanged'),
+            (self.on_basic_upgrades_changed, 'BasicUpgradesChanged'),
+            (self.on_upgrades_changed, 'UpgradesChanged'),
+        )
+        for handler, signal_name in receivers:
+            try:
+                # Connect to the system D-Bus signal
+                self.system_bus.add_signal_receiver(
+                    handler,
+                    signal_name=signal_name,
+                    bus_name=SYSTEM_SERVICE_NAME,
+                    path=SYSTEM_OBJECT_PATH,
+                    dbus_interface=SYSTEM_INTERFACE
+                )
+            except dbus.exceptions.DBusException as e:
+                logger.debug(f"Error: {e}")
+                logging.debug("ERROR: %r", e)
 
 
     def request_refresh(self):
 
+        def on_error(e):
+            logger.debug(f"Error: {e}")
+
         try:
             proxy = self.system_bus.get_object(SYSTEM_SERVICE_NAME,
-                                   SYSTEM_OBJECT_PATH)
+                                   SYSTEM_OBJECT_PATH,
+                                   introspect=False)
 
             iface = dbus.Interface(proxy, dbus_interface=SYSTEM_INTERFACE )
 
-            iface.Refresh()
+            # the refreshed state arrives with the upgrade signals
+            iface.Refresh(reply_handler=lambda: None, error_handler=on_error)
 
         except dbus.exceptions.DBusException as e:
             logger.debug(f"Error: {e}")
@@ -1038,6 +1148,22 @@ class SystemTrayIcon(QSystemTrayIcon):
             return
         self.full_upgrades_changed_signal.emit(full_upgrades_available)  # Emit the PyQt signal
 
+    def on_upgrades_changed(self, upgrades_available):
+        """Slot to handle the D-Bus signal and emit the PyQt signal."""
+        me = "on_upgrades_changed"
+        logger.debug("[%s] D-Bus upgrades_changed_signal received with value: %r", me, upgrades_available)
+        upgrades = {str(k): tuple(int(n) for n in v) for k, v in upgrades_available.items()}
+        self.upgrades_changed_signal.emit(upgrades)  # Emit the PyQt signal
+
+    def update_apt_icon_all(self, upgrades_available):
+        me = "update_apt_icon_all"
+        logger.debug("[%s] try to update systray icon with value: %r", me, upgrades_available)
+        upgrade_type = self._settings.get("upgrade_type", "full-upgrade")
+        upgrade_type = 'full-upgrade' if upgrade_type == 'full-upgrade' else 'basic-upgrade'
+        if upgrade_type not in upgrades_available:
+            return
+        self.update_apt_icon(upgrade_type, upgrades_available[upgrade_type])
+
     def update_apt_icon_full(self, full_upgrades_available):
         me = "update_apt_icon_full"
         logger.debug("[%s] try to update systray icon with value: %r", me, full_upgrades_available)
@@ -1061,7 +1187,7 @@ class SystemTrayIcon(QSystemTrayIcon):
         #    return
 
         # Check if version changed
-        if self.version_monitor.check_version_change():
+        if self.version_monitor and self.version_monitor.check_version_change():
             # trigger  restart function
             #self.restart_application()
             restart = self.actions.get("updater_restart")
@@ -1091,35 +1217,116 @@ class SystemTrayIcon(QSystemTrayIcon):
         me = "update_apt_icon"
         logger.debug("[%s] System tray icon updated '%s' with D-Bus value: %r", me, upgrade_type, upgrades_available)
 
+        # only remember the pushed value, state file is read once per render
+        self._pending_upgrades[upgrade_type] = upgrades_available
+        self.schedule_render()
+
+    def _refresh_state(self):
+        """
+        Reload the monitor state once for all upgrade signals
+        received since the last render.
+        """
+        me = "_refresh_state"
+        pending = self._pending_upgrades
+        self._pending_upgrades = {}
+
         self._old_state = self._state
 
-        state_file_conentent = self.cat_file(str(STATE_FILE))
-        logger.debug("[update_apt_icon] cat STATE_FILE %s:\n%s", STATE_FILE, state_file_conentent)
+        if logger.isEnabledFor(logging.DEBUG):
+            state_file_conentent = self.cat_file(str(STATE_FILE))
+            logger.debug("[%s] cat STATE_FILE %s:\n%s", me, STATE_FILE, state_file_conentent)
 
-        upgrade_type = self._settings.get("upgrade_type", "full-upgrade")
         # try load state
         with self._lock:
             loaded_state = self.load_state()
-            logger.debug("[update_apt_icon] loaded_state STATE_FILE %s:\n%s", STATE_FILE, loaded_state)
+            logger.debug("[%s] loaded_state STATE_FILE %s:\n%s", me, STATE_FILE, loaded_state)
 
             if loaded_state is not None and self.validate_state(loaded_state):
                 self._state["upgrades-available"]["full-upgrade"] = loaded_state["upgrades-available"]["full-upgrade"]
                 self._state["upgrades-available"]["basic-upgrade"] = loaded_state["upgrades-available"]["basic-upgrade"]
-
-                if upgrade_type == "full-upgrade":
-                    upgrades_available = loaded_state.get("upgrades-available",{}).get("full-upgrade", (0,0,0,0))
-                else:
-                    upgrades_available = loaded_state.get("upgrades-available",{}).get("basic-upgrade", (0,0,0,0))
-
             else:
-                self._state["upgrades-available"][upgrade_type] = upgrades_available
+                for upgrade_type, upgrades_available in pending.items():
+                    self._state["upgrades-available"][upgrade_type] = upgrades_available
+
+    def schedule_render(self):
+        """
+        Mark icon, tooltip, menu and notification state dirty.
+        All requests within RENDER_DELAY_MS are coalesced into one render.
+        """
+        me = "schedule_render"
+        if self._render_pending:
+            logger.debug("[%s] render already pending", me)
+            return
+        self._render_pending = True
+        self._render_timer.start()
+
+    def _render(self):
+        me = "_render"
+        self._render_pending = False
+        if self._pending_upgrades:
+            self._refresh_state()
+
+        render_key = self._render_key()
+        if render_key == self._render_key_last:
+            logger.debug("[%s] render inputs unchanged, nothing to do", me)
+            return
+        self._render_key_last = render_key
 
         logger.info("[%s] set_icon_look()", me)
         self.set_icon_look()
         logger.debug("[%s] set_tooltip() with _state:\n%s", me, self._state)
         self.set_tooltip()
 
+    def _render_key(self):
+        """
+        Hash of everything icon, tooltip, menu and notification depend on
+        """
+        upgrades = self._state.get("upgrades-available", {})
+        store = self.settings_store
+        return hash((
+            tuple(sorted((str(k), tuple(v)) for k, v in upgrades.items())),
+            str(self._settings.get("upgrade_type")),
+            str(self._settings.get("icon_look")),
+            str(store.get('wireframe_transparent', True)),
+            str(self._settings.get('hide_until_upgrades_available', False)),
+            str(store.get('hide_until_upgrades_available', False)),
+            str(store.get('use_dbus_notifications', True)),
+            str(store.get('exit_while_hidden', False)),
+            self.is_unattended_upgrade_enabled(),
+            os.environ.get('LANGUAGE', ''),
+            os.environ.get('LANG', ''),
+            tuple(self.disable_hide_until),
+            # menu built
+            bool(self.actions),
+        ))
+
+    def _apply_icon(self, path: str):
+        if path == self._shown_icon:
+            return
+        icon = self._icons.get(path)
+        if icon is None:
+            icon = self._icons[path] = QIcon(path)
+        logger.debug("[_apply_icon] setIcon(QIcon('%s')", path)
+        self.setIcon(icon)
+        self._shown_icon = path
+
+    def _apply_tooltip(self, tooltip: str):
+        if tooltip == self._shown_tooltip:
+            return
+        self.setToolTip(tooltip)
+        self._shown_tooltip = tooltip
+
+
 
+    def update_tray_icon_values(self, values):
+        """
+        Apply a set of changes, the render scheduler turns them
+        into one icon, tooltip and menu update.
+        """
+        me = "update_tray_icon_values"
+        logger.info("[%s] Try to update system tray icon with: %s", me, values)
+        for key, value in values.items():
+            self.update_tray_icon(key, value)
 
     def update_tray_icon(self, key, value):
         me = "update_tray_icon"
@@ -1129,8 +1336,9 @@ class SystemTrayIcon(QSystemTrayIcon):
             case 'upgrade_type':
                 upgrade_type = 'full-upgrade' if value == 'full-upgrade' else 'basic-upgrade'
                 self._settings['upgrade_type'] = upgrade_type
+                self.settings_store.set_value('upgrade_type', upgrade_type, persist=False)
                 self._clean_notifications()
-                self.set_tooltip()
+                self.schedule_render()
 
             case 'icon_look':
                 icon_look = value
@@ -1141,15 +1349,13 @@ class SystemTrayIcon(QSystemTrayIcon):
                     logger.info("[%s] icon_look transparent  %s %s", me, icon_look, transparent)
                     transparent = transparent == "transparent"
                     logger.info("[%s] itransparent  %s ", me, transparent)
-                    self._settings['wireframe_transparent'] = transparent == "transparent"
-                    self.qsettings.sync()
-                    qtransparent = self.qsettings.value('Settings/wireframe_transparent')
-                    logger.info("[%s] qtransparent  %s ", me, qtransparent)
+                    self._settings['wireframe_transparent'] = transparent
+                    self.settings_store.set_value('wireframe_transparent', transparent, persist=False)
 
                 self._settings['icon_look'] = icon_look
-                # TODO: needs update_apt_icon
-                logger.info("[%s] set_icon_look()", me)
-                self.set_icon_look()
+                self.settings_store.set_value('icon_look', icon_look, persist=False)
+                logger.info("[%s] schedule_render()", me)
+                self.schedule_render()
 
             case 'left_click':
                 if value.startswith("view_and_upgrade"):
@@ -1158,6 +1364,7 @@ class SystemTrayIcon(QSystemTrayIcon):
                     self._settings['left_click'] = "package_manager"
                 elif value.startswith("package_installer"):
                     self._settings['left_click'] = "package_installer"
+                self.settings_store.set_value('left_click', self._settings.get('left_click'), persist=False)
 
             case 'hide_until_upgrades_available':
                 if isinstance(value, bool):
@@ -1165,22 +1372,32 @@ class SystemTrayIcon(QSystemTrayIcon):
                 elif isinstance(value, str):
                     hide_until_upgrades_available = value.lower() in ("true", "yes", "1")
 
-                self._settings['hide_until_upgrades_available'] = value.lower() in ("true", "yes", "1")
-                logger.info("[%s] set_tooltip()", me)
-                self.set_tooltip()
+                self._settings['hide_until_upgrades_available'] = hide_until_upgrades_available
+                self.settings_store.set_value('hide_until_upgrades_available', hide_until_upgrades_available, persist=False)
+                logger.info("[%s] schedule_render()", me)
+                self.schedule_render()
                 #self._apply_tray_visibility(not hide_until_upgrades_available)
                 pass
 
             case 'auto_upgrade':
+                self._unattended_cache = None
                 is_unattended_upgrade_enabled = self.is_unattended_upgrade_enabled()
                 logger.info("[%s] auto_upgrade is currently enabled: %r ", me, is_unattended_upgrade_enabled)
                 self.enable_auto_upgrade_log()
-                self.set_tooltip()
+                self.schedule_render()
                 pass
 
+            case 'use_dbus_notifications':
+                self.settings_store.set_value('use_dbus_notifications', value, persist=False)
+
+            case 'exit_while_hidden':
+                self.settings_store.set_value('exit_while_hidden', value, persist=False)
+                self.schedule_render()
+
             case _:
-                # default handling if any
-                pass
+                # no re-render needed, keep the store current for
+                # e.g. auto_close, upgrade_assume_yes, use_nala, start_at_login
+                self.settings_store.set_value(key, value, persist=False)
 
     """
 
@@ -1201,7 +1418,6 @@ class SystemTrayIcon(QSystemTrayIcon):
 
         me = "set_tooltip"
 
-        self.qsettings.sync()
         upgrade_type  = self._settings.get("upgrade_type", "full-upgrade")
         upgrade_type = 'full-upgrade' if 'full' in upgrade_type or 'dist' in upgrade_type else 'basic-upgrade'
 
@@ -1269,13 +1485,10 @@ class SystemTrayIcon(QSystemTrayIcon):
         logger.debug("[%s] new_upgrades_available  =  %r", me, tuple(new_upgrades_available))
         logger.debug("[%s] do_notify is : %r", me, do_notify)
         # notifications
-        value = self.qsettings.value('Settings/use_dbus_notifications', True)
-        use_dbus_notifications = str(value).lower() in ('true')
+        use_dbus_notifications = self.settings_store.get('use_dbus_notifications', True)
         logger.debug("[%s] use_dbus_notifications is : %r", me, use_dbus_notifications)
 
-        value = self.qsettings.value('Settings/hide_until_upgrades_available', False)
-        logger.debug("[%s] self.qsettings.value('Settings/hide_until_upgrades_available', False) is %r", me, value)
-        hide_until_upgrades_available = str(value).lower() in ('true')
+        hide_until_upgrades_available = self.settings_store.get('hide_until_upgrades_available', False)
         logger.debug("[%s] hide_until_upgrades_available is %r", me, hide_until_upgrades_available)
 
         if self._total_updates == 0:
@@ -1318,17 +1531,11 @@ class SystemTrayIcon(QSystemTrayIcon):
 
         tooltip= f"{tooltip_upgrade_type}\n{tooltip_available}"
         logger.debug("[%s] tooltip is: %s", me, tooltip)
-        self.setToolTip(tooltip)
+        self._apply_tooltip(tooltip)
 
 
         if set_icon:
-            logger.debug("[%s] setIcon(QIcon('%s')", me, set_icon)
-            self.setIcon(QIcon(set_icon))
-
-        value = self.qsettings.value('Settings/hide_until_upgrades_available', False)
-        logger.debug("[%s] self.qsettings.value('Settings/hide_until_upgrades_available', False) is %s", me, value)
-        hide_until_upgrades_available = str(value).lower() in ('true')
-        logger.debug("[%s] hide_until_upgrades_available is %s", me, hide_until_upgrades_available)
+            self._apply_icon(set_icon)
 
         logger.debug("[%s] ----------------------------------------------", me)
         hide_tray_icon = do_hide and hide_until_upgrades_available
@@ -1339,6 +1546,9 @@ class SystemTrayIcon(QSystemTrayIcon):
         self._apply_tray_visibility(not hide_tray_icon)
         logger.debug("[%s] ----------------------------------------------", me)
 
+        if hide_tray_icon and not self._total_updates:
+            self._schedule_handoff()
+
 
         if self._total_updates:
             self._apply_entry_visible("view_and_upgrade", True)
@@ -1356,7 +1566,6 @@ class SystemTrayIcon(QSystemTrayIcon):
         logger.debug("[%s] ##############################################", me)
         logger.debug("[%s] do_notify is : %r", me, do_notify)
         if do_notify and use_dbus_notifications:
-            self._clean_notifications()
             logger.debug('[%s] self._notify_with_action(_("Upgrades available"), tooltip, "view_and_upgrade")', me)
             self._notify_with_action(_("Upgrades available"), tooltip, "view_and_upgrade")
             self._notified_upgrades = new_upgrades_available
@@ -1381,12 +1590,8 @@ class SystemTrayIcon(QSystemTrayIcon):
         icons = self.defaults.get('Icons',{}).get(icon_look)
         icon_some = icons.get("icon_some")
         icon_none = icons.get("icon_none")
-        wireframe_transparent = self.qsettings.value('Settings/wireframe_transparent')
-        logger.info("[%s] self.qsettings.value('Settings/wireframe_transparent') : %s [%s]", me, wireframe_transparent, type(wireframe_transparent))
-        #wireframe_transparent = self._settings.get('wireframe_transparent', "true")
-        #logger.info("[%s] self._settings.get('wireframe_transparent') : %s [%s]", me, wireframe_transparent, type(wireframe_transparent))
-        wireframe_transparent = str(wireframe_transparent).lower() in ['true', 'on', '1']
-        logger.info("[%s] self.qsettings.value('Settings/wireframe_transparent') : %s [%s]", me, wireframe_transparent, type(wireframe_transparent))
+        wireframe_transparent = self.settings_store.get('wireframe_transparent', True)
+        logger.debug("[%s] wireframe_transparent : %s", me, wireframe_transparent)
 
         if icon_look.startswith('wireframe') and wireframe_transparent:
             icon_none = icons.get('icon_none_transparent', icon_none)
@@ -1415,8 +1620,7 @@ class SystemTrayIcon(QSystemTrayIcon):
             set_icon = self._icon_none
 
         if set_icon:
-            logger.debug("[%s] setIcon(QIcon('%s')", me, set_icon)
-            self.setIcon(QIcon(set_icon))
+            self._apply_icon(set_icon)
 
 
         if total_updates:
@@ -1606,33 +1810,11 @@ class SystemTrayIcon(QSystemTrayIcon):
 
         print(f"[update_settings_dialog] Try update settings dialog via dbus: {key} = {value}")
         logger.debug("[update_settings_dialog] Try update settings dialog via dbus: %s = %s", key, value)
-        try:
-            # Connect to session bus
-            bus = dbus.SessionBus()
-
-            try:
-                # dbus proxy object
-                proxy = bus.get_object(SETTINGS_OBJECT_NAME, SETTINGS_OBJECT_PATH)
 
-                # dbus interface
-                interface = dbus.Interface(proxy, SETTINGS_OBJECT_IFACE)
-
-                # debus method call to update settings dialog with key/value
-                if key == 'hide_until_upgrades_available':
-                    key = "hide"
-                #print(f"interface.SetValue(str({key}), str({value}))")
-                interface.SetValue(str(key), str(value))
-
-            except dbus.exceptions.DBusException as e:
-                # updater settings dialog not running
-                #print(f"UpdaterSettings dialog not running.: {e}")
-                #print(f"UpdaterSettings dialog not running.")
-                logger.debug("[update_settings_dialog] UpdaterSettings appears to be not running")
-                pass
-
-        except Exception as e:
-            print(f"Unexpected D-Bus error: {e}")
-            pass
+        # debus method call to update settings dialog with key/value
+        if not self.dbus_client.set_value(SETTINGS, key, value):
+            # updater settings dialog not running
+            logger.debug("[update_settings_dialog] UpdaterSettings appears to be not running")
 
 
     def on_hide_until_upgrades_available_checkbox_toggledXXXXXXX(self, checked):
@@ -1647,36 +1829,101 @@ class SystemTrayIcon(QSystemTrayIcon):
         logger.debug("[_on_hide_until_upgrades_available] Clicked _on_hide_until_upgrades_available")
         self._settings["hide_until_upgrades_available"] = True
         self.setVisible(False)
-        self.qsettings.setValue("Settings/hide_until_upgrades_available", True)
-        self.qsettings.sync()
+        # written to disk with the next batched flush
+        self.settings_store.set_value("hide_until_upgrades_available", True)
         self.update_settings_dialog("hide_until_upgrades_available", True)
         pass
 
+    def _schedule_handoff(self):
+        """
+        With 'exit_while_hidden' set, a hidden systray icon without
+        upgrades exits and the watcher waits for upgrades instead.
+        """
+        if self._handoff_pending or not self.initialized:
+            return
+        if not self.settings_store.get('exit_while_hidden', False):
+            return
+        if any(self.disable_hide_until):
+            return
+        self._handoff_pending = True
+        QTimer.singleShot(HANDOFF_DELAY_MS, self._handoff_to_watcher)
+
+    def _handoff_to_watcher(self):
+        me = "_handoff_to_watcher"
+        self._handoff_pending = False
+
+        # recheck, upgrades or settings may have changed meanwhile
+        if self.isVisible() or self._total_updates:
+            return
+        if not self.settings_store.get('exit_while_hidden', False):
+            return
+
+        watch_args = ["/usr/bin/python3",
+                      os.path.join(MX_UPDATER_PATH, "updater-launch.py"),
+                      "--watch", "--handoff"]
+        if logger.isEnabledFor(logging.DEBUG):
+            watch_args.append("--debug")
+        try:
+            subprocess.Popen(watch_args, start_new_session=True)
+        except OSError as e:
+            logger.debug("[%s] Could not start watcher: %r", me, e)
+            return
+
+        logger.info("[%s] Hidden without upgrades, exit and hand over to watcher", me)
+        # the watcher takes over the lock file
+        self.handleQuit(keep_lock=True)
+        QApplication.quit()
+
     def _onLocalQuit(self):
         self.handleQuit()
         QSystemTrayIcon.hide(self)
         QApplication.quit()
 
     def _clean_notifications(self):
-        if self.notification:
-            self.notification.close()
+        if self.notifications:
+            self.notifications.close()
 
-    def handleQuit(self):
+    def handleQuit(self, keep_lock=False):
         """
         Any cleanup you need to do *before* the app closes
         (e.g. save settings, log messages, notify others…)
+
+        :param keep_lock: leave the lock file to the watcher
         """
-        if self.notification:
-            self.notification.close()
+        self._clean_notifications()
 
-        release_runtime_lock(self.run_time_path)
+        self.settings_store.flush()
+        if not keep_lock:
+            release_runtime_lock(self.run_time_path)
         logger.debug("SystemTrayIcon is cleaning up...")
 
+    def debug_stats(self) -> Dict[str, Any]:
+        """
+        Statistics for the D-Bus debug methods
+        """
+        return {
+            "process": updater_debug.process_stats(),
+            "python": updater_debug.python_stats(),
+            "qobjects": updater_debug.qobject_counts(),
+            "qt_receivers": {
+                "tray": updater_debug.qt_signal_receivers(self),
+                "service": updater_debug.qt_signal_receivers(self.service._emitter),
+            },
+            "dbus_signal_handlers": {
+                "session": updater_debug.dbus_signal_handlers(self.session_bus),
+                "system": updater_debug.dbus_signal_handlers(self.system_bus),
+            },
+            "notify2": updater_debug.notify2_stats(_notify2),
+            "notifications": self.notifications.stats() if self.notifications else None,
+            "render_pending": self._render_pending,
+        }
+
     def get_app_name_from_path(self, fullpath: str) -> str:
         """
         fullpath: absolute path to a .desktop file,
                   e.g. '/usr/share/applications/mx-package-installer.desktop'
         """
+        from xdg.DesktopEntry import DesktopEntry
         entry = DesktopEntry(fullpath)
         return entry.getName()
 
@@ -1813,16 +2060,46 @@ class SystemTrayIcon(QSystemTrayIcon):
             bool: True if unattended upgrade is enabled
         """
         me = "is_unattended_upgrade_enabled@Settings"
+        # apt-config only runs again after the apt configuration has changed
+        config_key = self._apt_config_key()
+        if self._unattended_cache is not None and self._unattended_cache[0] == config_key:
+            return self._unattended_cache[1]
+
         try:
             cmd = ['apt-config', 'shell', 'opt', 'APT::Periodic::Unattended-Upgrade/b']
             result = subprocess.run(cmd, capture_output=True, text=True, check=True)
 
             # match the single-quoted apt-config shell output
             output = result.stdout.strip()
-            return output == "opt='true'"
+            enabled = output == "opt='true'"
 
         except subprocess.CalledProcessError:
-            return False
+            enabled = False
+
+        logger.debug("[%s] unattended upgrade enabled: %r", me, enabled)
+        self._unattended_cache = (config_key, enabled)
+        return enabled
+
+    def _apt_config_key(self):
+        """
+        Modification times of the apt configuration files
+        """
+        key = [os.environ.get('APT_CONFIG', '')]
+        for path in ('/etc/apt/apt.conf', '/etc/apt/apt.conf.d'):
+            try:
+                key.append((path, os.stat(path).st_mtime_ns))
+            except OSError:
+                key.append((path, None))
+        try:
+            with os.scandir('/etc/apt/apt.conf.d') as entries:
+                for entry in entries:
+                    try:
+                        key.append((entry.name, entry.stat().st_mtime_ns))
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+        return tuple(sorted(key, key=str))
 
     def auto_upgrades_logs_available(self) -> bool:
         """
@@ -1848,6 +2125,12 @@ class SystemTrayIcon(QSystemTrayIcon):
                 logger.debug("[%s] unattended-upgrades log exists.", me)
                 return True
 
+        # run index kept by the system monitor, readable without pkexec
+        runs = load_uu_runs()
+        if runs:
+            logger.debug("[%s] latest unattended-upgrades run: %s", me, format_uu_run(runs[0]))
+            return True
+
         logger.debug("[%s] try with pkexec whether unattended-upgrades log exists.", me)
         try:
             # Run the command using subprocess
@@ -1895,7 +2178,7 @@ class SystemTrayIcon(QSystemTrayIcon):
         logger.info("[%s] auto_upgrades_logs_available: %r , [%s]", me, auto_upgrades_logs_available, type(auto_upgrades_logs_available))
         # check and set visibility for unattended-upgrades log
         enable_auto_update_logs = (self.is_unattended_upgrade_enabled()
-                                or self.auto_upgrades_logs_available())
+                                or auto_upgrades_logs_available)
 
         logger.info("[%s] set visibility for auto_update_log: %r", me, enable_auto_update_logs)
         self.set_action_visble("auto_update_log", enable_auto_update_logs)
@@ -1904,71 +2187,6 @@ class SystemTrayIcon(QSystemTrayIcon):
         self.set_action_visble("auto_update_dpkg_log", enable_auto_update_logs)
 
 
-    def detect_plasma(self):
-        # kde/plasma detection
-        plasma_indicators = [
-            os.environ.get('DESKTOP_SESSION', '').lower() == 'plasma',
-            os.environ.get('XDG_CURRENT_DESKTOP', '').lower() == 'kde',
-            os.environ.get('KDE_FULL_SESSION', '').lower() == 'true'
-        ]
-
-        if any(plasma_indicators):
-            return any(plasma_indicators)
-
-        # additional with process check
-        try:
-            plasma_shell_process = subprocess.run(
-                ['pgrep', '-x', 'plasmashell'],
-                capture_output=True,
-                text=True
-            )
-            plasma_indicators.append(plasma_shell_process.returncode == 0)
-        except Exception:
-            try:
-                plasma_shell_process = subprocess.run(
-                    ['pidof', '-q', 'plasmashell'],
-                    capture_output=True,
-                    text=True
-                )
-                plasma_indicators.append(plasma_shell_process.returncode == 0)
-            except Exception:
-                pass
-
-        return any(plasma_indicators)
-
-    def detect_fluxbox(self):
-        # fluxbox detection
-        fluxbox_indicators = [
-            os.environ.get('DESKTOP_SESSION', '').lower() == 'fluxbox',
-            os.environ.get('XDG_SESSION_DESKTOP', '').lower() == 'fluxbox',
-            os.environ.get('GDMSESSION', '').lower() == 'fluxbox'
-        ]
-
-        if any(fluxbox_indicators):
-            return any(fluxbox_indicators)
-
-        # additional with process check
-        try:
-            fluxbox_process = subprocess.run(
-                ['pgrep', '-x', 'fluxbox'],
-                capture_output=True,
-                text=True
-            )
-            fluxbox_indicators.append(fluxbox_process.returncode == 0)
-        except Exception:
-            try:
-                fluxbox_process = subprocess.run(
-                    ['pidof', '-q', 'fluxbox'],
-                    capture_output=True,
-                    text=True
-                )
-                fluxbox_indicators.append(fluxbox_process.returncode == 0)
-            except Exception:
-                pass
-
-        return any(fluxbox_indicators)
-
-
 
 
 def make_notification(title, message, icon=None, timeout=10_000):
@@ -1976,6 +2194,7 @@ def make_notification(title, message, icon=None, timeout=10_000):
     Create notify2.Notification whose own _closed_callback is silenced
     so it won’t raise KeyErrors if the notification disappears early.
     """
+    notify2 = load_notify2()
     n = notify2.Notification(title, message, icon)
     n.set_timeout(timeout)
 
@@ -1997,73 +2216,6 @@ def make_notification(title, message, icon=None, timeout=10_000):
     return n
 
 
-def ensure_lock_dir(base: Path, mode: int) -> bool:
-    """
-    Ensure that "base" exists and has exactly the given mode bits.
-    Returns True if successful, False otherwise.
-    """
-    try:
-        if not base.exists():
-            base.mkdir(parents=True, exist_ok=True)
-        # fetch current permissions
-        st = base.stat()
-        current_mode = stat.S_IMODE(st.st_mode)
-        if current_mode != mode:
-            # try to reset
-            base.chmod(mode)
-            # recheck
-            st = base.stat()
-            if stat.S_IMODE(st.st_mode) != mode:
-                return False
-        return True
-    except PermissionError:
-        return False
-    except OSError:
-        return False
-
-def acquire_runtime_lock() -> Path | None:
-    """
-    Returns the Path to the lock file  or None.
-    """
-    uid = os.geteuid()
-    filename = f"mx-updater-systrayicon-{uid}.lock"
-    # primary lock dir
-    run_lock = Path("/run/lock")
-    desired_mode = 0o1777
-
-    if ensure_lock_dir(run_lock, desired_mode):
-        lock_path = run_lock / filename
-    else:
-        # fallback to per-user runtime dir
-        run_user = Path(f"/run/user/{uid}")
-        if not run_user.exists() or not run_user.is_dir():
-            return None
-        lock_path = run_user / filename
-
-    try:
-        with lock_path.open("w") as f:
-            # write lock file with pid
-            f.write(str(os.getpid()))
-            #lock_path.touch(exist_ok=True)
-        return lock_path
-    except OSError:
-        return None
-
-def release_runtime_lock(lock_path: Path | None) -> None:
-    """
-    Remove the lock file if it exists.
-    """
-    if lock_path is None:
-        return
-
-    try:
-        lock_path.unlink()
-    except FileNotFoundError:
-        pass
-    except OSError:
-        pass
-
-
 def main(bus, logger):
     logger.debug("")
     logger.debug("qdbus6  org.mxlinux.AptSystrayIcon /org/mxlinux/AptSystrayIcon")
@@ -2083,10 +2235,14 @@ def main(bus, logger):
 
     app = QApplication(sys.argv)
     app.setApplicationName("mx-updater")
+    startup_profile.mark("QApplication")
 
     tray_icon = SystemTrayIcon(service, session_bus, system_bus)
+    service.debug_provider = tray_icon
+    startup_profile.mark("tray icon created")
 
     tray_icon.show()
+    startup_profile.mark("tray icon shown")
 
     #service.quit_signal.connect(tray_icon.handleQuit)      # your custom cleanup
     #service.quit_signal.connect(app.quit)             # then exit
@@ -2105,17 +2261,32 @@ def signal_handler(sig, frame):
     sys.exit(0)
 
 
-#---------------------
-# monkey patch notify2 to avoid keyerror exception on closed notifications
-#---------------------
-_orig_closed_cb = notify2._closed_callback
-def _safe_closed_callback(nid, reason):
-    try:
-        _orig_closed_cb(nid, reason)
-    except KeyError:
-        # notification already gone: ignore
-        pass
-notify2._closed_callback = _safe_closed_callback
+_notify2 = None
+
+def load_notify2():
+    """
+    Import notify2 on first use.
+    """
+    global _notify2
+    if _notify2 is not None:
+        return _notify2
+
+    import notify2
+
+    #---------------------
+    # monkey patch notify2 to avoid keyerror exception on closed notifications
+    #---------------------
+    _orig_closed_cb = notify2._closed_callback
+    def _safe_closed_callback(nid, reason):
+        try:
+            _orig_closed_cb(nid, reason)
+        except KeyError:
+            # notification already gone: ignore
+            pass
+    notify2._closed_callback = _safe_closed_callback
+
+    _notify2 = notify2
+    return _notify2
 
 
 
@@ -2136,38 +2307,14 @@ def unhide_systray(bus):
         print(f"Unexpected QSettings error: {e}")
         pass
 
-    try:
-        # dbus proxy object
-        proxy = bus.get_object(SETTINGS_OBJECT_NAME, SETTINGS_OBJECT_PATH)
-        interface = dbus.Interface(proxy, SETTINGS_OBJECT_IFACE)
-        interface.SetValue(str(key), str(val))
+    client = session_client(bus)
 
-    except dbus.exceptions.DBusException as e:
+    if not client.set_value(SETTINGS, key, val):
         # updater settings dialog not running
-        #print(f"UpdaterSettings dialog not running.")
         logger.debug("[unhide_systray] UpdaterSettings appears to be not running")
-        pass
 
-    except Exception as e:
-        print(f"Unexpected D-Bus error: {e}")
-        pass
-
-
-    try:
-        # dbus proxy object
-        proxy = bus.get_object(TRAYICON_OBJECT_NAME, TRAYICON_OBJECT_PATH)
-        interface = dbus.Interface(proxy, TRAYICON_OBJECT_IFACE)
-        interface.SetValue(str(key), str(val))
-
-    except dbus.exceptions.DBusException as e:
-        # updater settings dialog not running
-        #print(f"UpdaterSettings dialog not running.")
-        logger.debug("[update_settings_dialog] UpdaterSettings appears to be not running")
-        pass
-
-    except Exception as e:
-        print(f"Unexpected D-Bus error: {e}")
-        pass
+    if not client.set_value(TRAYICON, key, val):
+        logger.debug("[unhide_systray] Updater systray icon appears to be not running")
 
 
 
@@ -2193,7 +2340,7 @@ if __name__ == "__main__":
         sys.exit(1)
 
     # try unhide systray icon if already running
-    if not args.autostart:
+    if not (args.autostart or args.keep_hidden):
         unhide_systray(session_bus)
 
     # if already running, bail out - no double runs
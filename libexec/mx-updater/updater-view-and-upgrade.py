@@ -4,18 +4,22 @@ from PyQt6.QtWidgets import (
     QApplication, QWidget, QPushButton,
     QHBoxLayout, QVBoxLayout, QGridLayout,
     QTextEdit, QGroupBox, QSpinBox, QDialog,
-    QCheckBox, QDialogButtonBox, QStyle, QProgressDialog
+    QCheckBox, QDialogButtonBox, QStyle, QProgressDialog,
+    QTabWidget, QTableView, QLineEdit, QLabel, QHeaderView,
+    QAbstractItemView
 )
 from PyQt6.QtGui import (
     QFont, QIcon, QPixmap, QKeyEvent, QGuiApplication,
-    QPalette, QAction, QColor
+    QPalette, QAction, QColor, QTextCursor
     )
 
-from PyQt6.QtCore import QObject, QThread, pyqtSignal
-from PyQt6.QtCore import Qt, QPoint, QSize
+from PyQt6.QtCore import QObject, QProcess, QTimer, pyqtSignal
+from PyQt6.QtCore import Qt, QPoint, QSize, QLocale
 from PyQt6.QtCore import QSettings
 
 import os, sys, time
+import threading
+import codecs
 import gettext
 import subprocess
 import dbus
@@ -24,6 +28,10 @@ import dbus.mainloop.glib
 from gi.repository import GLib
 import logging
 
+from updater_dbus import session_client, SETTINGS
+from updater_upgrade_list import UpgradeListParser, UpgradeTableModel, parse_print_uris
+from updater_list_cache import load_upgrade_list
+
 # Set up the translation
 locale_dir = "/usr/share/locale"
 gettext.bindtextdomain('mx-updater', locale_dir)
@@ -51,24 +59,97 @@ VIEW_AND_UPGRADE_OBJECT_IFACE = "org.mxlinux.UpdaterViewAndUpgrade"
 AUTO_CLOSE_TIMEOUT_MIN =  1  # in seconds
 AUTO_CLOSE_TIMEOUT_MAX = 60  # in seconds
 
+UPDATER_LIST = "/usr/lib/mx-updater/bin/updater_list"
+LOG_FLUSH_MS   = 50      # batch output for this long before appending
+LOG_TIMEOUT_MS = 30_000  # kill updater_list after
+
 
-class LogUpdateThread(QThread):
-    log_ready = pyqtSignal(str)
+class LogUpdateReader(QObject):
+    """
+    Run updater_list and stream its output in batches
+    """
+    log_chunk = pyqtSignal(str)
+    log_finished = pyqtSignal(int)
 
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, args=None):
         super().__init__(parent)
+        self.args = list(args or [])
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._buffer = []
+        self._received = False
+        self._finished = False
+
+        self.process = QProcess(self)
+        self.process.setStandardErrorFile(QProcess.nullDevice())
+        self.process.readyReadStandardOutput.connect(self._on_ready_read)
+        self.process.finished.connect(self._on_finished)
+        self.process.errorOccurred.connect(self._on_error)
+
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(LOG_FLUSH_MS)
+        self._flush_timer.timeout.connect(self._flush)
+
+        self._timeout_timer = QTimer(self)
+        self._timeout_timer.setSingleShot(True)
+        self._timeout_timer.setInterval(LOG_TIMEOUT_MS)
+        self._timeout_timer.timeout.connect(self._on_timeout)
+
+    def start(self):
+        self.process.start(UPDATER_LIST, self.args)
+        self._timeout_timer.start()
+
+    def cancel(self):
+        """
+        Kill updater_list, nothing is emitted afterwards
+        """
+        self._finished = True
+        self._flush_timer.stop()
+        self._timeout_timer.stop()
+        if self.process.state() != QProcess.ProcessState.NotRunning:
+            self.process.kill()
+            self.process.waitForFinished(1000)
+
+    def _on_ready_read(self):
+        data = bytes(self.process.readAllStandardOutput())
+        text = self._decoder.decode(data)
+        if not text:
+            return
+        self._buffer.append(text)
+        if not self._received:
+            # first output at once, the rest in batches
+            self._received = True
+            self._flush()
+        elif not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def _flush(self):
+        if self._buffer and not self._finished:
+            self.log_chunk.emit("".join(self._buffer))
+        self._buffer = []
+
+    def _on_finished(self, exit_code, exit_status):
+        if self._finished:
+            return
+        self._timeout_timer.stop()
+        self._flush_timer.stop()
+        self._buffer.append(self._decoder.decode(b"", final=True))
+        self._flush()
+        self._finished = True
+        self.log_finished.emit(exit_code)
+
+    def _on_error(self, error):
+        if self._finished:
+            return
+        if error == QProcess.ProcessError.FailedToStart:
+            self._finished = True
+            self._timeout_timer.stop()
+            self.log_chunk.emit(f"Error: {self.process.errorString()}")
+            self.log_finished.emit(-1)
 
-    def run(self):
-        try:
-            command = [ "/usr/lib/mx-updater/bin/updater_list" ]
-            result = subprocess.run(command, 
-                                    capture_output=True, 
-                                    text=True, 
-                                    timeout=30)
-            log_text = result.stdout
-            self.log_ready.emit(log_text)
-        except Exception as e:
-            self.log_ready.emit(f"Error: {str(e)}")
+    def _on_timeout(self):
+        logger.debug("[LogUpdateReader] %s timed out, killed", UPDATER_LIST)
+        self.process.kill()
 
 
 
@@ -83,6 +164,7 @@ class ViewAndUpgradeService(dbus.service.Object):
         # QObject wrapper for emitting Qt signals
         class _Emitter(QObject):
             value_changed_qt = pyqtSignal(str, str)
+            values_changed_qt = pyqtSignal(dict)
         self._emitter = _Emitter()
 
     # Expose the Qt signal for others to connect to
@@ -90,6 +172,10 @@ class ViewAndUpgradeService(dbus.service.Object):
     def value_changed_qt(self):
         return self._emitter.value_changed_qt
 
+    @property
+    def values_changed_qt(self):
+        return self._emitter.values_changed_qt
+
     @dbus.service.method(VIEW_AND_UPGRADE_OBJECT_IFACE, in_signature='ss', out_signature='')
     def SetValue(self, key, value):
         if not key.strip():
@@ -101,6 +187,19 @@ class ViewAndUpgradeService(dbus.service.Object):
         # emit PyQt signal
         self._emitter.value_changed_qt.emit(key, value)
 
+    @dbus.service.method(VIEW_AND_UPGRADE_OBJECT_IFACE, in_signature='a{ss}', out_signature='')
+    def SetValues(self, values):
+        values = {str(key): str(value) for key, value in values.items() if key.strip()}
+        if not values:
+            return
+        # emit PyQt signal
+        self._emitter.values_changed_qt.emit(values)
+        # emit dbus signal for external clients
+        self.ValuesChanged(values)
+
+    @dbus.service.signal(VIEW_AND_UPGRADE_OBJECT_IFACE, signature="a{ss}")
+    def ValuesChanged(self, values): pass
+
     @dbus.service.signal(VIEW_AND_UPGRADE_OBJECT_IFACE, signature="")
     def Quit(self): pass
 
@@ -108,6 +207,9 @@ class ViewAndUpgradeService(dbus.service.Object):
 class ViewAndUpgradeDialog(QDialog):
     # PyQt signals
     value_changed_signal = pyqtSignal(str, str)
+    values_changed_signal = pyqtSignal(dict)
+    # request number and cached list, emitted from the loader thread
+    cached_list_loaded = pyqtSignal(int, str)
  
     def __init__(self, service, session_bus,
                 default_width=960, default_height=600):
@@ -120,12 +222,18 @@ class ViewAndUpgradeDialog(QDialog):
         self.qsettings = QSettings("MX-Linux", "mx-updater")
         self.qsettings_section = "Geometry_View_and_Upgrade"
         self.dbus_call_back = True       
+        # set while a SetValues batch is applied
+        self._batch_update = False
 
         # Connect service's PyQt signal
         self.service.value_changed_qt.connect(self.on_value_changed)
+        self.service.values_changed_qt.connect(self.on_values_changed)
 
         # Connect the value_changed_signal PyQt signal to the update_dialog method
         self.value_changed_signal.connect(self.update_dialog)
+        self.values_changed_signal.connect(self.update_dialog_values)
+        self.cached_list_loaded.connect(self.on_cached_list_loaded)
+        self._cache_request = 0
 
         self.init_ui()
         self.restore_dialog_geometry()
@@ -137,7 +245,33 @@ class ViewAndUpgradeDialog(QDialog):
         # Called when SetValue emits the 'value_changed_qt' PyQt signal
         self.value_changed_signal.emit(key, value)
 
+    def on_values_changed(self, values):
+        # Called when SetValues emits the 'values_changed_qt' PyQt signal
+        self.values_changed_signal.emit(values)
+
+    def update_dialog_values(self, values):
+        """
+        Apply a set of changes with a single settings write
+        and without calling back the settings dialog
+        """
+        me = "update_dialog_values@ViewAndUpgrade"
+        logger.debug("[%s] dialog updated with: %s", me, values)
+        self._batch_update = True
+        try:
+            for key, value in values.items():
+                self.update_dialog(key, value)
+        finally:
+            self._batch_update = False
+            self.dbus_call_back = True
+        self.qsettings.sync()
 
+    def persist_setting(self, key, value):
+        # changes of a SetValues batch are synced once at the end
+        self.qsettings.setValue(f"Settings/{key}", value)
+        if self._batch_update:
+            return False
+        self.qsettings.sync()
+        return True
 
     def update_dialog(self, key, value):
         # update view_and_upgrade dialog based key,value pair
@@ -268,41 +402,107 @@ class ViewAndUpgradeDialog(QDialog):
                     key,
                     value,
                     )
-        try:
-            # Connect to session bus
-            bus = dbus.SessionBus()
-            
-            try:
-                # dbus proxy object
-                proxy = bus.get_object(SETTINGS_OBJECT_NAME, SETTINGS_OBJECT_PATH)
-                
-                # dbus interface
-                interface = dbus.Interface(proxy, SETTINGS_OBJECT_IFACE)
-                
-                # dbus method call to update settings dialog with key/value
-                interface.SetValue(str(key), str(value))
-            
-            except dbus.exceptions.DBusException as e:
-                #print(f"UpdaterSettings dialog not running.: {e}")
-                logger.debug("[%s] UpdaterSettings dialog does not appear to be active.", me)
-                pass
-        
-        except Exception as e:
-            #print(f"Unexpected D-Bus error: {e}")
-            logger.error("[%s] Unexpected D-Bus error: %r", me, e)
-            pass
+        # dbus method call to update settings dialog with key/value
+        if not session_client(self.session_bus).set_value(SETTINGS, key, value):
+            logger.debug("[%s] UpdaterSettings dialog does not appear to be active.", me)
+
+
+    def start_log_update(self, use_cache=True):
+        # stream updater_list output into the log pane
+        self.cancel_log_update()
+        self._log_received = False
+        self.upgrade_parser = UpgradeListParser()
+        self.upgrade_model.clear()
+        self.upgrade_summary.clear()
+        if use_cache:
+            self.load_cached_upgrade_list()
+        else:
+            self.start_list_update()
 
+    def start_list_update(self):
+        self.log_reader = LogUpdateReader(self)
+        self.log_reader.log_chunk.connect(self.append_log_text)
+        self.log_reader.log_finished.connect(self.on_log_finished)
+        self.log_reader.start()
 
-    def start_log_update(self):
-        # create and start background thread
-        self.log_thread = LogUpdateThread()
-        self.log_thread.log_ready.connect(self.update_log_text)
-        self.log_thread.start()
+    def load_cached_upgrade_list(self):
+        """
+        Load the list saved by the system monitor with its last scan in
+        a thread, the release files are hashed to check it is still valid
+        """
+        upgrade_type = self.qsettings.value("Settings/upgrade_type", "full-upgrade", type=str)
+        upgrade_type = 'full-upgrade' if 'full' in upgrade_type or 'dist' in upgrade_type else 'basic-upgrade'
+        self._cache_request += 1
+        request = self._cache_request
+
+        def load():
+            self.cached_list_loaded.emit(request, load_upgrade_list(upgrade_type) or "")
+
+        threading.Thread(target=load, daemon=True).start()
 
-    def update_log_text(self, log_text):
-        # Update log text and enable close button
-        self.log.setPlainText(log_text)
+    def on_cached_list_loaded(self, request, log_text):
+        if request != self._cache_request:
+            # superseded by a reload
+            return
+        if not log_text:
+            self.start_list_update()
+            return
+        logger.debug("show cached upgrade list")
+        self.append_log_text(log_text)
+        self.on_log_finished(0)
+
+    def cancel_log_update(self):
+        # drop a pending cached list
+        self._cache_request += 1
+        for name in ("log_reader", "uris_reader"):
+            reader = getattr(self, name, None)
+            if reader is not None:
+                reader.cancel()
+                reader.deleteLater()
+                setattr(self, name, None)
+
+    def start_uris_update(self):
+        # download sizes and origins for the package table
+        self._uris_chunks = []
+        self.uris_reader = LogUpdateReader(self, ["--print-uris"])
+        self.uris_reader.log_chunk.connect(self._uris_chunks.append)
+        self.uris_reader.log_finished.connect(self.on_uris_finished)
+        self.uris_reader.start()
+
+    def on_uris_finished(self, exit_code):
+        info = parse_print_uris("".join(self._uris_chunks))
+        self._uris_chunks = []
+        self.upgrade_model.set_download_info(info)
+        self.update_upgrade_summary()
+
+    def update_upgrade_summary(self):
+        count = self.upgrade_model.record_count()
+        total_size = self.upgrade_model.total_size()
+        summary = f"{count} " + _("packages")
+        if total_size:
+            summary += f", {QLocale().formattedDataSize(total_size)}"
+        self.upgrade_summary.setText(summary)
+
+    def append_log_text(self, log_text):
+        if not self._log_received:
+            # replace the placeholder text
+            self._log_received = True
+            self.log.clear()
+        # append at the end without moving the view
+        cursor = QTextCursor(self.log.document())
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.insertText(log_text)
+        self.upgrade_model.append_records(self.upgrade_parser.feed(log_text))
+
+    def on_log_finished(self, exit_code):
+        # enable close button
+        logger.debug("updater_list finished with exit code %s", exit_code)
         self.close_button.setEnabled(True)
+        self.upgrade_model.append_records(self.upgrade_parser.finish())
+        self.upgrade_model.resort()
+        self.update_upgrade_summary()
+        if self.upgrade_model.record_count():
+            self.start_uris_update()
 
     def load_settings(self):
         self.qsettings.sync()
@@ -357,6 +557,8 @@ class ViewAndUpgradeDialog(QDialog):
         #self.setlog_text()
         self.log = QTextEdit()
         self.log.setReadOnly(True)
+        # output is appended in chunks, no undo stack needed
+        self.log.setUndoRedoEnabled(False)
         #self.log.setPlainText(self.log_text)
 
         # Set initial placeholder text
@@ -364,10 +566,66 @@ class ViewAndUpgradeDialog(QDialog):
         working=' [Working]'
         self.log.setPlainText(f"...{working}...")
 
+        # package table, sorted and filtered without re-parsing
+        headers = {
+            'package'  : _("Package"),
+            'installed': _("Installed"),
+            'candidate': _("Candidate"),
+            'status'   : _("Status"),
+            'size'     : _("Size"),
+            'origin'   : _("Origin"),
+        }
+        status_labels = {
+            'upgrade'  : _("upgrade"),
+            'new'      : _("new"),
+            'remove'   : _("remove"),
+            'downgrade': _("downgrade"),
+            'kept back': _("kept back"),
+        }
+        self.upgrade_model = UpgradeTableModel(headers, status_labels, self)
+        self.upgrade_view = QTableView()
+        self.upgrade_view.setModel(self.upgrade_model)
+        # sorted by package name
+        self.upgrade_view.horizontalHeader().setSortIndicator(0, Qt.SortOrder.AscendingOrder)
+        self.upgrade_view.setSortingEnabled(True)
+        self.upgrade_view.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.upgrade_view.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.upgrade_view.setAlternatingRowColors(True)
+        self.upgrade_view.setWordWrap(False)
+        # fixed row heights, no per row size calculation
+        vertical_header = self.upgrade_view.verticalHeader()
+        vertical_header.setVisible(False)
+        vertical_header.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        vertical_header.setDefaultSectionSize(self.fontMetrics().height() + 6)
+        horizontal_header = self.upgrade_view.horizontalHeader()
+        horizontal_header.setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+        horizontal_header.setStretchLastSection(True)
+        horizontal_header.resizeSection(0, 260)
+
+        self.upgrade_filter = QLineEdit()
+        self.upgrade_filter.setPlaceholderText(_("Filter packages"))
+        self.upgrade_filter.setClearButtonEnabled(True)
+        self.upgrade_filter.textChanged.connect(self.upgrade_model.set_filter)
+        self.upgrade_summary = QLabel()
+
+        filter_row = QHBoxLayout()
+        filter_row.addWidget(self.upgrade_filter, stretch=1)
+        filter_row.addWidget(self.upgrade_summary)
+
+        packages_page = QWidget()
+        packages_layout = QVBoxLayout(packages_page)
+        packages_layout.setContentsMargins(0, 0, 0, 0)
+        packages_layout.addLayout(filter_row)
+        packages_layout.addWidget(self.upgrade_view, stretch=1)
+
+        self.tabs = QTabWidget()
+        self.tabs.addTab(packages_page, _("Packages"))
+        self.tabs.addTab(self.log, _("Details"))
+
         # main outer vbox layout 
         outer = QVBoxLayout(self)
         # with stretch=1 to expand on vertical resize
-        outer.addWidget(self.log, stretch=1)
+        outer.addWidget(self.tabs, stretch=1)
 
         # 2 rows with 2 columns
         grid = QGridLayout()
@@ -501,25 +759,21 @@ class ViewAndUpgradeDialog(QDialog):
         self.close_button.clicked.connect(self.reject)
 
     def on_auto_close_timeout(self, value):
-        self.qsettings.setValue("Settings/auto_close_timeout", value)
-        self.qsettings.sync()
-        self.update_settings_dialog("auto_close_timeout", value)
+        if self.persist_setting("auto_close_timeout", value):
+            self.update_settings_dialog("auto_close_timeout", value)
 
     def on_upgrade_assume_yes_checkbox_toggled(self, checked):
-        self.qsettings.setValue("Settings/upgrade_assume_yes", checked)
-        self.qsettings.sync()
-        self.update_settings_dialog("upgrade_assume_yes", checked)
+        if self.persist_setting("upgrade_assume_yes", checked):
+            self.update_settings_dialog("upgrade_assume_yes", checked)
 
     def on_use_nala_checkbox_toggled(self, checked):
-        self.qsettings.setValue("Settings/use_nala", checked)
-        self.qsettings.sync()
-        self.update_settings_dialog("use_nala", checked)
+        if self.persist_setting("use_nala", checked):
+            self.update_settings_dialog("use_nala", checked)
 
     def on_auto_close_checkbox_toggled(self, checked):
         self.auto_close_timeout.setEnabled(checked)
-        self.qsettings.setValue("Settings/auto_close", checked)
-        self.qsettings.sync()
-        self.update_settings_dialog("auto_close", checked)
+        if self.persist_setting("auto_close", checked):
+            self.update_settings_dialog("auto_close", checked)
         
 
     def do_reload(self):
@@ -527,7 +781,7 @@ class ViewAndUpgradeDialog(QDialog):
         self.state = "do_reload"
         self.updater_reload_run()
         self.log.setPlainText("... working, please wait")
-        self.start_log_update()
+        self.start_log_update(use_cache=False)
         self.accept()
 
     def do_upgrade(self):
@@ -677,6 +931,8 @@ class ViewAndUpgradeDialog(QDialog):
 
 
     def done(self, result):
+        # stop a still running updater_list
+        self.cancel_log_update()
         # Save geometry when dialog is closed
         self.save_dialog_geometry()
         super().done(result)
@@ -0,0 +1,777 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Package history from the dpkg logs
+
+The install, upgrade, remove and purge lines of /var/log/dpkg.log*
+are parsed into compact records. Parse results are kept in a
+persistent index per log file, keyed by device and inode:
+
+- rotated logs never change, their records are reused as long as
+  size and mtime match, also after logrotate renamed dpkg.log to
+  dpkg.log.1
+- the live dpkg.log only grows between rotations, only the part
+  after the last parsed offset is read
+
+The index is a per-user cache, opening the history after the first
+run only costs a stat() per log file and loading the cache.
+
+iter_newest_first() streams records newest first and stops as soon
+as a limit or a start time is reached, plain logs are read backwards
+and compressed ones only if needed. HistoryQuery selects from all
+records by package glob, action, architecture and time range. Run as
+a script it is the backend of apt-history.
+
+The transactions of /var/log/apt/history.log* are kept in the same
+index together with their links to the dpkg records written between
+Start-Date and End-Date, as (dpkg log, first, last) record spans.
+Spans stay valid while the dpkg log exists, as its records are only
+appended, and are linked again once it is recompressed or deleted.
+"""
+
+import os
+import re
+import sys
+import gzip
+import json
+import logging
+import argparse
+import heapq
+from bisect import bisect_left, bisect_right
+from fnmatch import fnmatchcase
+from collections import namedtuple
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+DPKG_LOG_DIR = Path("/var/log")
+DPKG_LOG_NAME = "dpkg.log"
+APT_LOG_DIR = Path("/var/log/apt")
+APT_LOG_NAME = "history.log"
+
+CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "mx-updater"
+CACHE_FILE = CACHE_DIR / "apt-history-index.json"
+# bump on changes of the record layout
+CACHE_VERSION = 1
+
+ACTIONS = ("install", "upgrade", "remove", "purge")
+
+# "2024-05-01 10:11:12 upgrade libfoo:amd64 1.0-1 1.0-2"
+DPKG_LINE_RE = re.compile(
+    r"^(?P<date>\d{4}-\d\d-\d\d) (?P<time>\d\d:\d\d:\d\d) "
+    r"(?P<action>install|upgrade|remove|purge) "
+    r"(?P<package>\S+) (?P<old>\S+) (?P<new>\S+)\s*$"
+)
+
+# block size of backward reads
+REVERSE_BLOCK = 64 * 1024
+
+# package lists of history.log and their change name
+APT_CHANGES = {
+    "Install": "install",
+    "Upgrade": "upgrade",
+    "Downgrade": "downgrade",
+    "Reinstall": "reinstall",
+    "Remove": "remove",
+    "Purge": "purge",
+}
+
+# "name:arch (version, ...)" entries of a package list
+APT_PACKAGE_RE = re.compile(r"\([^()]*\)")
+
+HistoryRecord = namedtuple("HistoryRecord", "date time action package arch old new")
+
+
+def parse_dpkg_line(line: str) -> Optional[HistoryRecord]:
+    """
+    Record of a dpkg.log action line, None for any other line
+    """
+    match = DPKG_LINE_RE.match(line)
+    if not match:
+        return None
+    package, _, arch = match.group("package").partition(":")
+    return HistoryRecord(match.group("date"), match.group("time"), match.group("action"),
+                         package, arch, match.group("old"), match.group("new"))
+
+
+def parse_dpkg_lines(lines: Iterable[str]) -> List[HistoryRecord]:
+    records = []
+    for line in lines:
+        # cheap test before the regex, most lines are 'status' lines
+        if " status " in line or " configure " in line or " trigproc " in line:
+            continue
+        record = parse_dpkg_line(line)
+        if record is not None:
+            records.append(record)
+    return records
+
+
+def log_files(log_dir: Path = DPKG_LOG_DIR, name: str = DPKG_LOG_NAME) -> List[Tuple[int, Path]]:
+    """
+    Logs with their rotation number, newest first:
+    dpkg.log, dpkg.log.1, dpkg.log.2.gz, ...
+    """
+    rotated_re = re.compile(rf"^{re.escape(name)}(?:\.(\d+))?(\.gz)?$")
+    files = []
+    try:
+        entries = os.listdir(log_dir)
+    except OSError as e:
+        logger.debug("[log_files] %s: %r", log_dir, e)
+        return files
+    for entry in entries:
+        match = rotated_re.match(entry)
+        if match:
+            files.append((int(match.group(1) or 0), Path(log_dir) / entry))
+    files.sort(key=lambda item: item[0])
+    return files
+
+
+def _apt_time(value: str) -> str:
+    # "2024-05-01  10:11:12"
+    return " ".join(value.split())
+
+
+def parse_apt_history(lines: Iterable[str]) -> List[dict]:
+    """
+    Transactions of an apt history.log
+
+    :return: [{"start", "end", "commandline", "requested_by", "error",
+               "changes": {change: number of packages}}]
+    """
+    transactions = []
+    current = None
+    for line in lines:
+        line = line.rstrip("\n")
+        key, sep, value = line.partition(": ")
+        if not sep:
+            if current is not None and not line.strip():
+                transactions.append(current)
+                current = None
+            continue
+        if key == "Start-Date":
+            if current is not None:
+                transactions.append(current)
+            current = {"start": _apt_time(value), "end": "", "commandline": "",
+                       "requested_by": "", "error": "", "changes": {}}
+        elif current is None:
+            continue
+        elif key == "End-Date":
+            current["end"] = _apt_time(value)
+        elif key == "Commandline":
+            current["commandline"] = value
+        elif key == "Requested-By":
+            current["requested_by"] = value
+        elif key == "Error":
+            current["error"] = value
+        elif key in APT_CHANGES:
+            current["changes"][APT_CHANGES[key]] = len(APT_PACKAGE_RE.findall(value))
+    if current is not None:
+        transactions.append(current)
+    return transactions
+
+
+class AptTransaction:
+    """
+    One apt run with lazy access to its dpkg records
+    """
+    __slots__ = ("start", "end", "commandline", "requested_by", "error",
+                 "changes", "links", "_index")
+
+    def __init__(self, data: dict, index: "HistoryIndex"):
+        self.start = data.get("start", "")
+        self.end = data.get("end", "")
+        self.commandline = data.get("commandline", "")
+        self.requested_by = data.get("requested_by", "")
+        self.error = data.get("error", "")
+        self.changes = data.get("changes", {})
+        # [[dpkg index key, first, last + 1], ...]
+        self.links = data.get("links") or []
+        self._index = index
+
+    def record_count(self) -> int:
+        return sum(hi - lo for _, lo, hi in self.links)
+
+    def records(self) -> List[HistoryRecord]:
+        return self._index.linked_records(self.links)
+
+
+def _reverse_lines(path: Path, block: int = REVERSE_BLOCK) -> Iterator[str]:
+    """
+    Lines of a plain text file, last line first
+    """
+    with open(path, "rb") as f:
+        pos = f.seek(0, os.SEEK_END)
+        rest = b""
+        while pos > 0:
+            size = min(block, pos)
+            pos -= size
+            f.seek(pos)
+            lines = (f.read(size) + rest).split(b"\n")
+            # first line may continue in the previous block
+            rest = lines.pop(0)
+            for line in reversed(lines):
+                if line:
+                    yield line.decode("utf-8", errors="replace")
+        if rest:
+            yield rest.decode("utf-8", errors="replace")
+
+
+def _open_text(path: Path):
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    return open(path, "r", encoding="utf-8", errors="replace")
+
+
+class HistoryIndex:
+    """
+    Persistent per-file index of dpkg.log records
+    """
+
+    def __init__(self, log_dir: Path = DPKG_LOG_DIR, cache_file: Optional[Path] = CACHE_FILE):
+        self.log_dir = Path(log_dir)
+        self.cache_file = cache_file
+        # "dev:ino": {"kind": "dpkg", "size", "mtime", "offset", "records"}
+        #        or {"kind": "apt", "size", "mtime", "transactions"}
+        self._entries: Dict[str, dict] = {}
+        self._dirty = False
+        self.stats = {"reused": 0, "tail": 0, "parsed": 0}
+        # dpkg index key: record times, for linking
+        self._times: Dict[str, List[str]] = {}
+
+    # --- cache -----------------------------------------------------------
+    def load_cache(self):
+        if self.cache_file is None:
+            return
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.debug("[load_cache] %s: %r", self.cache_file, e)
+            return
+        if not isinstance(data, dict) or data.get("version") != CACHE_VERSION:
+            return
+        if data.get("log-dir") != str(self.log_dir):
+            return
+        entries = data.get("files")
+        if isinstance(entries, dict):
+            self._entries = entries
+
+    def save_cache(self):
+        if self.cache_file is None or not self._dirty:
+            return
+        data = {"version": CACHE_VERSION, "log-dir": str(self.log_dir), "files": self._entries}
+        tmp = self.cache_file.with_suffix(".tmp")
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp, self.cache_file)
+            self._dirty = False
+        except OSError as e:
+            logger.debug("[save_cache] %s: %r", self.cache_file, e)
+            try:
+                tmp.unlink()
+            except OSError:
+                pass
+
+    # --- index -----------------------------------------------------------
+    def file_records(self, path: Path) -> Tuple[str, List[list]]:
+        """
+        Records of one log file as lists, from the index where possible
+
+        :return: (index key, records)
+        """
+        me = "file_records"
+        st = os.stat(path)
+        key = f"{st.st_dev}:{st.st_ino}"
+        entry = self._entries.get(key)
+        compressed = path.suffix == ".gz"
+
+        if entry is not None and entry.get("kind", "dpkg") != "dpkg":
+            entry = None
+
+        if entry is not None and entry.get("size") == st.st_size \
+                and entry.get("mtime") == st.st_mtime_ns:
+            self.stats["reused"] += 1
+            return key, entry["records"]
+
+        if entry is not None and not compressed and st.st_size > entry.get("offset", 0) \
+                and entry.get("compressed") is False:
+            # live log has grown: parse the tail only
+            records, offset = self._parse_plain(path, entry["offset"])
+            entry["records"].extend(records)
+            entry.update(size=st.st_size, mtime=st.st_mtime_ns, offset=offset)
+            self._times.pop(key, None)
+            self._dirty = True
+            self.stats["tail"] += 1
+            logger.debug("[%s] %s: %d new records", me, path, len(records))
+            return key, entry["records"]
+
+        if compressed:
+            with _open_text(path) as f:
+                records = [list(r) for r in parse_dpkg_lines(f)]
+            offset = st.st_size
+        else:
+            records, offset = self._parse_plain(path, 0)
+        self._times.pop(key, None)
+        self._entries[key] = {
+            "kind": "dpkg",
+            "size": st.st_size,
+            "mtime": st.st_mtime_ns,
+            "offset": offset,
+            "compressed": compressed,
+            "records": records,
+        }
+        self._dirty = True
+        self.stats["parsed"] += 1
+        logger.debug("[%s] %s: %d records", me, path, len(records))
+        return key, records
+
+    def _parse_plain(self, path: Path, offset: int) -> Tuple[List[list], int]:
+        """
+        Parse complete lines from offset on
+
+        :return: (records, offset after the last complete line)
+        """
+        with open(path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+        end = data.rfind(b"\n") + 1
+        text = data[:end].decode("utf-8", errors="replace")
+        return [list(r) for r in parse_dpkg_lines(text.splitlines())], offset + end
+
+    def _prune(self, kind: str, keep: set):
+        """
+        Drop index entries of deleted logs
+        """
+        for key, entry in list(self._entries.items()):
+            if entry.get("kind", "dpkg") == kind and key not in keep:
+                del self._entries[key]
+                self._dirty = True
+
+    def file_transactions(self, path: Path) -> Tuple[str, List[dict]]:
+        """
+        Transactions of one apt history log, from the index where possible
+
+        :return: (index key, transactions)
+        """
+        st = os.stat(path)
+        key = f"{st.st_dev}:{st.st_ino}"
+        entry = self._entries.get(key)
+        if entry is not None and entry.get("kind") == "apt" \
+                and entry.get("size") == st.st_size and entry.get("mtime") == st.st_mtime_ns:
+            self.stats["reused"] += 1
+            return key, entry["transactions"]
+
+        with _open_text(path) as f:
+            transactions = parse_apt_history(f)
+        self._entries[key] = {
+            "kind": "apt",
+            "size": st.st_size,
+            "mtime": st.st_mtime_ns,
+            "transactions": transactions,
+        }
+        self._dirty = True
+        self.stats["parsed"] += 1
+        logger.debug("[file_transactions] %s: %d transactions", path, len(transactions))
+        return key, transactions
+
+    def _record_times(self, key: str) -> List[str]:
+        times = self._times.get(key)
+        if times is None:
+            times = [f"{r[0]} {r[1]}" for r in self._entries[key]["records"]]
+            self._times[key] = times
+        return times
+
+    def _link(self, transaction: dict) -> bool:
+        """
+        Link a finished transaction to the dpkg records of its time window
+
+        :return: True if the links changed
+        """
+        start, end = transaction.get("start"), transaction.get("end")
+        if not start or not end:
+            # still running or aborted
+            return False
+        links = transaction.get("links")
+        if links is not None and all(self._valid_span(key, lo, hi, start, end)
+                                     for key, lo, hi in links):
+            return False
+
+        links = []
+        for key, entry in self._entries.items():
+            if entry.get("kind", "dpkg") != "dpkg" or not entry["records"]:
+                continue
+            times = self._record_times(key)
+            if times[0] > end or times[-1] < start:
+                continue
+            lo = bisect_left(times, start)
+            hi = bisect_right(times, end)
+            if hi > lo:
+                links.append([key, lo, hi])
+        links.sort(key=lambda link: self._record_times(link[0])[link[1]])
+        transaction["links"] = links
+        return True
+
+    def _valid_span(self, key: str, lo: int, hi: int, start: str, end: str) -> bool:
+        """
+        A span still refers to records of the time window,
+        i.e. its dpkg log was not replaced in place
+        """
+        entry = self._entries.get(key)
+        if entry is None or entry.get("kind", "dpkg") != "dpkg":
+            return False
+        times = self._record_times(key)
+        return 0 <= lo < hi <= len(times) and start <= times[lo] and times[hi - 1] <= end
+
+    def linked_records(self, links) -> List[HistoryRecord]:
+        records = []
+        for key, lo, hi in links:
+            entry = self._entries.get(key)
+            if entry is not None:
+                records.extend(HistoryRecord(*r) for r in entry["records"][lo:hi])
+        return records
+
+    def transactions(self, apt_log_dir: Path = APT_LOG_DIR) -> List[AptTransaction]:
+        """
+        All apt transactions newest first, linked to the dpkg records
+
+        The dpkg entries have to be up to date, i.e. records() called first.
+        """
+        me = "transactions"
+        result: List[AptTransaction] = []
+        keep = set()
+        linked = 0
+        for _, path in log_files(apt_log_dir, APT_LOG_NAME):
+            try:
+                key, transactions = self.file_transactions(path)
+            except (OSError, EOFError) as e:
+                logger.debug("[%s] %s: %r", me, path, e)
+                continue
+            keep.add(key)
+            for transaction in reversed(transactions):
+                if self._link(transaction):
+                    linked += 1
+                result.append(AptTransaction(transaction, self))
+        self._prune("apt", keep)
+        if linked:
+            self._dirty = True
+        logger.debug("[%s] %d transactions, %d linked", me, len(result), linked)
+        result.sort(key=lambda t: t.start, reverse=True)
+        return result
+
+    def records(self) -> List[HistoryRecord]:
+        """
+        All records, oldest first
+        """
+        me = "records"
+        result: List[HistoryRecord] = []
+        keep = set()
+        # oldest file first
+        for _, path in reversed(log_files(self.log_dir)):
+            try:
+                key, records = self.file_records(path)
+            except (OSError, EOFError) as e:
+                logger.debug("[%s] %s: %r", me, path, e)
+                continue
+            keep.add(key)
+            result.extend(HistoryRecord(*r) for r in records)
+
+        self._prune("dpkg", keep)
+
+        # logs are in time order, this only fixes overlaps at rotation
+        result.sort(key=lambda r: (r.date, r.time))
+        return result
+
+
+def load_history(log_dir: Path = DPKG_LOG_DIR, cache_file: Optional[Path] = CACHE_FILE) -> List[HistoryRecord]:
+    """
+    All dpkg.log records, oldest first, with the persistent index updated
+    """
+    index = HistoryIndex(log_dir, cache_file)
+    index.load_cache()
+    records = index.records()
+    index.save_cache()
+    logger.debug("[load_history] %d records, files %s", len(records), index.stats)
+    return records
+
+
+def load_history_transactions(log_dir: Path = DPKG_LOG_DIR, apt_log_dir: Path = APT_LOG_DIR,
+                              cache_file: Optional[Path] = CACHE_FILE
+                              ) -> Tuple[List[HistoryRecord], List[AptTransaction]]:
+    """
+    All dpkg.log records oldest first and the apt transactions newest first
+    """
+    index = HistoryIndex(log_dir, cache_file)
+    index.load_cache()
+    records = index.records()
+    transactions = index.transactions(apt_log_dir)
+    index.save_cache()
+    logger.debug("[load_history_transactions] %d records, %d transactions, files %s",
+                 len(records), len(transactions), index.stats)
+    return records, transactions
+
+
+def package_matcher(pattern: Optional[str]) -> Optional[Callable[[HistoryRecord], bool]]:
+    """
+    Match records by package name glob, 'name:arch' globs include the architecture
+    """
+    if not pattern:
+        return None
+    if ":" in pattern:
+        return lambda r: fnmatchcase(f"{r.package}:{r.arch}", pattern)
+    return lambda r: fnmatchcase(r.package, pattern)
+
+
+def record_time(record: HistoryRecord) -> str:
+    return f"{record.date} {record.time}"
+
+
+def iter_newest_first(log_dir: Path = DPKG_LOG_DIR, since: Optional[str] = None,
+                      package: Optional[str] = None, limit: Optional[int] = None,
+                      cache_file: Optional[Path] = CACHE_FILE) -> Iterator[HistoryRecord]:
+    """
+    Stream records newest first
+
+    :param since: 'YYYY-MM-DD[ HH:MM:SS]', stop at older records
+    :param package: package name glob
+    :param limit: stop after this many records
+    """
+    me = "iter_newest_first"
+    match = package_matcher(package)
+    index = None
+    count = 0
+    try:
+        for _, path in log_files(log_dir):
+            try:
+                if path.suffix == ".gz":
+                    # decompress only once, then from the index
+                    if index is None:
+                        index = HistoryIndex(log_dir, cache_file)
+                        index.load_cache()
+                    _, rows = index.file_records(path)
+                    records = (HistoryRecord(*row) for row in reversed(rows))
+                else:
+                    records = (record for record in map(parse_dpkg_line, _reverse_lines(path))
+                               if record is not None)
+                for record in records:
+                    if since and record_time(record) < since:
+                        logger.debug("[%s] reached %s in %s", me, since, path)
+                        return
+                    if match is not None and not match(record):
+                        continue
+                    yield record
+                    count += 1
+                    if limit and count >= limit:
+                        return
+            except (OSError, EOFError) as e:
+                logger.debug("[%s] %s: %r", me, path, e)
+    finally:
+        if index is not None:
+            index.save_cache()
+
+
+def _is_glob(pattern: str) -> bool:
+    return any(c in pattern for c in "*?[")
+
+
+def _time_bound(value: Optional[str], end: bool = False) -> Optional[str]:
+    """
+    'YYYY-MM-DD' covers the whole day as an upper bound
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if end and len(value) == 10:
+        return f"{value} 23:59:59"
+    return value
+
+
+class HistoryQuery:
+    """
+    Structured queries over records sorted oldest first
+
+    Time ranges are found by binary search on the record times,
+    package lookups use a posting list of record positions per package.
+    """
+
+    def __init__(self, records: Sequence[HistoryRecord]):
+        self.records = records
+        self._times = [record_time(record) for record in records]
+        self._postings: Optional[Dict[str, List[int]]] = None
+
+    @classmethod
+    def load(cls, log_dir: Path = DPKG_LOG_DIR, cache_file: Optional[Path] = CACHE_FILE):
+        return cls(load_history(log_dir, cache_file))
+
+    def postings(self) -> Dict[str, List[int]]:
+        """
+        {package: ascending record positions}, built on first use
+        """
+        if self._postings is None:
+            postings: Dict[str, List[int]] = {}
+            for position, record in enumerate(self.records):
+                postings.setdefault(record.package, []).append(position)
+            self._postings = postings
+        return self._postings
+
+    def time_range(self, since: Optional[str] = None, until: Optional[str] = None) -> Tuple[int, int]:
+        """
+        Record positions [lo, hi) within since and until
+        """
+        since = _time_bound(since)
+        until = _time_bound(until, end=True)
+        lo = bisect_left(self._times, since) if since else 0
+        hi = bisect_right(self._times, until) if until else len(self._times)
+        return lo, max(lo, hi)
+
+    def _positions(self, package: Optional[str], lo: int, hi: int) -> Iterator[int]:
+        """
+        Ascending positions in [lo, hi) of packages matching a name or glob
+        """
+        if not package:
+            return iter(range(lo, hi))
+        name = package.partition(":")[0]
+        postings = self.postings()
+        if _is_glob(name):
+            lists = [positions for pkg, positions in postings.items() if fnmatchcase(pkg, name)]
+        else:
+            lists = [postings.get(name, [])]
+        ranges = [positions[bisect_left(positions, lo):bisect_left(positions, hi)]
+                  for positions in lists]
+        return heapq.merge(*[r for r in ranges if r])
+
+    def select(self, package: Optional[str] = None, actions: Optional[Iterable[str]] = None,
+               arch: Optional[str] = None, since: Optional[str] = None,
+               until: Optional[str] = None, newest_first: bool = True,
+               limit: Optional[int] = None) -> Iterator[HistoryRecord]:
+        """
+        Records matching all given filters
+
+        :param package: package name or glob, 'name:arch' also filters the architecture
+        :param actions: any of install, upgrade, remove, purge
+        :param arch: architecture, e.g. amd64 or all
+        :param since: 'YYYY-MM-DD[ HH:MM:SS]'
+        :param until: 'YYYY-MM-DD[ HH:MM:SS]', a date includes the whole day
+        """
+        if actions:
+            actions = set(actions)
+            unknown = actions.difference(ACTIONS)
+            if unknown:
+                raise ValueError(f"unknown action: {', '.join(sorted(unknown))}")
+        if package and ":" in package:
+            package, _, arch_glob = package.partition(":")
+            arch = arch or arch_glob
+
+        lo, hi = self.time_range(since, until)
+        positions = list(self._positions(package, lo, hi))
+        if newest_first:
+            positions.reverse()
+
+        records = self.records
+        count = 0
+        for position in positions:
+            record = records[position]
+            if actions and record.action not in actions:
+                continue
+            if arch and not fnmatchcase(record.arch, arch):
+                continue
+            yield record
+            count += 1
+            if limit and count >= limit:
+                return
+
+
+def write_columns(records: Iterable[HistoryRecord], out, widths: Sequence[int]) -> int:
+    """
+    Write records as aligned text columns in a single pass
+
+    :param out: text stream, e.g. io.StringIO or sys.stdout
+    :param widths: column widths, e.g. HistoryTableModel.column_widths()
+    :return: number of lines written
+    """
+    # the last column is not padded
+    line_format = "  ".join(f"{{:<{width}}}" for width in widths[:-1]) + "  {}\n"
+    write = out.write
+    count = 0
+    for record in records:
+        write(line_format.format(*record))
+        count += 1
+    return count
+
+
+def format_record(record: HistoryRecord) -> str:
+    """
+    apt-history line: date time action package:arch old new
+    """
+    package = f"{record.package}:{record.arch}" if record.arch else record.package
+    return f"{record.date} {record.time} {record.action:<7} {package} {record.old} {record.new}"
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(
+        prog="apt-history",
+        description="Installed, upgraded, removed and purged packages from the dpkg logs, newest first")
+    p.add_argument("pattern", nargs="*",
+                   help="only show lines matching these regular expressions")
+    # grep options of the former 'apt-history PATTERN' pipeline
+    p.add_argument("-i", "--ignore-case", action="store_true",
+                   help="match the patterns case insensitive")
+    p.add_argument("-v", "--invert-match", action="store_true",
+                   help="only show lines not matching the patterns")
+    p.add_argument("-n", "--limit", type=int, default=None,
+                   help="show at most LIMIT entries")
+    p.add_argument("-s", "--since", default=None,
+                   help="only show entries since 'YYYY-MM-DD[ HH:MM:SS]'")
+    p.add_argument("-u", "--until", default=None,
+                   help="only show entries until 'YYYY-MM-DD[ HH:MM:SS]'")
+    p.add_argument("-p", "--package", default=None,
+                   help="only show packages matching this glob, e.g. 'linux-image-*'")
+    p.add_argument("-a", "--action", action="append", choices=ACTIONS, default=None,
+                   help="only show this action, may be repeated")
+    p.add_argument("--arch", default=None,
+                   help="only show this architecture, e.g. amd64 or all")
+    p.add_argument("--debug", action="store_true",
+                   help="enable DEBUG logging")
+    return p.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.debug else logging.WARNING,
+                        format="%(levelname)s %(message)s")
+    flags = re.IGNORECASE if args.ignore_case else 0
+    patterns = [re.compile(pattern, flags) for pattern in args.pattern]
+
+    limit = None if patterns else args.limit
+    if args.package or args.until or args.action or args.arch:
+        # indexed query over all records
+        records = HistoryQuery.load().select(
+            package=args.package, actions=args.action, arch=args.arch,
+            since=args.since, until=args.until, limit=limit)
+    else:
+        # latest entries, streamed
+        records = iter_newest_first(since=args.since, limit=limit)
+    count = 0
+    try:
+        for record in records:
+            line = format_record(record)
+            if patterns and all(pattern.search(line) for pattern in patterns) == args.invert_match:
+                continue
+            sys.stdout.write(line + "\n")
+            count += 1
+            if args.limit and count >= args.limit:
+                break
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # pager quit early
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+    finally:
+        records.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
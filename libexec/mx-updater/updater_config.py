@@ -1,10 +1,13 @@
 #!/usr/bin/python3
 # -*- coding: utf-8 -*-
 
+import logging
 from PyQt6.QtCore import QSettings
 from typing import Dict, Any, Optional, List, Union, Type
 from pprint import pprint
 
+logger = logging.getLogger(__name__)
+
 class UpdaterSettingsManager:
     def __init__(self, application_name: str = 'mx-updater'):
         """
@@ -15,7 +18,7 @@ class UpdaterSettingsManager:
         # default settings section
         self.section = 'Settings'
         # Initialize QSettings
-        print(f'self.qsettings = QSettings("MX-Linux", "{application_name}")')
+        logger.debug('self.qsettings = QSettings("MX-Linux", "%s")', application_name)
         self.qsettings = QSettings("MX-Linux", application_name)
 
         # internal settings dictionary
@@ -51,6 +54,7 @@ class UpdaterSettingsManager:
                 'use_dbus_notifications' : True,
                 'use_nala' : False,
                 'hide_until_upgrades_available' : False,
+                'exit_while_hidden' : False,
                 #'''
                 #IconLook=wireframe-dark
                 #LeftClick=ViewAndUpgrade
@@ -134,8 +138,8 @@ class UpdaterSettingsManager:
         # Retrieve the raw value from QSettings section "Settings"
         stored_value = settings.value(f"Settings/{key}", default_value)
         if key == 'wireframe_transparent':
-            print(f"Debug: {key} : stored_value = {stored_value} stored_value-type {type(stored_value).__name__}")
-            print(f"Debug: default_type {default_type}")
+            logger.debug("%s : stored_value = %r stored_value-type %s", key, stored_value, type(stored_value).__name__)
+            logger.debug("default_type %s", default_type)
         # Handle type conversion for boolean values
         if default_type is bool:
 
@@ -145,7 +149,7 @@ class UpdaterSettingsManager:
             # return as is if already a bool 
             if isinstance(stored_value, bool):
                 if key == 'wireframe_transparent':
-                    print(f"return as is if already a bool: {stored_value}")
+                    logger.debug("return as is if already a bool: %r", stored_value)
                 return stored_value
     
             # check trueness for numeric values (int or float), 
@@ -156,38 +160,37 @@ class UpdaterSettingsManager:
             if isinstance(stored_value, str):
 
                 if key == 'wireframe_transparent':
-                    print(f"Debug: {key} : stored_value = {stored_value}") 
-                    print(f"Debug: default_type {default_type}")
+                    logger.debug("%s : stored_value = %r", key, stored_value)
+                    logger.debug("default_type %s", default_type)
 
 
                 try:
                     # Try converting to int first
                     numeric_value = int(stored_value.strip())
                     if key == 'wireframe_transparent':
-                        print(f"Try converting to int first: {numeric_value} -> {bool(numeric_value)}")
+                        logger.debug("Try converting to int first: %r -> %r", numeric_value, bool(numeric_value))
                     return bool(numeric_value)
                 except ValueError:
                     if key == 'wireframe_transparent':
-                        print(f"Debug Try Int Except: {key} : stored_value = {stored_value}") 
+                        logger.debug("Try Int Except: %s : stored_value = %r", key, stored_value)
                     try:
                         # If int conversion fails, try float
                         numeric_value = float(stored_value.strip())
                         return bool(numeric_value)
                     except ValueError:
                         if key == 'wireframe_transparent':
-                            print(f"Debug Try float Except : {key} : stored_value = {stored_value}")
-                            ret = stored_value.strip().lower() in ['true', 'yes']
-                            print(f"Debug Try float return : {ret}") 
-                            
+                            logger.debug("Try float Except : %s : stored_value = %r", key, stored_value)
+                            logger.debug("Try float return : %r", stored_value.strip().lower() in ['true', 'yes'])
+
                         # If numeric conversion fails, check string "trueness"
                         return stored_value.strip().lower() in ['true', 'yes']
                 if key == 'wireframe_transparent':
-                    print(f"Debug Try: {key} : stored_value = {stored_value}") 
+                    logger.debug("Try: %s : stored_value = %r", key, stored_value)
 
         
             # Fallback to default
             if key == 'wireframe_transparent':
-                print(f"Fallback to default: {default_value}")
+                logger.debug("Fallback to default: %r", default_value)
             return default_value
         
         # Handle type conversion for integer values
@@ -272,7 +275,7 @@ class UpdaterSettingsManager:
                 continue
             
             # Load each setting, using section defaults
-            print(f"DEBUG: self.load_setting('{self.section}', '{key}')")
+            logger.debug("self.load_setting('%s', '%s')", self.section, key)
             self.load_setting(key)
         
         return self.settings.get(self.section, {})
@@ -333,29 +336,129 @@ class UpdaterSettingsManager:
 
     def is_fluxbox_running(self):
         """
-        Detect if Fluxbox is running by checking pidof or pgrep
-        
+        Detect if Fluxbox is running
+
         Returns:
             bool: True if Fluxbox is running, False otherwise
         """
-        import os
-        try:
-            # Check for pidof first
-            if os.path.isfile('/usr/bin/pidof') and os.access('/usr/bin/pidof', os.X_OK):
-                result = os.system('/usr/bin/pidof fluxbox > /dev/null 2>&1')
-                return result == 0
-            
-            # Fallback to pgrep
-            if os.path.isfile('/usr/bin/pgrep') and os.access('/usr/bin/pgrep', os.X_OK):
-                result = os.system('/usr/bin/pgrep fluxbox > /dev/null 2>&1')
-                return result == 0
-            
-            # No suitable command found
-            return False
-        
-        except Exception:
+        from updater_desktop import is_fluxbox
+        return is_fluxbox()
+
+
+class UpdaterSettingsStore(UpdaterSettingsManager):
+    """
+    Typed in-memory settings cache on top of UpdaterSettingsManager.
+
+    Settings are read from QSettings once. Reads are served from memory,
+    changes go through set_value() and are written back in one batch
+    after flush_delay ms without further changes.
+    """
+
+    true_values = ('true', 'yes', 'on', '1')
+
+    def __init__(self, application_name: str = 'mx-updater', flush_delay: int = 500):
+        super().__init__(application_name)
+        self.values: Dict[str, Any] = dict(self.load_all_settings())
+        self._listeners: List[Any] = []
+        self._dirty = set()
+        self._flush_delay = flush_delay
+        self._flush_timer = None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        Get a cached setting value, no disk access
+        """
+        return self.values.get(key, default)
+
+    def add_listener(self, callback):
+        """
+        Register callback(key, value) called for every changed value
+        """
+        self._listeners.append(callback)
+
+    def coerce_value(self, key: str, value: Any) -> Any:
+        """
+        Convert a value, e.g. a string received via D-Bus,
+        to the type of the key's default value
+
+        :param key: settings key
+        :param value: raw value
+        :return: typed and validated value
+        """
+        defaults_section = self.defaults.get(self.section, {})
+        default_value = defaults_section.get(key)
+
+        if isinstance(default_value, bool):
+            if isinstance(value, str):
+                value = value.strip().lower() in self.true_values
+            else:
+                value = bool(value)
+        elif isinstance(default_value, int):
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                value = default_value
+        elif isinstance(default_value, str):
+            value = str(value)
+
+        allowed_values = defaults_section.get(f"{key}_allowed")
+        if allowed_values and value not in allowed_values:
+            value = default_value
+
+        return value
+
+    def set_value(self, key: str, value: Any, persist: bool = True) -> bool:
+        """
+        Update a setting in memory, notify listeners and
+        schedule a batched write to QSettings
+
+        :param key: settings key
+        :param value: new value
+        :param persist: False if the value is already stored,
+                        e.g. written by the process which sent it
+        :return: True if the value has changed
+        """
+        value = self.coerce_value(key, value)
+        if key in self.values and self.values[key] == value:
             return False
-    
+
+        self.values[key] = value
+        self.settings.setdefault(self.section, {})[key] = value
+
+        if persist:
+            self._dirty.add(key)
+            self._schedule_flush()
+
+        for callback in self._listeners:
+            callback(key, value)
+        return True
+
+    def _schedule_flush(self):
+        if self._flush_timer is None:
+            from PyQt6.QtCore import QTimer
+            self._flush_timer = QTimer()
+            self._flush_timer.setSingleShot(True)
+            self._flush_timer.setInterval(self._flush_delay)
+            self._flush_timer.timeout.connect(self.flush)
+        self._flush_timer.start()
+
+    def flush(self):
+        """
+        Write all pending changes to QSettings with a single sync
+        """
+        if self._flush_timer is not None:
+            self._flush_timer.stop()
+        if not self._dirty:
+            return
+
+        for key in sorted(self._dirty):
+            value = self.values[key]
+            if isinstance(value, bool):
+                value = 'true' if value else 'false'
+            self.qsettings.setValue(f"{self.section}/{key}", value)
+        self._dirty.clear()
+        self.qsettings.sync()
+
 
 from PyQt6.QtCore import QSettings
 from pprint import pprint
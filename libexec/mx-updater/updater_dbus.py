@@ -0,0 +1,205 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Shared session bus client for the MX Updater GUI components
+
+One bus connection per process, one proxy interface per service
+and name owner tracking, so calls to services which are not
+running are skipped at once instead of running into a timeout.
+"""
+
+import logging
+from functools import partial
+from typing import Any, Dict, Optional, Tuple
+
+import dbus
+import dbus.mainloop.glib
+
+logger = logging.getLogger(__name__)
+
+# service : (bus name, object path, interface)
+SETTINGS = (
+    "org.mxlinux.UpdaterSettings",
+    "/org/mxlinux/UpdaterSettings",
+    "org.mxlinux.UpdaterSettings",
+)
+TRAYICON = (
+    "org.mxlinux.UpdaterSystemTrayIcon",
+    "/org/mxlinux/UpdaterSystemTrayIcon",
+    "org.mxlinux.UpdaterSystemTrayIcon",
+)
+VIEW_AND_UPGRADE = (
+    "org.mxlinux.UpdaterViewAndUpgrade",
+    "/org/mxlinux/UpdaterViewAndUpgrade",
+    "org.mxlinux.UpdaterViewAndUpgrade",
+)
+
+# errors meaning the peer has gone
+PEER_GONE_ERRORS = (
+    "org.freedesktop.DBus.Error.ServiceUnknown",
+    "org.freedesktop.DBus.Error.NameHasNoOwner",
+    "org.freedesktop.DBus.Error.NoReply",
+    "org.freedesktop.DBus.Error.Disconnected",
+)
+
+# method call timeout in seconds
+CALL_TIMEOUT = 2.0
+
+
+class UpdaterDBusClient:
+    """
+    Cached proxies per service with name owner tracking
+    """
+
+    def __init__(self, bus=None):
+        if bus is None:
+            # name owner tracking needs a main loop
+            bus = dbus.SessionBus(mainloop=dbus.mainloop.glib.DBusGMainLoop())
+        self.bus = bus
+        self._interfaces: Dict[Tuple[str, str, str], dbus.Interface] = {}
+        self._owners: Dict[str, str] = {}
+        self._watches: Dict[str, Any] = {}
+
+    def _track(self, name: str):
+        """
+        Start name owner tracking, only the first lookup is a round trip
+        """
+        if name in self._owners:
+            return
+        try:
+            self._owners[name] = str(self.bus.get_name_owner(name))
+        except dbus.exceptions.DBusException:
+            self._owners[name] = ""
+        try:
+            self._watches[name] = self.bus.watch_name_owner(
+                name, partial(self._on_name_owner_changed, name))
+        except dbus.exceptions.DBusException as e:
+            logger.debug("[%s] watch_name_owner %s failed: %r", "_track", name, e)
+
+    def _on_name_owner_changed(self, name: str, new_owner: str):
+        old_owner = self._owners.get(name, "")
+        self._owners[name] = str(new_owner)
+        if old_owner != new_owner:
+            # proxies are bound to the unique name of the old owner
+            self._drop(name)
+
+    def _drop(self, name: str):
+        for key in [key for key in self._interfaces if key[0] == name]:
+            del self._interfaces[key]
+
+    def is_running(self, name: str) -> bool:
+        """
+        True if the service name has an owner
+        """
+        self._track(name)
+        return bool(self._owners.get(name))
+
+    def get_interface(self, name: str, path: str, iface: str) -> dbus.Interface:
+        key = (name, path, iface)
+        interface = self._interfaces.get(key)
+        if interface is None:
+            proxy = self.bus.get_object(name, path, introspect=False)
+            interface = dbus.Interface(proxy, iface)
+            self._interfaces[key] = interface
+        return interface
+
+    def call(self, service: Tuple[str, str, str], method: str, *args,
+             ignore_reply: bool = False) -> Optional[Any]:
+        """
+        Call a method of a service
+
+        :param service: (bus name, object path, interface), e.g. TRAYICON
+        :param method: method name
+        :param ignore_reply: don't wait for the reply
+        :return: method result or None if the service is not running
+        :raises dbus.exceptions.DBusException: on call errors
+        """
+        me = "call"
+        name, path, iface = service
+        if not self.is_running(name):
+            logger.debug("[%s] %s not running, skip %s", me, name, method)
+            return None
+
+        interface = self.get_interface(name, path, iface)
+        dbus_method = interface.get_dbus_method(method)
+        try:
+            if ignore_reply:
+                return dbus_method(*args, ignore_reply=True)
+            return dbus_method(*args, timeout=CALL_TIMEOUT)
+        except dbus.exceptions.DBusException as e:
+            if e.get_dbus_name() in PEER_GONE_ERRORS:
+                self._owners[name] = ""
+                self._drop(name)
+            raise
+
+    def set_value(self, service: Tuple[str, str, str], key: str, value: Any) -> bool:
+        """
+        SetValue(key, value) on a service without waiting for the reply
+
+        :return: False if the service is not running
+        """
+        me = "set_value"
+        try:
+            if not self.is_running(service[0]):
+                return False
+            self.call(service, "SetValue", str(key), str(value), ignore_reply=True)
+            # make sure the message is sent, even if the caller exits next
+            self.bus.flush()
+            return True
+        except dbus.exceptions.DBusException as e:
+            logger.debug("[%s] %s SetValue(%s, %s) failed: %r", me, service[0], key, value, e)
+            return False
+
+    def set_values(self, service: Tuple[str, str, str], values: Dict[str, Any]) -> bool:
+        """
+        SetValues(a{ss}) on a service, one message for all changes.
+        Peers without SetValues get one SetValue per key.
+
+        :return: False if the service is not running
+        """
+        me = "set_values"
+        values = {str(key): str(value) for key, value in values.items()}
+        if not values:
+            return True
+        if not self.is_running(service[0]):
+            return False
+        if len(values) == 1:
+            key, value = next(iter(values.items()))
+            return self.set_value(service, key, value)
+
+        def on_reply():
+            pass
+
+        def on_error(e):
+            if e.get_dbus_name() == "org.freedesktop.DBus.Error.UnknownMethod":
+                logger.debug("[%s] %s has no SetValues, use SetValue", me, service[0])
+                for key, value in values.items():
+                    self.set_value(service, key, value)
+            else:
+                logger.debug("[%s] %s SetValues failed: %r", me, service[0], e)
+
+        try:
+            interface = self.get_interface(*service)
+            interface.get_dbus_method("SetValues")(
+                dbus.Dictionary(values, signature='ss'),
+                reply_handler=on_reply, error_handler=on_error)
+            return True
+        except dbus.exceptions.DBusException as e:
+            logger.debug("[%s] %s SetValues failed: %r", me, service[0], e)
+            return False
+
+
+_session_client: Optional[UpdaterDBusClient] = None
+
+
+def session_client(bus=None) -> UpdaterDBusClient:
+    """
+    Process wide client on the session bus
+
+    :param bus: session bus to use on first call,
+                by default a new one with a GLib main loop
+    """
+    global _session_client
+    if _session_client is None:
+        _session_client = UpdaterDBusClient(bus)
+    return _session_client
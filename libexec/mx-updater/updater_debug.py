@@ -0,0 +1,217 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Memory and CPU statistics of a long running MX Updater process
+
+Used by the D-Bus debug methods of the systray icon to find
+leaking handlers without attaching a profiler, e.g.:
+
+  qdbus6 org.mxlinux.UpdaterSystemTrayIcon /org/mxlinux/UpdaterSystemTrayIcon \\
+         org.mxlinux.UpdaterSystemTrayIcon.TakeDebugSnapshot before
+  qdbus6 ... TakeDebugSnapshot after
+  qdbus6 ... DiffDebugSnapshots before after
+
+Python heap allocations are included if tracemalloc is tracing,
+e.g. started with PYTHONTRACEMALLOC=25 or '--tracemalloc'.
+"""
+
+import gc
+import os
+import time
+import threading
+import tracemalloc
+from collections import Counter
+from typing import Any, Dict, Iterable
+
+# number of entries in top lists
+TOP_N = 15
+
+
+def process_stats() -> Dict[str, Any]:
+    """
+    RSS, peak RSS and CPU times from /proc/self
+    """
+    stats: Dict[str, Any] = {}
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                if name in ("VmRSS", "VmHWM", "VmSize", "RssAnon", "RssFile"):
+                    # kB
+                    stats[name] = int(value.split()[0])
+    except (OSError, ValueError, IndexError):
+        pass
+
+    times = os.times()
+    stats["cpu_user_s"] = round(times.user, 3)
+    stats["cpu_system_s"] = round(times.system, 3)
+    stats["threads"] = threading.active_count()
+    try:
+        stats["open_fds"] = len(os.listdir("/proc/self/fd"))
+    except OSError:
+        pass
+    return stats
+
+
+def python_stats() -> Dict[str, Any]:
+    """
+    Garbage collector counters and, if tracing, tracemalloc totals
+    """
+    objects = gc.get_objects()
+    stats: Dict[str, Any] = {
+        "gc_objects": len(objects),
+        "gc_count": list(gc.get_count()),
+        "gc_garbage": len(gc.garbage),
+        "types": dict(Counter(type(obj).__name__ for obj in objects).most_common(TOP_N)),
+    }
+    del objects
+
+    stats["tracemalloc"] = tracemalloc.is_tracing()
+    if tracemalloc.is_tracing():
+        current, peak = tracemalloc.get_traced_memory()
+        stats["traced_current"] = current
+        stats["traced_peak"] = peak
+        stats["traced_top"] = [
+            str(stat) for stat in
+            tracemalloc.take_snapshot().statistics("lineno")[:TOP_N]
+        ]
+    return stats
+
+
+def qobject_counts() -> Dict[str, int]:
+    """
+    Live QObject wrappers per class
+    """
+    from PyQt6.QtCore import QObject
+
+    counts = Counter()
+    for obj in gc.get_objects():
+        try:
+            if isinstance(obj, QObject):
+                counts[type(obj).__name__] += 1
+        except ReferenceError:
+            continue
+    return dict(counts.most_common())
+
+
+def qt_signal_receivers(obj) -> Dict[str, int]:
+    """
+    Connected slots per pyqtSignal of a QObject
+    """
+    from PyQt6.QtCore import pyqtBoundSignal
+
+    receivers = {}
+    for name in dir(type(obj)):
+        try:
+            signal = getattr(obj, name)
+        except Exception:
+            continue
+        if isinstance(signal, pyqtBoundSignal):
+            try:
+                receivers[name] = obj.receivers(signal)
+            except (TypeError, RuntimeError):
+                continue
+    return receivers
+
+
+def dbus_signal_handlers(bus) -> int:
+    """
+    Number of signal receivers registered on a dbus-python connection
+    """
+    count = 0
+    # {path: {interface: {member: [match, ...]}}}
+    by_path = getattr(bus, "_signal_recipients_by_object_path", {})
+    for by_iface in list(by_path.values()):
+        for by_member in list(by_iface.values()):
+            for matches in list(by_member.values()):
+                count += len(matches)
+    return count
+
+
+def notify2_stats(notify2) -> Dict[str, Any]:
+    """
+    Notification objects held by notify2, None if not loaded
+    """
+    if notify2 is None:
+        return {"loaded": False}
+    notifications = getattr(notify2, "notifications", {})
+    return {
+        "loaded": True,
+        "notifications": len(notifications),
+        "ids": sorted(int(nid) for nid in notifications),
+    }
+
+
+def _numbers(data: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    """
+    Flatten the numeric values of nested dicts into 'a.b.c' keys
+    """
+    flat = {}
+    for key, value in data.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, bool):
+            continue
+        if isinstance(value, (int, float)):
+            flat[name] = value
+        elif isinstance(value, dict):
+            flat.update(_numbers(value, f"{name}."))
+    return flat
+
+
+class DebugSnapshots:
+    """
+    Named snapshots of collected statistics and their differences
+    """
+
+    def __init__(self, max_snapshots: int = 10):
+        self.max_snapshots = max_snapshots
+        # name: (time, stats, tracemalloc snapshot or None)
+        self._snapshots: Dict[str, tuple] = {}
+
+    def names(self) -> Iterable[str]:
+        return list(self._snapshots)
+
+    def take(self, name: str, stats: Dict[str, Any]) -> Dict[str, Any]:
+        trace = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+        self._snapshots.pop(name, None)
+        self._snapshots[name] = (time.time(), stats, trace)
+        # drop the oldest ones
+        while len(self._snapshots) > self.max_snapshots:
+            del self._snapshots[next(iter(self._snapshots))]
+        return {"name": name, "snapshots": list(self._snapshots)}
+
+    def diff(self, old: str, new: str) -> Dict[str, Any]:
+        """
+        Changed numbers from snapshot 'old' to 'new' and,
+        if both have tracemalloc data, the top growing allocations
+        """
+        if old not in self._snapshots or new not in self._snapshots:
+            missing = [name for name in (old, new) if name not in self._snapshots]
+            return {"error": f"unknown snapshot: {', '.join(missing)}",
+                    "snapshots": list(self._snapshots)}
+
+        old_time, old_stats, old_trace = self._snapshots[old]
+        new_time, new_stats, new_trace = self._snapshots[new]
+        old_numbers = _numbers(old_stats)
+        new_numbers = _numbers(new_stats)
+
+        changed = {}
+        for key in sorted(set(old_numbers) | set(new_numbers)):
+            before = old_numbers.get(key, 0)
+            after = new_numbers.get(key, 0)
+            if before != after:
+                changed[key] = {"old": before, "new": after, "delta": after - before}
+
+        result: Dict[str, Any] = {
+            "old": old,
+            "new": new,
+            "seconds": round(new_time - old_time, 3),
+            "changed": changed,
+        }
+        if old_trace is not None and new_trace is not None:
+            result["traced_top"] = [
+                str(stat) for stat in
+                new_trace.compare_to(old_trace, "lineno")[:TOP_N]
+            ]
+        return result
+
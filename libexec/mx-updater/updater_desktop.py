@@ -0,0 +1,216 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Desktop environment detection for MX Updater
+
+The running desktop is detected from environment variables and
+a single scan of the user's processes in /proc. The result is
+cached per login session in $XDG_RUNTIME_DIR, so updater processes
+can start without forking pgrep or pidof.
+"""
+
+import os
+import json
+from pathlib import Path
+from typing import Dict, FrozenSet, Optional
+
+# desktop : environment indicators and process names
+# environment indicator: (variable, value) compared lower case
+DESKTOPS = {
+    'plasma' : {
+        'env' : (('DESKTOP_SESSION', 'plasma'),
+                 ('XDG_CURRENT_DESKTOP', 'kde'),
+                 ('KDE_FULL_SESSION', 'true')),
+        'proc' : ('plasmashell',),
+        },
+    'fluxbox' : {
+        'env' : (('DESKTOP_SESSION', 'fluxbox'),
+                 ('XDG_SESSION_DESKTOP', 'fluxbox'),
+                 ('GDMSESSION', 'fluxbox')),
+        'proc' : ('fluxbox',),
+        },
+    'xfce' : {
+        'env' : (('DESKTOP_SESSION', 'xfce'),
+                 ('XDG_CURRENT_DESKTOP', 'xfce'),
+                 ('XDG_SESSION_DESKTOP', 'xfce')),
+        'proc' : ('xfce4-session', 'xfce4-panel'),
+        },
+    'gnome' : {
+        'env' : (('XDG_CURRENT_DESKTOP', 'gnome'),
+                 ('XDG_SESSION_DESKTOP', 'gnome')),
+        'proc' : ('gnome-shell',),
+        },
+    'lxqt' : {
+        'env' : (('XDG_CURRENT_DESKTOP', 'lxqt'),),
+        'proc' : ('lxqt-session',),
+        },
+    'icewm' : {
+        'env' : (('DESKTOP_SESSION', 'icewm'),
+                 ('XDG_SESSION_DESKTOP', 'icewm')),
+        'proc' : ('icewm-session', 'icewm'),
+        },
+    }
+
+CACHE_NAME = "mx-updater-desktop.json"
+
+# per process result
+_detected: Optional[FrozenSet[str]] = None
+
+
+def _session_key() -> str:
+    """
+    Identify the login session: boot id, session id and display
+    """
+    try:
+        boot_id = Path("/proc/sys/kernel/random/boot_id").read_text().strip()
+    except OSError:
+        boot_id = ""
+    parts = [boot_id] + [os.environ.get(name, "") for name in
+                         ('XDG_SESSION_ID', 'DISPLAY', 'WAYLAND_DISPLAY')]
+    return ":".join(parts)
+
+
+def _cache_path() -> Optional[Path]:
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if not runtime_dir or not os.path.isdir(runtime_dir):
+        return None
+    return Path(runtime_dir) / CACHE_NAME
+
+
+def _from_environment() -> set:
+    desktops = set()
+    for desktop, indicators in DESKTOPS.items():
+        for name, value in indicators['env']:
+            if os.environ.get(name, '').lower() == value:
+                desktops.add(desktop)
+                break
+    return desktops
+
+
+def _scan_proc() -> Dict[str, int]:
+    """
+    Scan /proc once for processes of the current user
+    and return the matching desktop with the pid found
+    """
+    wanted = {}
+    for desktop, indicators in DESKTOPS.items():
+        for comm in indicators['proc']:
+            wanted[comm] = desktop
+
+    uid = os.getuid()
+    found = {}
+    try:
+        entries = os.scandir('/proc')
+    except OSError:
+        return found
+
+    with entries:
+        for entry in entries:
+            if not entry.name.isdigit():
+                continue
+            try:
+                if entry.stat().st_uid != uid:
+                    continue
+                with open(f"/proc/{entry.name}/comm") as f:
+                    comm = f.read().strip()
+            except OSError:
+                # process has gone
+                continue
+            desktop = wanted.get(comm)
+            if desktop and desktop not in found:
+                found[desktop] = int(entry.name)
+    return found
+
+
+def _pid_alive(pid: int, desktop: str) -> bool:
+    try:
+        with open(f"/proc/{pid}/comm") as f:
+            comm = f.read().strip()
+    except OSError:
+        return False
+    return comm in DESKTOPS.get(desktop, {}).get('proc', ())
+
+
+def _load_cache(session_key: str) -> Optional[FrozenSet[str]]:
+    path = _cache_path()
+    if path is None:
+        return None
+    try:
+        with path.open() as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(cache, dict) or cache.get('session') != session_key:
+        return None
+
+    # desktop processes found by the scan need to be still alive
+    pids = cache.get('pids', {})
+    if not all(_pid_alive(pid, desktop) for desktop, pid in pids.items()):
+        return None
+
+    return frozenset(cache.get('desktops', []))
+
+
+def _save_cache(session_key: str, desktops: FrozenSet[str], pids: Dict[str, int]):
+    path = _cache_path()
+    if path is None:
+        return
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump({'session': session_key,
+                       'desktops': sorted(desktops),
+                       'pids': pids}, f)
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+
+
+def detect_desktops(use_cache: bool = True) -> FrozenSet[str]:
+    """
+    Detect running desktops, e.g. frozenset({'xfce'})
+
+    :param use_cache: use the per session cache in XDG_RUNTIME_DIR
+    :return: set of desktop names from DESKTOPS
+    """
+    global _detected
+    if use_cache and _detected is not None:
+        return _detected
+
+    session_key = _session_key()
+    if use_cache:
+        cached = _load_cache(session_key)
+        if cached is not None:
+            _detected = cached
+            return _detected
+
+    pids = _scan_proc()
+    desktops = frozenset(_from_environment() | set(pids))
+
+    # nothing found could mean the desktop is not started yet,
+    # don't keep that for the rest of the session
+    if desktops:
+        _save_cache(session_key, desktops, pids)
+    _detected = desktops
+    return _detected
+
+
+def is_plasma() -> bool:
+    return 'plasma' in detect_desktops()
+
+
+def is_fluxbox() -> bool:
+    return 'fluxbox' in detect_desktops()
+
+
+def is_xfce() -> bool:
+    return 'xfce' in detect_desktops()
+
+
+if __name__ == '__main__':
+    print(" ".join(sorted(detect_desktops(use_cache=False))))
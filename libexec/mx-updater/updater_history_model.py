@@ -0,0 +1,223 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Filterable table model for the history dialog
+
+Each record gets a lowercase search key and the column widths are
+collected in the same pass when the records are loaded. Filtering
+keeps the list of matching rows, a query extending the previous one
+only searches those rows again. The view lays out visible rows only,
+so typing into the filter field does not rebuild a text document.
+
+The transaction tree shows one row per apt run, its dpkg records are
+only fetched from the history index when the row is expanded.
+"""
+
+import io
+from typing import Dict, List, Optional, Sequence
+
+from PyQt6.QtCore import QAbstractItemModel, QAbstractTableModel, QModelIndex, Qt
+
+from updater_apt_history import AptTransaction, HistoryRecord, write_columns
+
+
+class HistoryTableModel(QAbstractTableModel):
+    """
+    dpkg history records with a case insensitive substring filter
+    """
+    COLUMNS = HistoryRecord._fields
+
+    def __init__(self, records: Sequence[HistoryRecord] = (),
+                 headers: Optional[Dict[str, str]] = None, parent=None):
+        super().__init__(parent)
+        self.headers = headers or {}
+        self._records: List[HistoryRecord] = []
+        self._keys: List[str] = []
+        self._widths: List[int] = [0] * len(self.COLUMNS)
+        self._visible: List[int] = []
+        self._filter = ""
+        self.set_records(records)
+
+    # --- Qt model interface ---------------------------------------------
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._visible)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            column = self.COLUMNS[section]
+            return self.headers.get(column, column)
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole or not index.isValid():
+            return None
+        return self._records[self._visible[index.row()]][index.column()]
+
+    # --- updates ---------------------------------------------------------
+    def set_records(self, records: Sequence[HistoryRecord]):
+        """
+        Load records, build search keys and column widths in one pass
+        """
+        records = list(records)
+        keys = []
+        widths = [0] * len(self.COLUMNS)
+        for record in records:
+            keys.append(" ".join(record).lower())
+            widths = [max(width, len(field)) for width, field in zip(widths, record)]
+
+        self.beginResetModel()
+        self._records = records
+        self._keys = keys
+        self._widths = widths
+        self._filter = ""
+        self._visible = list(range(len(records)))
+        self.endResetModel()
+
+    def set_filter(self, text: str):
+        text = text.lower()
+        if text == self._filter:
+            return
+        keys = self._keys
+        if not text:
+            visible = list(range(len(keys)))
+        elif self._filter and self._filter in text:
+            # narrower query: only the rows matching the previous one
+            visible = [i for i in self._visible if text in keys[i]]
+        else:
+            visible = [i for i, key in enumerate(keys) if text in key]
+        self.beginResetModel()
+        self._filter = text
+        self._visible = visible
+        self.endResetModel()
+
+    # --- access ----------------------------------------------------------
+    def column_widths(self) -> List[int]:
+        """
+        Longest value per column in characters
+        """
+        return list(self._widths)
+
+    def visible_records(self):
+        records = self._records
+        return (records[i] for i in self._visible)
+
+    def visible_text(self) -> str:
+        out = io.StringIO()
+        write_columns(self.visible_records(), out, self._widths)
+        return out.getvalue()
+
+    def record_count(self) -> int:
+        return len(self._records)
+
+
+class TransactionTreeModel(QAbstractItemModel):
+    """
+    apt transactions with their dpkg records as child rows
+
+    Top level items have the internal id 0, child items the
+    row of their transaction + 1.
+    """
+    COLUMNS = ("date", "command", "requested_by", "changes")
+
+    def __init__(self, transactions: Sequence[AptTransaction] = (),
+                 headers: Optional[Dict[str, str]] = None, parent=None):
+        super().__init__(parent)
+        self.headers = headers or {}
+        self._transactions: List[AptTransaction] = list(transactions)
+        # transaction row: fetched dpkg records
+        self._children: Dict[int, List[HistoryRecord]] = {}
+
+    # --- Qt model interface ---------------------------------------------
+    def index(self, row, column, parent=QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        if parent.isValid():
+            return self.createIndex(row, column, parent.row() + 1)
+        return self.createIndex(row, column, 0)
+
+    def parent(self, index):
+        if not index.isValid() or index.internalId() == 0:
+            return QModelIndex()
+        return self.createIndex(index.internalId() - 1, 0, 0)
+
+    def rowCount(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return len(self._transactions)
+        if parent.internalId() == 0 and parent.column() == 0:
+            return len(self._children.get(parent.row(), ()))
+        return 0
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.COLUMNS)
+
+    def hasChildren(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return bool(self._transactions)
+        if parent.internalId() == 0 and parent.column() == 0:
+            row = parent.row()
+            if row in self._children:
+                return bool(self._children[row])
+            return bool(self._transactions[row].links)
+        return False
+
+    def canFetchMore(self, parent):
+        return (parent.isValid() and parent.internalId() == 0
+                and parent.row() not in self._children
+                and bool(self._transactions[parent.row()].links))
+
+    def fetchMore(self, parent):
+        if not self.canFetchMore(parent):
+            return
+        row = parent.row()
+        records = self._transactions[row].records()
+        if not records:
+            # linked dpkg log rotated away or pruned
+            self._children[row] = []
+            return
+        self.beginInsertRows(parent, 0, len(records) - 1)
+        self._children[row] = records
+        self.endInsertRows()
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            column = self.COLUMNS[section]
+            return self.headers.get(column, column)
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        column = index.column()
+        if index.internalId() == 0:
+            transaction = self._transactions[index.row()]
+            if role == Qt.ItemDataRole.DisplayRole:
+                return self._transaction_text(transaction, column)
+            if role == Qt.ItemDataRole.ToolTipRole and transaction.error:
+                return transaction.error
+            return None
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        record = self._children[index.internalId() - 1][index.row()]
+        if column == 0:
+            return f"{record.date} {record.time}"
+        if column == 1:
+            return record.action
+        if column == 2:
+            return f"{record.package}:{record.arch}"
+        return f"{record.old} \u2192 {record.new}"
+
+    def _transaction_text(self, transaction: AptTransaction, column: int) -> str:
+        if column == 0:
+            return transaction.start
+        if column == 1:
+            return transaction.commandline
+        if column == 2:
+            return transaction.requested_by
+        return ", ".join(f"{name} {count}" for name, count in transaction.changes.items())
+
+    # --- access ----------------------------------------------------------
+    def transaction_count(self) -> int:
+        return len(self._transactions)
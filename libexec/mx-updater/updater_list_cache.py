@@ -0,0 +1,149 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Upgrade lists cached by the system monitor
+
+After each scan the system monitor saves the 'apt-get -V' package
+lists of both upgrade types together with the checksum of the apt
+release, status and preference files. The View and Upgrade dialog
+shows a cached list as long as the checksum still matches, instead
+of running updater_list with its own apt cache build.
+
+The counts and start and finish times of the scan are saved along,
+so the reload can print the result of the monitor's post-update scan
+instead of resolving the upgrade again.
+"""
+
+import os
+import glob
+import json
+import time
+import hashlib
+import logging
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR  = Path("/var/lib/mx-updater-monitor")
+CACHE_FILE = CACHE_DIR / "upgrade-lists.json"
+
+UPGRADE_TYPES = ("full-upgrade", "basic-upgrade")
+
+
+def releases_checksum() -> str:
+    """
+    Replicates somthing like the shell one-liner:
+      sha256sum /dev/null /var/lib/apt/lists/*Release \
+      2>/dev/null \
+      | cut -d ' ' -f1 \
+      | sort -u \
+      | sha256sum - \
+      | cut -d ' ' -f1
+
+    Returns:
+      A SHA256 hex-digest string of the sorted, unique list of per-file hashes.
+    """
+    files = [
+        "/dev/null",
+        "/etc/apt/preferences",
+        "/var/lib/dpkg/status",
+        "/var/lib/synaptic/preferences",
+        *glob.glob("/var/lib/apt/lists/*Release"),   # '*' unpacks the glob list
+        *glob.glob("/etc/apt/preferences.d/*"),      #
+        *glob.glob("/var/lib/synaptic/preferences")  #
+    ]
+
+    # generate sha256 hex digests for each file
+    digests = set()
+    for path in files:
+        try:
+            h = hashlib.sha256()
+            with open(path, "rb") as f:
+                # read 8K chunks
+                for chunk in iter(lambda: f.read(8192), b""):
+                    h.update(chunk)
+            digests.add(h.hexdigest())
+        except (OSError, IOError):
+            # ignore file vanished, permissions, etc. -- just skip it
+            continue
+
+    # sort digests and join with '\n'
+    sorted_digests = sorted(digests)
+    joined = "\n".join(sorted_digests) + "\n"
+    joined_bytes = joined.encode("utf-8")
+
+    # generate final sha256 hash
+    return hashlib.sha256(joined_bytes).hexdigest()
+
+
+def save_upgrade_lists(checksum: str, lists: Dict[str, str],
+                       upgrades: Optional[Dict[str, Sequence[int]]] = None,
+                       started: Optional[float] = None) -> None:
+    """
+    Save the package lists per upgrade type, readable by all users
+
+    :param upgrades: counts per upgrade type of this scan
+    :param started: time the scan started
+    """
+    data = {
+        "checksum-of-releases": checksum,
+        "upgrade-lists": {key: value for key, value in lists.items() if key in UPGRADE_TYPES},
+        "upgrades-available": {key: list(value) for key, value in (upgrades or {}).items()
+                               if key in UPGRADE_TYPES},
+        "scan-started": started,
+        "scan-finished": time.time(),
+    }
+    tmp = CACHE_FILE.with_suffix(".tmp")
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, CACHE_FILE)
+        logger.info("Upgrade lists saved to %s", CACHE_FILE)
+    except OSError as e:
+        logger.warning("Could not save upgrade lists %s: %s", CACHE_FILE, e)
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+
+
+def load_upgrade_list(upgrade_type: str, checksum: Optional[str] = None) -> Optional[str]:
+    """
+    Cached package list of an upgrade type
+
+    :param checksum: current checksum, computed if not given
+    :return: 'apt-get -V' output or None if missing or stale
+    """
+    try:
+        with CACHE_FILE.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+        text = data["upgrade-lists"][upgrade_type]
+        cached_checksum = data["checksum-of-releases"]
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logger.debug("No cached upgrade list for %s: %r", upgrade_type, e)
+        return None
+
+    if checksum is None:
+        checksum = releases_checksum()
+    if not cached_checksum or cached_checksum != checksum:
+        logger.debug("Cached upgrade list for %s is stale", upgrade_type)
+        return None
+    return text if isinstance(text, str) else None
+
+
+def load_scan_result() -> Optional[Dict[str, Any]]:
+    """
+    Checksum, counts and times of the last scan
+
+    :return: the saved data or None if missing
+    """
+    try:
+        with CACHE_FILE.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.debug("No saved scan result: %r", e)
+        return None
+    return data if isinstance(data, dict) else None
@@ -0,0 +1,85 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Runtime lock file of the MX Updater systray icon
+
+The system monitor only scans for upgrades while a lock file
+with a live pid exists. The lock is held by the systray icon
+or by the watcher which starts the systray icon on demand.
+"""
+
+import os
+import stat
+from pathlib import Path
+
+TRAYICON_LOCK_NAME = "mx-updater-systrayicon"
+
+
+def ensure_lock_dir(base: Path, mode: int) -> bool:
+    """
+    Ensure that "base" exists and has exactly the given mode bits.
+    Returns True if successful, False otherwise.
+    """
+    try:
+        if not base.exists():
+            base.mkdir(parents=True, exist_ok=True)
+        # fetch current permissions
+        st = base.stat()
+        current_mode = stat.S_IMODE(st.st_mode)
+        if current_mode != mode:
+            # try to reset
+            base.chmod(mode)
+            # recheck
+            st = base.stat()
+            if stat.S_IMODE(st.st_mode) != mode:
+                return False
+        return True
+    except PermissionError:
+        return False
+    except OSError:
+        return False
+
+def acquire_runtime_lock() -> Path | None:
+    """
+    Returns the Path to the lock file  or None.
+    A lock file of a previous holder is taken over.
+    """
+    uid = os.geteuid()
+    filename = f"{TRAYICON_LOCK_NAME}-{uid}.lock"
+    # primary lock dir
+    run_lock = Path("/run/lock")
+    desired_mode = 0o1777
+
+    if ensure_lock_dir(run_lock, desired_mode):
+        lock_path = run_lock / filename
+    else:
+        # fallback to per-user runtime dir
+        run_user = Path(f"/run/user/{uid}")
+        if not run_user.exists() or not run_user.is_dir():
+            return None
+        lock_path = run_user / filename
+
+    try:
+        with lock_path.open("w") as f:
+            # write lock file with pid
+            f.write(str(os.getpid()))
+        return lock_path
+    except OSError:
+        return None
+
+def release_runtime_lock(lock_path: Path | None) -> None:
+    """
+    Remove the lock file if it still belongs to this process,
+    a lock taken over by the next holder is left alone.
+    """
+    if lock_path is None:
+        return
+
+    try:
+        if lock_path.read_text().strip() != str(os.getpid()):
+            return
+        lock_path.unlink()
+    except FileNotFoundError:
+        pass
+    except OSError:
+        pass
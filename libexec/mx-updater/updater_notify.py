@@ -0,0 +1,178 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Desktop notifications of the MX Updater systray icon
+
+One notify2 notification per category. An update of a shown
+notification replaces it on the notification server (same id)
+instead of stacking a new one, updates within the minimum interval
+are coalesced into the latest one, and action callbacks are released
+as soon as a notification is closed.
+"""
+
+import logging
+import time
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from PyQt6.QtCore import QTimer
+
+logger = logging.getLogger(__name__)
+
+# minimum time between two updates of a category sent to the server
+NOTIFY_MIN_INTERVAL_MS = 10_000
+# notification display timeout
+NOTIFY_TIMEOUT_MS = 10_000
+
+# (action key, button label, callback(action key))
+Action = Tuple[str, str, Callable[[str], Any]]
+
+
+class _Entry:
+    __slots__ = ("notification", "last_shown", "pending", "timer")
+
+    def __init__(self):
+        self.notification = None
+        self.last_shown = 0.0
+        # (title, message, actions) waiting for the rate limit
+        self.pending = None
+        self.timer = None
+
+
+class NotificationManager:
+    """
+    Reuse one notification per category and rate limit its updates
+    """
+
+    def __init__(self, notify2, icon: str,
+                 min_interval_ms: int = NOTIFY_MIN_INTERVAL_MS,
+                 timeout_ms: int = NOTIFY_TIMEOUT_MS):
+        self.notify2 = notify2
+        self.icon = icon
+        self.min_interval_ms = min_interval_ms
+        self.timeout_ms = timeout_ms
+        self._entries: Dict[str, _Entry] = {}
+        self.shown_count = 0
+        self.coalesced_count = 0
+
+    def notify(self, category: str, title: str, message: str,
+               actions: Iterable[Action] = ()):
+        """
+        Show or update the notification of a category
+        """
+        me = "notify"
+        entry = self._entries.setdefault(category, _Entry())
+        actions = tuple(actions)
+
+        wait_ms = self.min_interval_ms - (time.monotonic() - entry.last_shown) * 1000
+        if wait_ms > 0:
+            # keep only the latest update
+            if entry.pending is not None:
+                self.coalesced_count += 1
+            entry.pending = (title, message, actions)
+            if entry.timer is None:
+                entry.timer = QTimer()
+                entry.timer.setSingleShot(True)
+                entry.timer.timeout.connect(partial(self._show_pending, category))
+            if not entry.timer.isActive():
+                entry.timer.start(int(wait_ms))
+            logger.debug("[%s] '%s' update delayed by %d ms", me, category, wait_ms)
+            return
+
+        self._show(category, entry, title, message, actions)
+
+    def _show_pending(self, category: str):
+        entry = self._entries.get(category)
+        if entry is None or entry.pending is None:
+            return
+        title, message, actions = entry.pending
+        entry.pending = None
+        self._show(category, entry, title, message, actions)
+
+    def _show(self, category: str, entry: _Entry, title: str, message: str,
+              actions: Tuple[Action, ...]):
+        me = "_show"
+        notify2 = self.notify2
+        n = entry.notification
+        if n is None:
+            n = notify2.Notification(title, message, self.icon)
+            n.set_urgency(notify2.URGENCY_NORMAL)
+            n.connect("closed", partial(self._on_closed, category))
+            entry.notification = n
+        else:
+            # same id: the server replaces the shown notification
+            n.update(title, message, self.icon)
+
+        n.set_timeout(self.timeout_ms)
+        n.clear_actions()
+        for action_key, label, callback in actions:
+            n.add_action(action_key, label, partial(self._on_action, callback))
+
+        try:
+            n.show()
+        except Exception as e:
+            logger.debug("[%s] '%s' notification failed: %r", me, category, e)
+            self._release(category)
+            return
+
+        entry.last_shown = time.monotonic()
+        self.shown_count += 1
+        logger.debug("[%s] '%s' notification id %s shown", me, category, n.id)
+
+    def _on_action(self, callback, n, action_key):
+        try:
+            callback(action_key)
+        finally:
+            n.close()
+
+    def _on_closed(self, category: str, n):
+        entry = self._entries.get(category)
+        if entry is not None and entry.notification is n:
+            self._release(category)
+
+    def _release(self, category: str):
+        """
+        Drop the notification with its action callbacks
+        """
+        entry = self._entries.get(category)
+        if entry is None or entry.notification is None:
+            return
+        n = entry.notification
+        entry.notification = None
+        n.clear_actions()
+        # notify2 registry, the closed signal may never arrive
+        getattr(self.notify2, "notifications", {}).pop(n.id, None)
+
+    def close(self, category: Optional[str] = None):
+        """
+        Close the notification of a category or of all categories
+        and drop any delayed update
+        """
+        categories = [category] if category is not None else list(self._entries)
+        for name in categories:
+            entry = self._entries.get(name)
+            if entry is None:
+                continue
+            entry.pending = None
+            if entry.timer is not None:
+                entry.timer.stop()
+            n = entry.notification
+            self._release(name)
+            if n is not None:
+                try:
+                    n.close()
+                except Exception as e:
+                    logger.debug("[close] '%s' close failed: %r", name, e)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "categories": {
+                name: {
+                    "id": entry.notification.id if entry.notification else None,
+                    "pending": entry.pending is not None,
+                }
+                for name, entry in self._entries.items()
+            },
+            "shown": self.shown_count,
+            "coalesced": self.coalesced_count,
+        }
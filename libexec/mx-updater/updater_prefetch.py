@@ -0,0 +1,275 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Background download of pending upgrades into the APT archive cache
+
+Disabled by default, enabled with the apt configuration, e.g. in
+/etc/apt/apt.conf.d/59updater-prefetch:
+
+  MX-Updater::Prefetch "true";
+  MX-Updater::Prefetch::Dl-Limit "512";       // KB/s, 0: no limit
+  MX-Updater::Prefetch::Queue-Mode "access";  // one connection per method
+  MX-Updater::Prefetch::Max-Size "1024";      // MB, skip larger downloads
+  MX-Updater::Prefetch::Min-Free "2048";      // MB to keep free
+
+After a scan with pending full-upgrades the system monitor runs
+'apt-get --download-only dist-upgrade' with idle I/O and lowest CPU
+priority. The download stops as soon as another package manager is
+started, a new scan begins or the upgrade calls CancelPrefetch. Files
+already complete stay in the archive cache, partial ones are resumed
+by apt.
+
+The download runs with the environment of the monitor, so a test
+against a local repository only needs an APT_CONFIG with its own
+Dir::Etc::sourcelist, Dir::State and Dir::Cache, e.g.:
+
+  APT_CONFIG=/tmp/repo/apt.conf updater-system-monitor.py --prefetch-now
+"""
+
+import os
+import re
+import shlex
+import shutil
+import logging
+import threading
+import subprocess
+from typing import Callable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 'apt-get --print-uris': 'uri' file_name size checksum
+URI_RE = re.compile(r"^'(?P<uri>[^']+)'\s+(?P<file>\S+)\s+(?P<size>\d+)")
+
+# (shell variable, apt-config key, default)
+CONFIG_KEYS = (
+    ("ENABLED",    "MX-Updater::Prefetch/b",           "false"),
+    ("DL_LIMIT",   "MX-Updater::Prefetch::Dl-Limit",   "0"),
+    ("QUEUE_MODE", "MX-Updater::Prefetch::Queue-Mode", "access"),
+    ("MAX_SIZE",   "MX-Updater::Prefetch::Max-Size",   "0"),
+    ("MIN_FREE",   "MX-Updater::Prefetch::Min-Free",   "1024"),
+    ("ARCHIVES",   "Dir::Cache::archives/d",           "/var/cache/apt/archives/"),
+)
+
+QUEUE_MODES = ("host", "access")
+
+# seconds to wait for apt-get to exit after SIGTERM
+STOP_TIMEOUT = 10
+
+MB = 1024 * 1024
+
+
+def _apt_env():
+    env = dict(os.environ)
+    env["LC_ALL"] = "C"
+    return env
+
+
+def _as_int(value: str, default: int) -> int:
+    try:
+        return max(0, int(value))
+    except (TypeError, ValueError):
+        return default
+
+
+class PrefetchConfig:
+    """
+    Prefetch settings from the apt configuration
+    """
+
+    def __init__(self, values=None):
+        values = values or {}
+        defaults = {name: default for name, _, default in CONFIG_KEYS}
+        get = lambda name: values.get(name, defaults[name])
+
+        self.enabled = get("ENABLED") == "true"
+        # KB/s
+        self.dl_limit = _as_int(get("DL_LIMIT"), 0)
+        self.queue_mode = get("QUEUE_MODE") if get("QUEUE_MODE") in QUEUE_MODES else "access"
+        # MB
+        self.max_size = _as_int(get("MAX_SIZE"), 0)
+        self.min_free = _as_int(get("MIN_FREE"), 1024)
+        self.archives = get("ARCHIVES") or defaults["ARCHIVES"]
+
+    def __repr__(self):
+        return (f"PrefetchConfig(enabled={self.enabled}, dl_limit={self.dl_limit}, "
+                f"queue_mode={self.queue_mode!r}, max_size={self.max_size}, "
+                f"min_free={self.min_free}, archives={self.archives!r})")
+
+
+def read_prefetch_config() -> PrefetchConfig:
+    """
+    Read the prefetch keys with 'apt-config shell'
+    """
+    command = ["apt-config", "shell"]
+    for name, key, _ in CONFIG_KEYS:
+        command += [name, key]
+    try:
+        output = subprocess.run(command, env=_apt_env(), stdout=subprocess.PIPE,
+                                stderr=subprocess.DEVNULL, text=True, timeout=30).stdout
+    except (OSError, subprocess.SubprocessError) as e:
+        logger.debug("[read_prefetch_config] apt-config failed: %r", e)
+        return PrefetchConfig()
+
+    values = {}
+    for line in output.splitlines():
+        name, sep, value = line.partition("=")
+        if not sep:
+            continue
+        try:
+            words = shlex.split(value)
+        except ValueError:
+            continue
+        values[name.strip()] = words[0] if words else ""
+    return PrefetchConfig(values)
+
+
+def pending_downloads(archives: str, options: Sequence[str] = ()) -> Tuple[int, int]:
+    """
+    Files of a full-upgrade not yet in the archive cache
+
+    :param archives: apt archive cache directory
+    :param options: additional apt-get options
+    :return: (number of files, bytes to download)
+    """
+    command = [
+        "apt-get", "-qq", "--print-uris",
+        "-o", "Debug::NoLocking=true",
+        *options,
+        "dist-upgrade",
+    ]
+    output = subprocess.run(command, env=_apt_env(), stdout=subprocess.PIPE,
+                            stderr=subprocess.DEVNULL, text=True).stdout or ""
+    count = size = 0
+    for line in output.splitlines():
+        match = URI_RE.match(line)
+        if not match:
+            continue
+        file_size = int(match.group("size"))
+        try:
+            if os.path.getsize(os.path.join(archives, match.group("file"))) == file_size:
+                continue
+        except OSError:
+            pass
+        count += 1
+        size += file_size
+    return count, size
+
+
+def download_command(config: PrefetchConfig, options: Sequence[str] = ()) -> List[str]:
+    """
+    'apt-get --download-only' with idle I/O and CPU priority
+    """
+    command = []
+    if shutil.which("ionice"):
+        command += ["ionice", "-c", "3"]
+    if shutil.which("nice"):
+        command += ["nice", "-n", "19"]
+    command += [
+        "apt-get", "-q", "--yes", "--download-only",
+        "-o", "quiet::NoProgress=true",
+        "-o", f"Acquire::Queue-Mode={config.queue_mode}",
+    ]
+    if config.dl_limit:
+        command += [
+            "-o", f"Acquire::http::Dl-Limit={config.dl_limit}",
+            "-o", f"Acquire::https::Dl-Limit={config.dl_limit}",
+        ]
+    command += [*options, "dist-upgrade"]
+    return command
+
+
+class Prefetch:
+    """
+    One prefetch run, stopped on request or when should_stop
+    returns True for the pid of the running apt-get
+    """
+    DONE = "done"
+    NOTHING = "nothing to download"
+    SKIPPED = "skipped"
+    STOPPED = "stopped"
+    FAILED = "failed"
+
+    def __init__(self, config: PrefetchConfig, options: Sequence[str] = ()):
+        self.config = config
+        self.options = list(options)
+        self._cancel = threading.Event()
+        self._process: Optional[subprocess.Popen] = None
+
+    def run(self, should_stop: Callable[[int], bool] = lambda pid: False,
+            poll_interval: float = 2.0) -> str:
+        me = "run"
+        config = self.config
+
+        count, size = pending_downloads(config.archives, self.options)
+        if not count:
+            logger.debug("[%s] all pending upgrades are in %s", me, config.archives)
+            return self.NOTHING
+        logger.debug("[%s] %d files with %.1f MB to download", me, count, size / MB)
+
+        if config.max_size and size > config.max_size * MB:
+            logger.info("Prefetch skipped: %.1f MB to download exceeds Max-Size %d MB",
+                        size / MB, config.max_size)
+            return self.SKIPPED
+        try:
+            st = os.statvfs(config.archives)
+            free = st.f_bavail * st.f_frsize
+        except OSError as e:
+            logger.warning("Prefetch skipped: %s: %s", config.archives, e)
+            return self.SKIPPED
+        if free - size < config.min_free * MB:
+            logger.info("Prefetch skipped: %.1f MB free, %.1f MB to download, Min-Free %d MB",
+                        free / MB, size / MB, config.min_free)
+            return self.SKIPPED
+
+        if self._cancel.is_set():
+            return self.STOPPED
+
+        command = download_command(config, self.options)
+        logger.debug("[%s] Command: %s", me, " ".join(command))
+        try:
+            self._process = subprocess.Popen(command, env=_apt_env(),
+                                             stdin=subprocess.DEVNULL,
+                                             stdout=subprocess.DEVNULL,
+                                             stderr=subprocess.DEVNULL)
+        except OSError as e:
+            logger.error("Prefetch failed to start: %s", e)
+            return self.FAILED
+
+        process = self._process
+        while process.poll() is None:
+            if self._cancel.wait(poll_interval):
+                break
+            if should_stop(process.pid):
+                logger.info("Prefetch stopped: package manager started")
+                self._cancel.set()
+                break
+
+        if self._cancel.is_set():
+            self._stop_process()
+            return self.STOPPED
+        if process.returncode != 0:
+            logger.warning("Prefetch apt-get exited with %d", process.returncode)
+            return self.FAILED
+        logger.info("Prefetch done: %d files with %.1f MB downloaded", count, size / MB)
+        return self.DONE
+
+    def cancel(self, timeout: float = STOP_TIMEOUT) -> bool:
+        """
+        Stop the download and wait until apt-get has released its locks
+
+        :return: True if a running download was stopped
+        """
+        self._cancel.set()
+        return self._stop_process(timeout)
+
+    def _stop_process(self, timeout: float = STOP_TIMEOUT) -> bool:
+        process = self._process
+        if process is None or process.poll() is not None:
+            return False
+        process.terminate()
+        try:
+            process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+        return True
@@ -0,0 +1,319 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Structured list of pending upgrades for the View and Upgrade dialog
+
+The 'apt-get -V' output of updater_list is parsed line by line while
+it streams in. Download sizes and origins come from a second
+'updater_list --print-uris' run and are merged in afterwards.
+UpgradeTableModel keeps the records once and sorts and filters
+on an index list, rows are handed to the view in batches.
+"""
+
+import gettext
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+
+from PyQt6.QtCore import QAbstractTableModel, QLocale, QModelIndex, Qt
+
+# "   package (1.0-1 => 1.0-2)" or "   package (1.0-1)"
+PACKAGE_RE = re.compile(r'^\s+(?P<package>\S+)\s+\((?P<version>[^()]+?)(?:\s+=>\s+(?P<candidate>[^()]+?))?\)\s*$')
+
+# 'uri' file_name size checksum
+URI_RE = re.compile(r"^'(?P<uri>[^']+)'\s+(?P<file>\S+)\s+(?P<size>\d+)")
+
+# package list headers of apt-get and their status, the headers of
+# other lists (additional, autoremovable or phased packages, ...) are skipped
+HEADER_STATUS = (
+    ("The following packages will be upgraded:", 'upgrade'),
+    ("The following NEW packages will be installed:", 'new'),
+    ("The following packages will be REMOVED:", 'remove'),
+    ("The following packages will be DOWNGRADED:", 'downgrade'),
+    ("The following packages have been kept back:", 'kept back'),
+    # apt >= 3.0
+    ("Upgrading:", 'upgrade'),
+    ("Installing:", 'new'),
+    ("Installing dependencies:", 'new'),
+    ("REMOVING:", 'remove'),
+    ("DOWNGRADING:", 'downgrade'),
+    ("Not upgrading:", 'kept back'),
+)
+
+
+class UpgradeRecord:
+    """
+    One package of the upgrade list
+    """
+    __slots__ = ('package', 'installed', 'candidate', 'status',
+                 'size', 'origin', 'component', 'key')
+
+    def __init__(self, package: str, installed: str, candidate: str, status: str):
+        self.package = package
+        self.installed = installed
+        self.candidate = candidate
+        self.status = status
+        self.size: Optional[int] = None
+        self.origin = ""
+        self.component = ""
+        # lower case package name for filtering
+        self.key = package.lower()
+
+
+def _header_statuses() -> Dict[str, str]:
+    """
+    Map the C locale and the translated apt headers to the status
+    """
+    apt_text = gettext.translation('apt', fallback=True).gettext
+    headers = {}
+    for header, status in HEADER_STATUS:
+        headers[header] = status
+        headers.setdefault(apt_text(header).strip(), status)
+    return headers
+
+
+class UpgradeListParser:
+    """
+    Incremental parser of the 'apt-get -V' package lists
+    """
+
+    def __init__(self):
+        self._partial = ""
+        self._status = None
+        self._headers = _header_statuses()
+
+    def feed(self, text: str) -> List[UpgradeRecord]:
+        """
+        Parse the complete lines of text, keep an incomplete last line
+        """
+        lines = (self._partial + text).split('\n')
+        self._partial = lines.pop()
+        return self._parse_lines(lines)
+
+    def finish(self) -> List[UpgradeRecord]:
+        lines = [self._partial] if self._partial else []
+        self._partial = ""
+        return self._parse_lines(lines)
+
+    def _parse_lines(self, lines: Iterable[str]) -> List[UpgradeRecord]:
+        records = []
+        for line in lines:
+            if not line.strip():
+                continue
+            if not line[0].isspace():
+                # a known header opens a package list, anything else ends it
+                self._status = self._headers.get(line.strip())
+                continue
+            if self._status is None:
+                continue
+
+            match = PACKAGE_RE.match(line)
+            if match:
+                candidate = match.group('candidate')
+                if candidate is None:
+                    # new or removed package: single version
+                    installed, candidate = "", match.group('version')
+                    if self._status == 'remove':
+                        installed, candidate = candidate, ""
+                else:
+                    installed = match.group('version')
+                records.append(UpgradeRecord(match.group('package'), installed,
+                                             candidate, self._status))
+            else:
+                # package names without versions
+                records.extend(UpgradeRecord(name, "", "", self._status)
+                               for name in line.split())
+        return records
+
+
+def parse_print_uris(text: str) -> Dict[str, Tuple[int, str, str]]:
+    """
+    Parse 'apt-get --print-uris' output
+
+    :return: {package: (size, origin, component)}
+    """
+    info = {}
+    for line in text.splitlines():
+        match = URI_RE.match(line)
+        if not match:
+            continue
+        package = unquote(match.group('file')).split('_', 1)[0]
+        uri = match.group('uri')
+        parts = urlsplit(uri)
+        base, _, pool = parts.path.partition('/pool/')
+        origin = f"{parts.netloc}{base}" if pool else parts.netloc or parts.scheme
+        component = pool.split('/', 1)[0] if pool else ""
+        info[package] = (int(match.group('size')), origin, component)
+    return info
+
+
+class UpgradeTableModel(QAbstractTableModel):
+    """
+    Table of UpgradeRecords with sorting, filtering and incremental rows
+    """
+    COLUMNS = ('package', 'installed', 'candidate', 'status', 'size', 'origin')
+    FETCH_BATCH = 200
+
+    def __init__(self, headers: Dict[str, str],
+                 status_labels: Optional[Dict[str, str]] = None, parent=None):
+        super().__init__(parent)
+        self.headers = headers
+        self.status_labels = status_labels or {}
+        self._records: List[UpgradeRecord] = []
+        # record indexes: sorted, filtered and handed to the view
+        self._order: List[int] = []
+        self._visible: List[int] = []
+        self._fetched = 0
+        self._filter = ""
+        self._sort_column = -1
+        self._sort_order = Qt.SortOrder.AscendingOrder
+        self._locale = QLocale()
+
+    # --- Qt model interface ---------------------------------------------
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._fetched
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._fetched < len(self._visible)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        count = min(self.FETCH_BATCH, len(self._visible) - self._fetched)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._fetched, self._fetched + count - 1)
+        self._fetched += count
+        self.endInsertRows()
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            column = self.COLUMNS[section]
+            return self.headers.get(column, column)
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= self._fetched:
+            return None
+        record = self._records[self._visible[index.row()]]
+        column = self.COLUMNS[index.column()]
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == 'size':
+                return self._locale.formattedDataSize(record.size) if record.size is not None else ""
+            if column == 'origin' and record.component:
+                return f"{record.origin} {record.component}"
+            if column == 'status':
+                return self.status_labels.get(record.status, record.status)
+            return getattr(record, column)
+        if role == Qt.ItemDataRole.TextAlignmentRole and column == 'size':
+            return int(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+        return None
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        self._sort_column = column
+        self._sort_order = order
+        self.beginResetModel()
+        self._apply_sort()
+        self._apply_filter()
+        self.endResetModel()
+
+    # --- updates ---------------------------------------------------------
+    def clear(self):
+        self.beginResetModel()
+        self._records = []
+        self._order = []
+        self._visible = []
+        self._fetched = 0
+        self.endResetModel()
+
+    def append_records(self, records: List[UpgradeRecord]):
+        """
+        Add parsed records, the order is restored on the next sort
+        """
+        if not records:
+            return
+        start = len(self._records)
+        self._records.extend(records)
+        new = range(start, len(self._records))
+        self._order.extend(new)
+        visible = [i for i in new if self._matches(self._records[i])]
+        # fill the first batch right away, the view fetches the rest
+        show = 0
+        if self._fetched == len(self._visible):
+            show = min(len(visible), max(0, self.FETCH_BATCH - self._fetched))
+        if show:
+            self.beginInsertRows(QModelIndex(), self._fetched, self._fetched + show - 1)
+            self._visible.extend(visible)
+            self._fetched += show
+            self.endInsertRows()
+        else:
+            self._visible.extend(visible)
+
+    def resort(self):
+        """
+        Restore the sort order after records were appended
+        """
+        if self._sort_column >= 0:
+            self.sort(self._sort_column, self._sort_order)
+
+    def set_download_info(self, info: Dict[str, Tuple[int, str, str]]):
+        """
+        Merge sizes and origins from parse_print_uris
+        """
+        if not info or not self._records:
+            return
+        for record in self._records:
+            size_origin = info.get(record.package)
+            if size_origin:
+                record.size, record.origin, record.component = size_origin
+        if self._sort_column >= 0 and self.COLUMNS[self._sort_column] in ('size', 'origin'):
+            self.sort(self._sort_column, self._sort_order)
+        elif self._fetched:
+            self.dataChanged.emit(self.index(0, 0),
+                                  self.index(self._fetched - 1, len(self.COLUMNS) - 1))
+
+    def set_filter(self, text: str):
+        text = text.strip().lower()
+        if text == self._filter:
+            return
+        self.beginResetModel()
+        self._filter = text
+        self._apply_filter()
+        self.endResetModel()
+
+    def total_size(self) -> int:
+        return sum(record.size or 0 for record in self._records)
+
+    def record_count(self) -> int:
+        return len(self._records)
+
+    # --- helpers ---------------------------------------------------------
+    def _matches(self, record: UpgradeRecord) -> bool:
+        return not self._filter or self._filter in record.key
+
+    def _apply_sort(self):
+        if self._sort_column < 0:
+            self._order = list(range(len(self._records)))
+            return
+        column = self.COLUMNS[self._sort_column]
+        records = self._records
+        if column == 'size':
+            key = lambda i: (records[i].size is None, records[i].size or 0)
+        elif column == 'package':
+            key = lambda i: records[i].key
+        else:
+            key = lambda i: (getattr(records[i], column), records[i].key)
+        self._order = sorted(range(len(records)), key=key,
+                             reverse=self._sort_order == Qt.SortOrder.DescendingOrder)
+
+    def _apply_filter(self):
+        records = self._records
+        if self._filter:
+            self._visible = [i for i in self._order if self._filter in records[i].key]
+        else:
+            self._visible = list(self._order)
+        self._fetched = min(self.FETCH_BATCH, len(self._visible))
@@ -0,0 +1,622 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Log views of unattended-upgrades
+
+All /var/log/unattended-upgrades/unattended-upgrades.log* files are
+decompressed once, oldest first, and the long origin pattern lines
+are broken up in a single substitution per line, as the former chain
+of sed rewrites did. The byte offset of the latest run, the first line
+with the time stamp of the last "Initial blacklist" line, is recorded
+while writing, so a pager or the log viewer can open there directly.
+
+The unattended-upgrades-dpkg.log* files are split into runs at their
+"Log started:" lines. A run index per log file, keyed by device and
+inode, keeps start time and byte range of each run, the live log is
+only read from the last indexed offset on. A view of the latest runs
+then reads just those byte ranges, older runs are read on request.
+The dpkg progress lines ending with "%\r" are dropped on output.
+
+The runs of the unattended-upgrades.log* files are indexed the same
+way into records with start and end time, status, the packages to be
+upgraded, blacklisted, kept back and removed, and the error messages.
+This index is kept by root next to the monitor's upgrade lists and is
+readable by all users, the tray reads it instead of the logs.
+
+Run as a script it is the backend of the log view commands:
+
+  updater_uu_logs.py log [--latest-offset] [--footer TEXT]
+  updater_uu_logs.py dpkg [--latest-offset] [--runs N] [--before START]
+  updater_uu_logs.py runs [--runs N] [--json]
+
+With --latest-offset the byte offset of the latest run is printed to
+stderr as "latest-run-offset: N" after the log has been written to
+stdout. The dpkg view also prints "first-run-start: START" there if
+older runs than the ones shown exist, to be passed as --before START
+for the previous page.
+"""
+
+import os
+import re
+import sys
+import gzip
+import json
+import logging
+import argparse
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+
+from updater_apt_history import CACHE_DIR, log_files
+from updater_list_cache import CACHE_DIR as MONITOR_CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+UU_LOG_DIR = Path("/var/log/unattended-upgrades")
+UU_LOG_NAME = "unattended-upgrades.log"
+UU_DPKG_LOG_NAME = "unattended-upgrades-dpkg.log"
+
+DPKG_RUNS_CACHE_FILE = CACHE_DIR / "uu-dpkg-runs.json"
+UU_RUNS_CACHE_FILE = MONITOR_CACHE_DIR / "unattended-upgrades-runs.json"
+
+# line breaks of the origin patterns:
+#   "origin=" anywhere and ", " before 'a= 'c= 'l= 'n= o= 'archive= ...
+ORIGIN_BREAK_RE = re.compile(
+    rb"origin=|, (?='(?:a|c|l|n|archive|codename|component|label|suite)=|o=)")
+
+# "2024-05-01 06:12:34,123 INFO ..."
+STAMP_RE = re.compile(rb"^(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d)")
+
+RUN_START_MARK = b"Initial blacklist : "
+
+OFFSET_MARK = "latest-run-offset: "
+OFFSET_MARK_RE = re.compile(rf"^{re.escape(OFFSET_MARK)}(\d+)\s*$", re.MULTILINE)
+
+FIRST_RUN_MARK = "first-run-start: "
+FIRST_RUN_MARK_RE = re.compile(rf"^{re.escape(FIRST_RUN_MARK)}(.+?)\s*$", re.MULTILINE)
+
+# "Log started: 2024-05-01  06:12:50"
+DPKG_RUN_RE = re.compile(rb"^Log started: (\d{4}-\d\d-\d\d\s+\d\d:\d\d:\d\d)")
+# run start as given with --before
+RUN_START_RE = re.compile(r"^\d{4}-\d\d-\d\d \d\d:\d\d:\d\d$")
+
+# "2024-05-01 06:12:34,123 INFO message", continuation lines have no stamp
+UU_LINE_RE = re.compile(rb"^(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d),\d+ (\w+) (.*?)\s*$")
+UU_KEPT_BACK_RE = re.compile(r"^Package (\S+) is kept back")
+
+# message start: (run field, list of packages follows)
+UU_PACKAGE_LISTS = (
+    ("Initial blacklist :", "blacklist"),
+    ("Packages that will be upgraded:", "upgrade"),
+    ("Packages that are auto removed:", "remove"),
+    ("Packages with upgradable origin but kept back:", "kept"),
+)
+# message start: status of the run
+UU_STATUS = (
+    ("All upgrades installed", "upgraded"),
+    ("No packages found that can be upgraded unattended", "nothing"),
+    ("Installing the upgrades failed", "failed"),
+)
+UU_RUN_START = "Starting unattended upgrades script"
+# error messages kept per run
+UU_MAX_ERRORS = 20
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+def _break_origin(match) -> bytes:
+    return b"\norigin=" if match.group(0) == b"origin=" else b",\n"
+
+
+def read_log(path: Path) -> Iterator[bytes]:
+    """
+    Lines of a log, compressed or not, like 'zcat -f'
+    """
+    with open(path, "rb") as raw:
+        if raw.peek(2)[:2] == GZIP_MAGIC:
+            with gzip.GzipFile(fileobj=raw, mode="rb") as f:
+                yield from f
+        else:
+            yield from raw
+
+
+def is_compressed(path: Path) -> bool:
+    with open(path, "rb") as f:
+        return f.read(2) == GZIP_MAGIC
+
+
+def iter_log_lines(log_dir: Path = UU_LOG_DIR, name: str = UU_LOG_NAME) -> Iterator[bytes]:
+    """
+    Lines of all rotated logs, oldest first, each file decompressed once
+    """
+    for _, path in reversed(log_files(log_dir, name)):
+        try:
+            yield from read_log(path)
+        except (OSError, EOFError) as e:
+            logger.debug("[iter_log_lines] %s: %r", path, e)
+
+
+def format_uu_log(out: BinaryIO, log_dir: Path = UU_LOG_DIR) -> Optional[int]:
+    """
+    Write the formatted unattended-upgrades logs
+
+    :return: byte offset of the latest run in the output, None if there is none
+    """
+    offset = 0
+    latest = None
+    # first line of the current time stamp
+    stamp, stamp_offset = None, 0
+    write = out.write
+    sub = ORIGIN_BREAK_RE.sub
+    for line in iter_log_lines(log_dir, UU_LOG_NAME):
+        match = STAMP_RE.match(line)
+        if match and match.group(1) != stamp:
+            stamp, stamp_offset = match.group(1), offset
+        if RUN_START_MARK in line and match:
+            latest = stamp_offset
+        if b"origin=" in line or b", " in line:
+            line = sub(_break_origin, line)
+        write(line)
+        offset += len(line)
+    return latest
+
+
+def _scan_runs(lines, offset: int, runs: List[list], complete_only: bool) -> int:
+    """
+    Add the runs of lines read from offset on
+
+    :param runs: [[start, first byte, end byte], ...], the last one is
+                 continued by lines following it directly
+    :return: offset after the last line scanned
+    """
+    position = offset
+    for line in lines:
+        if complete_only and not line.endswith(b"\n"):
+            # live log line still being written
+            break
+        end = position + len(line)
+        match = DPKG_RUN_RE.match(line)
+        if match:
+            start = " ".join(match.group(1).decode("ascii").split())
+            runs.append([start, position, end])
+        elif runs and runs[-1][2] == position:
+            runs[-1][2] = end
+        else:
+            # lines before the first run header
+            runs.append(["", position, end])
+        position = end
+    return position
+
+
+class RunIndex:
+    """
+    Persistent per-file index of the runs in rotated logs
+
+    :param log_name: name of the live log, e.g. unattended-upgrades.log
+    :param scan: scan(lines, offset, runs, complete_only) -> offset adds
+                 the runs found from offset on and continues the last
+                 run of the list
+    """
+    CACHE_VERSION = 1
+
+    def __init__(self, log_name: str, scan: Callable[..., int],
+                 log_dir: Path = UU_LOG_DIR, cache_file: Optional[Path] = None):
+        self.log_name = log_name
+        self.scan = scan
+        self.log_dir = Path(log_dir)
+        self.cache_file = cache_file
+        # "dev:ino": {"size", "mtime", "offset", "compressed", "runs"}
+        self._entries: Dict[str, dict] = {}
+        self._dirty = False
+        self.stats = {"reused": 0, "tail": 0, "parsed": 0}
+
+    # --- cache -----------------------------------------------------------
+    def load_cache(self):
+        if self.cache_file is None:
+            return
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.debug("[load_cache] %s: %r", self.cache_file, e)
+            return
+        if not isinstance(data, dict) or data.get("version") != self.CACHE_VERSION:
+            return
+        if data.get("log-dir") != str(self.log_dir):
+            return
+        entries = data.get("files")
+        if isinstance(entries, dict):
+            self._entries = entries
+
+    def save_cache(self):
+        if self.cache_file is None or not self._dirty:
+            return
+        data = {"version": self.CACHE_VERSION, "log-dir": str(self.log_dir),
+                "files": self._entries}
+        tmp = self.cache_file.with_suffix(".tmp")
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp, self.cache_file)
+            self._dirty = False
+        except OSError as e:
+            logger.debug("[save_cache] %s: %r", self.cache_file, e)
+            try:
+                tmp.unlink()
+            except OSError:
+                pass
+
+    # --- index -----------------------------------------------------------
+    def file_runs(self, path: Path) -> Tuple[str, List[list]]:
+        """
+        Runs of one log file, from the index where possible
+
+        :return: (index key, runs)
+        """
+        me = "file_runs"
+        st = os.stat(path)
+        key = f"{st.st_dev}:{st.st_ino}"
+        entry = self._entries.get(key)
+
+        if entry is not None and entry.get("size") == st.st_size \
+                and entry.get("mtime") == st.st_mtime_ns:
+            self.stats["reused"] += 1
+            return key, entry["runs"]
+
+        if entry is not None and entry.get("compressed") is False \
+                and st.st_size > entry.get("offset", 0):
+            # live log has grown: scan the tail only
+            with open(path, "rb") as f:
+                f.seek(entry["offset"])
+                offset = self.scan(f, entry["offset"], entry["runs"], True)
+            entry.update(size=st.st_size, mtime=st.st_mtime_ns, offset=offset)
+            self._dirty = True
+            self.stats["tail"] += 1
+            logger.debug("[%s] %s: scanned from %d", me, path, offset)
+            return key, entry["runs"]
+
+        compressed = is_compressed(path)
+        runs: list = []
+        if compressed:
+            offset = self.scan(read_log(path), 0, runs, False)
+        else:
+            with open(path, "rb") as f:
+                offset = self.scan(f, 0, runs, True)
+        self._entries[key] = {
+            "size": st.st_size,
+            "mtime": st.st_mtime_ns,
+            "offset": offset,
+            "compressed": compressed,
+            "runs": runs,
+        }
+        self._dirty = True
+        self.stats["parsed"] += 1
+        logger.debug("[%s] %s: %d runs", me, path, len(runs))
+        return key, runs
+
+    def runs(self) -> List[Tuple[Path, Any]]:
+        """
+        All runs with their log file, oldest first
+        """
+        me = "runs"
+        result: List[Tuple[Path, Any]] = []
+        keep = set()
+        for _, path in reversed(log_files(self.log_dir, self.log_name)):
+            try:
+                key, runs = self.file_runs(path)
+            except (OSError, EOFError) as e:
+                logger.debug("[%s] %s: %r", me, path, e)
+                continue
+            keep.add(key)
+            result.extend((path, run) for run in runs)
+
+        # drop index entries of deleted logs
+        for key in list(self._entries):
+            if key not in keep:
+                del self._entries[key]
+                self._dirty = True
+        logger.debug("[%s] %d runs, files %s", me, len(result), self.stats)
+        return result
+
+
+class DpkgRunIndex(RunIndex):
+    """
+    Runs of the unattended-upgrades dpkg logs: [[start, first byte, end byte], ...]
+    """
+
+    def __init__(self, log_dir: Path = UU_LOG_DIR, cache_file: Optional[Path] = DPKG_RUNS_CACHE_FILE):
+        super().__init__(UU_DPKG_LOG_NAME, _scan_runs, log_dir, cache_file)
+
+
+def _new_uu_run(start: str, position: int) -> dict:
+    return {"start": start, "end": start, "status": "", "range": [position, position],
+            "blacklist": [], "upgrade": [], "kept": [], "remove": [], "errors": []}
+
+
+def _scan_uu_runs(lines, offset: int, runs: List[dict], complete_only: bool) -> int:
+    """
+    Add the runs of unattended-upgrades.log lines read from offset on
+
+    :return: offset after the last line scanned
+    """
+    position = offset
+    # package list continued on the following lines
+    continued = None
+    for line in lines:
+        if complete_only and not line.endswith(b"\n"):
+            break
+        end = position + len(line)
+        match = UU_LINE_RE.match(line)
+        if match is None:
+            # continuation line, e.g. of the kept back packages
+            if continued and runs and runs[-1]["range"][1] == position:
+                runs[-1][continued].extend(line.decode("utf-8", errors="replace").split())
+                runs[-1]["range"][1] = end
+            position = end
+            continue
+
+        stamp = match.group(1).decode("ascii")
+        level = match.group(2).decode("ascii", errors="replace")
+        message = match.group(3).decode("utf-8", errors="replace")
+        continued = None
+        if message.startswith(UU_RUN_START) or not runs or runs[-1]["range"][1] != position:
+            runs.append(_new_uu_run(stamp if message.startswith(UU_RUN_START) else "", position))
+        run = runs[-1]
+        if not run["start"]:
+            run["start"] = stamp
+        run["end"] = stamp
+        run["range"][1] = end
+
+        if level in ("ERROR", "CRITICAL"):
+            if len(run["errors"]) < UU_MAX_ERRORS:
+                run["errors"].append(message)
+            run["status"] = "failed"
+        for prefix, field in UU_PACKAGE_LISTS:
+            if message.startswith(prefix):
+                run[field].extend(message[len(prefix):].replace("'", " ").replace(",", " ").split())
+                continued = field
+                break
+        else:
+            kept = UU_KEPT_BACK_RE.match(message)
+            if kept:
+                run["kept"].append(kept.group(1))
+        for prefix, status in UU_STATUS:
+            if message.startswith(prefix) and run["status"] != "failed":
+                run["status"] = status
+                break
+        position = end
+    return position
+
+
+class UURunIndex(RunIndex):
+    """
+    Run records of the unattended-upgrades logs:
+    [{"start", "end", "status", "range", "blacklist", "upgrade",
+      "kept", "remove", "errors"}, ...]
+
+    status is "upgraded", "nothing", "failed" or "" while running or
+    if the run ended without a result line.
+    """
+
+    def __init__(self, log_dir: Path = UU_LOG_DIR, cache_file: Optional[Path] = UU_RUNS_CACHE_FILE):
+        super().__init__(UU_LOG_NAME, _scan_uu_runs, log_dir, cache_file)
+
+
+def update_uu_runs(log_dir: Path = UU_LOG_DIR,
+                   cache_file: Optional[Path] = UU_RUNS_CACHE_FILE) -> List[dict]:
+    """
+    Update the run index from the logs, root only
+
+    :return: run records newest first
+    """
+    index = UURunIndex(log_dir, cache_file)
+    index.load_cache()
+    runs = index.runs()
+    index.save_cache()
+    return [run for _, run in reversed(runs)]
+
+
+def load_uu_runs(cache_file: Path = UU_RUNS_CACHE_FILE) -> Optional[List[dict]]:
+    """
+    Run records from the index without reading the logs
+
+    :return: run records newest first, None if there is no index
+    """
+    try:
+        with open(cache_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        entries = data["files"]
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logger.debug("[load_uu_runs] %s: %r", cache_file, e)
+        return None
+    if data.get("version") != UURunIndex.CACHE_VERSION or not isinstance(entries, dict):
+        return None
+    runs = [run for entry in entries.values() for run in entry.get("runs", [])]
+    runs.sort(key=lambda run: run.get("start", ""), reverse=True)
+    return runs
+
+
+def format_uu_run(run: dict) -> str:
+    """
+    One line summary of a run
+    """
+    line = f"{run['start'] or '?':19} {run['end'][11:] or '?':8} {run['status'] or '-':8}"
+    for field in ("upgrade", "remove", "kept", "blacklist"):
+        if run[field]:
+            line += f" {field}: {' '.join(run[field])}"
+    if run["errors"]:
+        line += f" errors: {len(run['errors'])}"
+    return line.rstrip()
+
+
+def select_runs(runs: List[Tuple[Path, list]], count: Optional[int] = None,
+                before: Optional[str] = None) -> Tuple[List[Tuple[Path, list]], bool]:
+    """
+    The latest count runs, only those started before 'before' if given
+
+    :return: (selected runs oldest first, True if older runs exist)
+    """
+    if before:
+        end = len(runs)
+        while end and runs[end - 1][1][0] >= before:
+            end -= 1
+        runs = runs[:end]
+    first = max(0, len(runs) - count) if count else 0
+    return runs[first:], first > 0
+
+
+def format_dpkg_run(data: bytes) -> bytes:
+    """
+    Run text without the dpkg progress lines, like
+    "sed 's/%\\x0D/%\\n/g' | grep -v %$"
+    """
+    lines = data.replace(b"%\r", b"%\n").split(b"\n")
+    tail = lines.pop()
+    text = b"".join(line + b"\n" for line in lines if not line.endswith(b"%"))
+    if tail and not tail.endswith(b"%"):
+        text += tail + b"\n"
+    return text
+
+
+def format_dpkg_runs(out: BinaryIO, runs: List[Tuple[Path, list]]) -> Optional[int]:
+    """
+    Write the given runs, each log file opened once
+
+    :return: byte offset of the latest run in the output, None if there is none
+    """
+    offset = 0
+    latest = None
+    f = None
+    current = None
+    try:
+        for path, (start, lo, hi) in runs:
+            if path != current:
+                if f is not None:
+                    f.close()
+                f = gzip.open(path, "rb") if is_compressed(path) else open(path, "rb")
+                current = path
+            # forward only for the compressed logs, runs are in file order
+            f.seek(lo)
+            text = format_dpkg_run(f.read(hi - lo))
+            latest = offset
+            out.write(text)
+            offset += len(text)
+    finally:
+        if f is not None:
+            f.close()
+    return latest
+
+
+def parse_offset_mark(text: str) -> Optional[int]:
+    """
+    The last latest-run offset in the stderr output of the log view
+    """
+    offsets = OFFSET_MARK_RE.findall(text or "")
+    return int(offsets[-1]) if offsets else None
+
+
+def parse_first_run_mark(text: str) -> Optional[str]:
+    """
+    Start of the first run shown if older ones exist, from the stderr
+    output of the dpkg log view
+    """
+    starts = [start for start in FIRST_RUN_MARK_RE.findall(text or "") if RUN_START_RE.match(start)]
+    return starts[-1] if starts else None
+
+
+def run_start(value: str) -> str:
+    if not RUN_START_RE.match(value):
+        raise argparse.ArgumentTypeError(f"not a 'YYYY-MM-DD HH:MM:SS' time: {value!r}")
+    return value
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="MX Updater unattended-upgrades log views")
+    p.add_argument("view", choices=("log", "dpkg", "runs"),
+                   help="log: the unattended-upgrades logs, "
+                        "dpkg: the unattended-upgrades dpkg logs, "
+                        "runs: one line per unattended-upgrades run, newest first")
+    p.add_argument("--latest-offset", action="store_true",
+                   help="print the byte offset of the latest run to stderr")
+    p.add_argument("--footer", default=None,
+                   help="text to append after the logs")
+    p.add_argument("--runs", type=int, default=None,
+                   help="dpkg, runs: show the latest RUNS runs only")
+    p.add_argument("--before", type=run_start, default=None,
+                   help="dpkg: show runs started before 'YYYY-MM-DD HH:MM:SS' only")
+    p.add_argument("--json", action="store_true",
+                   help="runs: print the run records as JSON")
+    p.add_argument("--log-dir", type=Path, default=UU_LOG_DIR,
+                   help=argparse.SUPPRESS)
+    p.add_argument("--debug", action="store_true",
+                   help="enable DEBUG logging")
+    return p.parse_args(argv)
+
+
+def print_runs(args) -> int:
+    if os.access(args.log_dir, os.R_OK | os.X_OK):
+        runs = update_uu_runs(args.log_dir)
+    else:
+        # logs readable by root only, the index by all
+        runs = load_uu_runs()
+        if runs is None:
+            sys.stderr.write(f"{UU_RUNS_CACHE_FILE}: no run index\n")
+            return 1
+    if args.runs:
+        runs = runs[:args.runs]
+    try:
+        if args.json:
+            json.dump(runs, sys.stdout, indent=1)
+            sys.stdout.write("\n")
+        else:
+            for run in runs:
+                sys.stdout.write(format_uu_run(run) + "\n")
+        sys.stdout.flush()
+    except BrokenPipeError:
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+    return 0
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.debug else logging.WARNING,
+                        format="%(levelname)s %(message)s")
+    if args.view == "runs":
+        return print_runs(args)
+
+    out = sys.stdout.buffer
+    older = None
+    try:
+        if args.view == "dpkg":
+            index = DpkgRunIndex(args.log_dir)
+            index.load_cache()
+            runs = index.runs()
+            index.save_cache()
+            runs, has_older = select_runs(runs, args.runs, args.before)
+            if has_older and runs[0][1][0]:
+                older = runs[0][1][0]
+            latest = format_dpkg_runs(out, runs)
+        else:
+            latest = format_uu_log(out, args.log_dir)
+            if os.geteuid() == 0:
+                # logs are read anyway, keep the run index of the tray current
+                update_uu_runs(args.log_dir)
+        if args.footer:
+            out.write(f"\n{args.footer}\n\n".encode("utf-8"))
+        out.flush()
+    except BrokenPipeError:
+        # pager quit early
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        return 0
+    if args.latest_offset and latest is not None:
+        sys.stderr.write(f"{OFFSET_MARK}{latest}\n")
+    if older:
+        sys.stderr.write(f"{FIRST_RUN_MARK}{older}\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,268 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Watcher for a hidden MX Updater systray icon
+
+With 'hide_until_upgrades_available' and 'exit_while_hidden' set,
+the systray icon exits while it is hidden and this watcher takes
+its place. It only uses GLib and dbus-python, waits for the
+UpgradesChanged signal of the system monitor and starts the
+systray icon again when upgrades are available.
+
+The watcher holds the systray lock file, so the system monitor
+keeps scanning on apt state changes, and exits as soon as the
+systray icon owns its session bus name.
+"""
+
+import os
+import logging
+import subprocess
+import configparser
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import dbus
+import dbus.mainloop.glib
+from gi.repository import GLib
+
+from updater_dbus import TRAYICON
+from updater_lock import acquire_runtime_lock, release_runtime_lock
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_SERVICE_NAME = "org.mxlinux.UpdaterSystemMonitor"
+SYSTEM_OBJECT_PATH  = "/org/mxlinux/UpdaterSystemMonitor"
+SYSTEM_INTERFACE    = "org.mxlinux.UpdaterSystemMonitor"
+
+# single watcher per session
+WATCHER_OBJECT_NAME = "org.mxlinux.UpdaterWatcher"
+
+# QSettings("MX-Linux", "mx-updater") file
+SETTINGS_FILE = Path(os.environ.get("XDG_CONFIG_HOME") or Path.home() / ".config") \
+                / "MX-Linux" / "mx-updater.conf"
+
+# seconds to wait for the systray icon to own its name
+SPAWN_TIMEOUT = 60
+# seconds to wait for the systray icon to go away on handoff
+HANDOFF_TIMEOUT = 15
+
+
+def read_settings() -> Dict[str, str]:
+    """
+    Read the [Settings] section of the QSettings ini file
+    without loading Qt
+    """
+    parser = configparser.ConfigParser(interpolation=None)
+    # keep the key case
+    parser.optionxform = str
+    try:
+        parser.read(SETTINGS_FILE, encoding="utf-8")
+    except (OSError, configparser.Error) as e:
+        logger.debug("[read_settings] %s: %r", SETTINGS_FILE, e)
+        return {}
+    if not parser.has_section("Settings"):
+        return {}
+    return dict(parser.items("Settings"))
+
+
+def _as_bool(value: Optional[str], default: bool = False) -> bool:
+    if value is None:
+        return default
+    return value.strip().lower() in ("true", "yes", "1")
+
+
+def watcher_enabled(settings: Optional[Dict[str, str]] = None) -> bool:
+    """
+    True if the systray icon is set up to exit while hidden
+    """
+    if settings is None:
+        settings = read_settings()
+    return (_as_bool(settings.get("hide_until_upgrades_available"))
+            and _as_bool(settings.get("exit_while_hidden")))
+
+
+def upgrades_pending(upgrades: Dict[str, Tuple[int, ...]],
+                     settings: Optional[Dict[str, str]] = None) -> int:
+    """
+    Number of upgraded and newly installed packages
+    for the selected upgrade type
+    """
+    if settings is None:
+        settings = read_settings()
+    upgrade_type = settings.get("upgrade_type", "full-upgrade")
+    upgrade_type = 'full-upgrade' if 'full' in upgrade_type or 'dist' in upgrade_type else 'basic-upgrade'
+    upgraded, newly_installed = tuple(upgrades.get(upgrade_type, (0, 0, 0, 0)))[0:2]
+    return upgraded + newly_installed
+
+
+class UpdaterWatcher:
+    """
+    Wait for upgrades and start the systray icon
+    """
+
+    def __init__(self, launch_args, handoff=False):
+        self.launch_args = launch_args
+        self.handoff = handoff
+        self.loop = GLib.MainLoop()
+        self.session_bus = dbus.SessionBus()
+        self.system_bus = dbus.SystemBus()
+        self.lock_path = None
+        self.tray_process = None
+        self._spawn_timeout_id = None
+        self._tray_owner = ""
+        self._started = False
+
+    def run(self) -> int:
+        me = "run"
+        try:
+            result = self.session_bus.request_name(
+                WATCHER_OBJECT_NAME, dbus.bus.NAME_FLAG_DO_NOT_QUEUE)
+        except dbus.exceptions.DBusException as e:
+            logger.error("[%s] Failed to request name %s: %r", me, WATCHER_OBJECT_NAME, e)
+            return 1
+        if result != dbus.bus.REQUEST_NAME_REPLY_PRIMARY_OWNER:
+            logger.info("[%s] %s is already running, exiting.", me, WATCHER_OBJECT_NAME)
+            return 0
+
+        try:
+            self._tray_owner = str(self.session_bus.get_name_owner(TRAYICON[0]))
+        except dbus.exceptions.DBusException:
+            self._tray_owner = ""
+        self.session_bus.watch_name_owner(TRAYICON[0], self._on_tray_owner_changed)
+
+        # updater-launch.py --quit
+        self.session_bus.add_signal_receiver(
+            self._on_quit,
+            signal_name="Quit",
+            path=TRAYICON[1],
+            dbus_interface=TRAYICON[2]
+        )
+
+        if self._tray_owner:
+            if not self.handoff:
+                logger.info("[%s] %s is running, exiting.", me, TRAYICON[0])
+                return 0
+            # the systray icon is about to exit
+            logger.debug("[%s] waiting for %s to exit", me, TRAYICON[0])
+            GLib.timeout_add_seconds(HANDOFF_TIMEOUT, self._on_handoff_timeout)
+        else:
+            self._start()
+
+        try:
+            self.loop.run()
+        finally:
+            release_runtime_lock(self.lock_path)
+        return 0
+
+    def _start(self):
+        me = "_start"
+        if self._started:
+            return
+        self._started = True
+        logger.info("[%s] MX Updater watcher started", me)
+
+        self.lock_path = acquire_runtime_lock()
+        if self.lock_path is None:
+            logger.debug("[%s] could not acquire runtime lock", me)
+
+        self.system_bus.add_signal_receiver(
+            self._on_upgrades_changed,
+            signal_name='UpgradesChanged',
+            bus_name=SYSTEM_SERVICE_NAME,
+            path=SYSTEM_OBJECT_PATH,
+            dbus_interface=SYSTEM_INTERFACE
+        )
+
+        # current state, the monitor gets activated if needed
+        try:
+            proxy = self.system_bus.get_object(
+                SYSTEM_SERVICE_NAME, SYSTEM_OBJECT_PATH, introspect=False)
+            interface = dbus.Interface(proxy, SYSTEM_INTERFACE)
+            interface.GetUpgradesAvailable(
+                reply_handler=self._on_upgrades_changed,
+                error_handler=lambda e: logger.debug("[%s] D-Bus service not available: %r", me, e))
+        except dbus.exceptions.DBusException as e:
+            logger.debug("[%s] D-Bus service not available: %r", me, e)
+
+    def _on_quit(self):
+        logger.info("[_on_quit] Got Quit signal, watcher exits.")
+        self.loop.quit()
+
+    def _on_handoff_timeout(self):
+        if not self._started:
+            logger.info("[_on_handoff_timeout] %s is still running, exiting.", TRAYICON[0])
+            self.loop.quit()
+        return False
+
+    def _on_tray_owner_changed(self, new_owner):
+        me = "_on_tray_owner_changed"
+        new_owner = str(new_owner)
+        if new_owner == self._tray_owner:
+            # initial callback from watch_name_owner
+            return
+        self._tray_owner = new_owner
+        if self._tray_owner:
+            # systray icon is up, it takes over the lock file
+            logger.info("[%s] %s is running, watcher exits.", me, TRAYICON[0])
+            self.loop.quit()
+        elif self.handoff and not self._started:
+            self._start()
+
+    def _on_upgrades_changed(self, upgrades):
+        me = "_on_upgrades_changed"
+        upgrades = {
+            str(upgrade_type): tuple(int(value) for value in upgrade_info)
+            for upgrade_type, upgrade_info in upgrades.items()
+        }
+        settings = read_settings()
+        pending = upgrades_pending(upgrades, settings)
+        logger.debug("[%s] upgrades available: %s pending: %d", me, upgrades, pending)
+
+        if pending > 0 or not watcher_enabled(settings):
+            self.spawn_tray()
+
+    def spawn_tray(self):
+        me = "spawn_tray"
+        if self._tray_owner:
+            return
+        if self.tray_process is not None and self.tray_process.poll() is None:
+            # already started, waiting for its bus name
+            return
+
+        logger.info("[%s] Launch MX Updater systray icon", me)
+        try:
+            self.tray_process = subprocess.Popen(self.launch_args)
+        except OSError as e:
+            logger.error("[%s] Error launching MX Updater: %r", me, e)
+            self.tray_process = None
+            return
+
+        if self._spawn_timeout_id is not None:
+            GLib.source_remove(self._spawn_timeout_id)
+        self._spawn_timeout_id = GLib.timeout_add_seconds(SPAWN_TIMEOUT, self._on_spawn_timeout)
+
+    def _on_spawn_timeout(self):
+        self._spawn_timeout_id = None
+        if not self._tray_owner and self.tray_process is not None \
+                and self.tray_process.poll() is not None:
+            logger.debug("[_on_spawn_timeout] systray icon exited with %r, keep watching",
+                         self.tray_process.returncode)
+            self.tray_process = None
+        return False
+
+
+def run_watcher(launch_args, handoff=False) -> int:
+    """
+    Run the watcher until the systray icon is running
+
+    :param launch_args: command to start the systray icon
+    :param handoff: started by the exiting systray icon,
+                    wait until it has gone
+    """
+    dbus.mainloop.glib.DBusGMainLoop(set_as_default=True)
+    try:
+        watcher = UpdaterWatcher(launch_args, handoff=handoff)
+    except dbus.exceptions.DBusException as e:
+        logger.error("[run_watcher] Unable to connect to D-Bus: %r", e)
+        return 1
+    return watcher.run()